@@ -86,6 +86,8 @@ if (-not $envVars.ContainsKey('USB_PRODUCT_ID')) { $envVars['USB_PRODUCT_ID'] =
 if (-not $envVars.ContainsKey('USB_INTERFACE')) { $envVars['USB_INTERFACE'] = '0' }
 if (-not $envVars.ContainsKey('USB_IN_EP')) { $envVars['USB_IN_EP'] = '0x81' }
 if (-not $envVars.ContainsKey('USB_OUT_EP')) { $envVars['USB_OUT_EP'] = '0x03' }
+if (-not $envVars.ContainsKey('MEMORY_RSS_BUDGET_MB')) { $envVars['MEMORY_RSS_BUDGET_MB'] = '0' }
+if (-not $envVars.ContainsKey('MEMORY_PROFILE')) { $envVars['MEMORY_PROFILE'] = 'false' }
 
 Write-Host ""
 Write-Host "Processing cloud-init templates..." -ForegroundColor Yellow
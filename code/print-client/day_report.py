@@ -0,0 +1,67 @@
+"""
+End-of-day report paging for the print client
+Fetches the report items from the server one page at a time while the report prints
+"""
+
+import logging
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from print_job import ReportItem
+
+logger = logging.getLogger('PrinterClient.DayReport')
+
+# Guards against a server that keeps answering with a next page
+MAX_REPORT_PAGES = 10000
+
+
+class ReportPages:
+    """
+    Items of a report job, fetched page by page as they are iterated
+
+    Only one page is held at a time. Fetch problems end the iteration and are
+    kept in 'error' instead of raised, so a server hiccup mid-report is not
+    mistaken for a printer failure by the send path.
+    """
+
+    def __init__(self, fetch_page: Callable[[int], Optional[Dict[str, Any]]], max_pages: int = MAX_REPORT_PAGES):
+        """
+        Initialize report pages
+
+        Args:
+            fetch_page: Requests one page by number (starting at 0) and returns the
+                server's answer ('items', 'nextPage', 'error'), or None without answer
+            max_pages: Maximum number of pages fetched
+        """
+        self.fetch_page = fetch_page
+        self.max_pages = max_pages
+        self.pages = 0
+        self.items = 0
+        self.error: Optional[str] = None
+
+    def __iter__(self) -> Iterator[ReportItem]:
+        page: Optional[int] = 0
+        while page is not None:
+            if self.pages >= self.max_pages:
+                self.error = f'Report has more than {self.max_pages} pages'
+                return
+            data = self.fetch_page(page)
+            if not isinstance(data, dict):
+                self.error = f'Page {page} not received from the server'
+                return
+            if data.get('error'):
+                self.error = str(data['error'])
+                return
+            self.pages += 1
+            items = data.get('items') or ()
+            logger.debug('Report page %d: %d items', page, len(items))
+
+            for raw in items:
+                if isinstance(raw, dict):
+                    self.items += 1
+                    yield ReportItem.from_payload(raw)
+
+            next_page = data.get('nextPage')
+            if next_page is not None and (not isinstance(next_page, int) or next_page <= page):
+                self.error = f'Invalid nextPage {next_page!r} after page {page}'
+                return
+            page = next_page
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Offline ESC/POS emulator
+Renders the exact byte stream sent to the printer into a receipt image for pixel-exact regression checks
+
+Usage:
+    python escpos_emulator.py ticket.bin -o ticket.png
+    python escpos_emulator.py old.bin --diff new.bin -o diff.png
+"""
+
+import argparse
+import sys
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import qrcode
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+logger = logging.getLogger('PrinterClient.EscPosEmulator')
+
+ESC = 0x1b
+GS = 0x1d
+LF = 0x0a
+
+# ESC t code pages that the formatter uses, mapped to Python codecs
+CODE_PAGES = {
+    0: 'cp437',
+    16: 'cp1252',
+}
+
+QR_ERROR_LEVELS = {
+    48: qrcode.constants.ERROR_CORRECT_L,
+    49: qrcode.constants.ERROR_CORRECT_M,
+    50: qrcode.constants.ERROR_CORRECT_Q,
+    51: qrcode.constants.ERROR_CORRECT_H,
+}
+
+
+class EscPosEmulatorError(ValueError):
+    """Exception raised for truncated or malformed ESC/POS streams"""
+    pass
+
+
+class EscPosEmulator:
+    """Interprets an ESC/POS byte stream and renders the resulting receipt as a 1-bit image"""
+
+    def __init__(self, paper_width: int = 512, char_width: int = 12, char_height: int = 24, line_spacing: int = 30):
+        """
+        Initialize emulator
+
+        Args:
+            paper_width: Printable width in dots (512 for 80mm paper)
+            char_width: Width of a font A character cell in dots
+            char_height: Height of a font A character cell in dots
+            line_spacing: Default line feed amount in dots
+        """
+        self.paper_width = paper_width
+        self.char_width = char_width
+        self.char_height = char_height
+        self.line_spacing = line_spacing
+        # Use the built-in bitmap font so renders do not depend on the FreeType version
+        load_bitmap_font = getattr(ImageFont, 'load_default_imagefont', ImageFont.load_default)
+        self._font = load_bitmap_font()
+        self._glyphs: Dict[Tuple[str, bool, int, int], Image.Image] = {}
+
+    def render(self, data: bytes) -> Image.Image:
+        """
+        Render an ESC/POS byte stream
+
+        Args:
+            data: Exact bytes as passed to send_raw_data
+
+        Returns:
+            Mode '1' image of the printed receipt (black = 0)
+
+        Raises:
+            EscPosEmulatorError: If a command is truncated or unsupported
+        """
+        state = _RenderState(self)
+        data = bytes(data)
+        i = 0
+        n = len(data)
+
+        while i < n:
+            b = data[i]
+            if b == LF:
+                state.line_feed()
+                i += 1
+            elif b == ESC:
+                i = self._esc(data, i, state)
+            elif b == GS:
+                i = self._gs(data, i, state)
+            elif b < 0x20:
+                # Other control characters (CR, HT, ...) do not print anything
+                i += 1
+            else:
+                state.add_char(bytes([b]).decode(state.codec, errors='replace'))
+                i += 1
+
+        state.flush_line(force=False)
+        return state.compose()
+
+    def _esc(self, data: bytes, i: int, state: '_RenderState') -> int:
+        """Handle an ESC command, returning the index after it"""
+        cmd = _byte(data, i + 1)
+        if cmd == ord('@'):
+            state.reset()
+            return i + 2
+        if cmd == ord('t'):
+            page = _byte(data, i + 2)
+            state.codec = CODE_PAGES.get(page, 'cp437')
+            return i + 3
+        if cmd == ord('a'):
+            state.set_align(_byte(data, i + 2) % 48)
+            return i + 3
+        if cmd == ord('E'):
+            state.bold = bool(_byte(data, i + 2) & 0x01)
+            return i + 3
+        if cmd == ord('d'):
+            state.line_feed()
+            for _ in range(_byte(data, i + 2) - 1):
+                state.line_feed()
+            return i + 3
+        raise EscPosEmulatorError(f'Unsupported command ESC 0x{cmd:02x} at offset {i}')
+
+    def _gs(self, data: bytes, i: int, state: '_RenderState') -> int:
+        """Handle a GS command, returning the index after it"""
+        cmd = _byte(data, i + 1)
+        if cmd == ord('!'):
+            size = _byte(data, i + 2)
+            state.width_mult = (size >> 4) + 1
+            state.height_mult = (size & 0x0f) + 1
+            return i + 3
+        if cmd == ord('v'):
+            return self._raster(data, i, state)
+        if cmd == ord('('):
+            return self._function(data, i, state)
+        if cmd == ord('V'):
+            mode = _byte(data, i + 2)
+            state.cut()
+            # Modes 65/66 (feed and cut) carry an extra feed amount byte
+            return i + (4 if mode in (65, 66) else 3)
+        raise EscPosEmulatorError(f'Unsupported command GS 0x{cmd:02x} at offset {i}')
+
+    def _raster(self, data: bytes, i: int, state: '_RenderState') -> int:
+        """Handle GS v 0 m xL xH yL yH d1...dk (raster bit image)"""
+        if _byte(data, i + 2) not in (0, ord('0')):
+            raise EscPosEmulatorError(f'Unsupported GS v function at offset {i}')
+        mode = _byte(data, i + 3) % 48
+        byte_width = _byte(data, i + 4) | (_byte(data, i + 5) << 8)
+        height = _byte(data, i + 6) | (_byte(data, i + 7) << 8)
+        start = i + 8
+        end = start + byte_width * height
+        if end > len(data):
+            raise EscPosEmulatorError(f'Truncated raster image at offset {i}')
+
+        # Raster bits are 1 = black, mode '1' images are 0 = black
+        image = Image.frombytes('1', (byte_width * 8, height), data[start:end], 'raw', '1;I')
+        if mode in (1, 3):
+            image = image.resize((image.width * 2, image.height), Image.Resampling.NEAREST)
+        if mode in (2, 3):
+            image = image.resize((image.width, image.height * 2), Image.Resampling.NEAREST)
+        state.add_image(image)
+        return end
+
+    def _function(self, data: bytes, i: int, state: '_RenderState') -> int:
+        """Handle GS ( k pL pH cn fn ... (2D code functions)"""
+        if _byte(data, i + 2) != ord('k'):
+            raise EscPosEmulatorError(f'Unsupported GS ( function at offset {i}')
+        length = _byte(data, i + 3) | (_byte(data, i + 4) << 8)
+        start = i + 5
+        end = start + length
+        if end > len(data) or length < 2:
+            raise EscPosEmulatorError(f'Truncated GS ( k command at offset {i}')
+        cn, fn = data[start], data[start + 1]
+        params = data[start + 2:end]
+
+        if cn == 49:  # QR code
+            if fn == 67:
+                state.qr_module_size = max(1, params[0])
+            elif fn == 69:
+                state.qr_error_level = QR_ERROR_LEVELS.get(params[0], qrcode.constants.ERROR_CORRECT_M)
+            elif fn == 80:
+                state.qr_data = params[1:]
+            elif fn == 81:
+                state.add_image(self._render_qr(state))
+        return end
+
+    def _render_qr(self, state: '_RenderState') -> Image.Image:
+        """Render the stored QR code symbol"""
+        qr = qrcode.QRCode(error_correction=state.qr_error_level, box_size=state.qr_module_size, border=0)
+        qr.add_data(state.qr_data)
+        qr.make(fit=True)
+        return qr.make_image(fill_color='black', back_color='white').convert('1')
+
+    def glyph(self, char: str, bold: bool, width_mult: int, height_mult: int) -> Image.Image:
+        """
+        Get the ink mask for a character cell
+
+        Args:
+            char: Character to draw
+            bold: Emphasized printing
+            width_mult: Character width multiplier
+            height_mult: Character height multiplier
+
+        Returns:
+            Mode '1' mask (ink = 1) of the scaled character cell
+        """
+        key = (char, bold, width_mult, height_mult)
+        glyph = self._glyphs.get(key)
+        if glyph is None:
+            # Draw at half resolution with the built-in bitmap font, then scale up
+            half = Image.new('1', (self.char_width // 2, self.char_height // 2), 0)
+            draw = ImageDraw.Draw(half)
+            try:
+                draw.text((0, 0), char, font=self._font, fill=1)
+                if bold:
+                    draw.text((1, 0), char, font=self._font, fill=1)
+            except UnicodeEncodeError:
+                draw.rectangle((1, 2, half.width - 2, half.height - 2), outline=1)
+            glyph = half.resize(
+                (self.char_width * width_mult, self.char_height * height_mult),
+                Image.Resampling.NEAREST
+            )
+            self._glyphs[key] = glyph
+        return glyph
+
+
+class _RenderState:
+    """Mutable printer state while interpreting a stream"""
+
+    def __init__(self, emulator: EscPosEmulator):
+        self.emulator = emulator
+        self.rows: List[Image.Image] = []
+        self.line: List[Tuple[str, bool, int, int]] = []
+        self.line_align = 0
+        self.qr_module_size = 3
+        self.qr_error_level = qrcode.constants.ERROR_CORRECT_M
+        self.qr_data = b''
+        self.reset()
+
+    def reset(self) -> None:
+        """ESC @ - restore default print settings"""
+        self.codec = 'cp437'
+        self.align = 0
+        self.bold = False
+        self.width_mult = 1
+        self.height_mult = 1
+
+    def set_align(self, align: int) -> None:
+        """ESC a - alignment takes effect at the start of a line"""
+        self.align = align
+        if not self.line:
+            self.line_align = align
+
+    def add_char(self, char: str) -> None:
+        """Add a printable character, wrapping at the paper edge"""
+        width = self.emulator.char_width * self.width_mult
+        if self._line_width() + width > self.emulator.paper_width:
+            self.flush_line(force=True)
+        if not self.line:
+            self.line_align = self.align
+        self.line.append((char, self.bold, self.width_mult, self.height_mult))
+
+    def _line_width(self) -> int:
+        return sum(self.emulator.char_width * w for _, _, w, _ in self.line)
+
+    def line_feed(self) -> None:
+        """LF - print the line buffer and feed one line"""
+        self.flush_line(force=True)
+
+    def flush_line(self, force: bool) -> None:
+        """Render the buffered characters as one row"""
+        emulator = self.emulator
+        if not self.line:
+            if force:
+                self.rows.append(Image.new('1', (emulator.paper_width, emulator.line_spacing), 1))
+            return
+
+        height = max(emulator.char_height * h for _, _, _, h in self.line)
+        row = Image.new('1', (emulator.paper_width, max(height + emulator.line_spacing - emulator.char_height, emulator.line_spacing)), 1)
+        x = self._offset(self._line_width())
+        for char, bold, w, h in self.line:
+            glyph = emulator.glyph(char, bold, w, h)
+            # Characters of different heights share the same baseline
+            row.paste(0, (x, height - glyph.height), glyph)
+            x += glyph.width
+        self.rows.append(row)
+        self.line = []
+
+    def add_image(self, image: Image.Image) -> None:
+        """Print a raster image or 2D code at the current alignment"""
+        self.flush_line(force=False)
+        row = Image.new('1', (self.emulator.paper_width, image.height), 1)
+        row.paste(image, (self._offset(image.width, self.align), 0))
+        self.rows.append(row)
+
+    def cut(self) -> None:
+        """GS V - mark the cut position with a dashed line"""
+        self.flush_line(force=False)
+        row = Image.new('1', (self.emulator.paper_width, 9), 1)
+        draw = ImageDraw.Draw(row)
+        for x in range(0, self.emulator.paper_width, 16):
+            draw.line((x, 4, x + 7, 4), fill=0)
+        self.rows.append(row)
+
+    def _offset(self, width: int, align: Optional[int] = None) -> int:
+        """Horizontal start position for content of the given width"""
+        align = self.line_align if align is None else align
+        free = max(self.emulator.paper_width - width, 0)
+        if align == 1:
+            return free // 2
+        if align == 2:
+            return free
+        return 0
+
+    def compose(self) -> Image.Image:
+        """Stack all rendered rows into the receipt image"""
+        height = sum(row.height for row in self.rows)
+        receipt = Image.new('1', (self.emulator.paper_width, max(height, 1)), 1)
+        y = 0
+        for row in self.rows:
+            receipt.paste(row, (0, y))
+            y += row.height
+        return receipt
+
+
+def _byte(data: bytes, index: int) -> int:
+    """Read a command parameter byte, failing on truncated streams"""
+    if index >= len(data):
+        raise EscPosEmulatorError(f'Truncated command at offset {index}')
+    return data[index]
+
+
+def diff_images(a: Image.Image, b: Image.Image) -> Tuple[int, Image.Image]:
+    """
+    Compare two rendered receipts pixel by pixel
+
+    Args:
+        a: First receipt image
+        b: Second receipt image
+
+    Returns:
+        Tuple of (number of differing pixels, image with differing pixels in black)
+    """
+    width = max(a.width, b.width)
+    height = max(a.height, b.height)
+    canvas_a = Image.new('1', (width, height), 1)
+    canvas_a.paste(a, (0, 0))
+    canvas_b = Image.new('1', (width, height), 1)
+    canvas_b.paste(b, (0, 0))
+
+    difference = ImageChops.logical_xor(canvas_a, canvas_b)
+    changed = difference.histogram()[255]
+    return changed, ImageChops.invert(difference)
+
+
+def compare_streams(a: bytes, b: bytes, emulator: Optional[EscPosEmulator] = None) -> int:
+    """
+    Compare two ESC/POS byte streams by their printed output
+
+    Args:
+        a: First byte stream
+        b: Second byte stream
+        emulator: Emulator to render with (a default one is created if omitted)
+
+    Returns:
+        Number of differing pixels (0 if the printed receipts are identical)
+    """
+    if a == b:
+        return 0
+    emulator = emulator or EscPosEmulator()
+    changed, _ = diff_images(emulator.render(a), emulator.render(b))
+    return changed
+
+
+def main() -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Render ESC/POS byte streams to images')
+    parser.add_argument('input', help='File with raw ESC/POS bytes')
+    parser.add_argument('-o', '--output', help='PNG file to write the rendered receipt (or diff) to')
+    parser.add_argument('--diff', metavar='OTHER', help='Second byte stream to compare against')
+    parser.add_argument('--paper-width', type=int, default=512, help='Printable width in dots (default: 512)')
+    args = parser.parse_args()
+
+    emulator = EscPosEmulator(paper_width=args.paper_width)
+    with open(args.input, 'rb') as input_file:
+        image = emulator.render(input_file.read())
+
+    if args.diff:
+        with open(args.diff, 'rb') as other_file:
+            other = emulator.render(other_file.read())
+        changed, diff = diff_images(image, other)
+        print(f'{changed} differing pixels')
+        if args.output:
+            diff.save(args.output)
+        return 1 if changed else 0
+
+    if args.output:
+        image.save(args.output)
+    print(f'Rendered {image.width}x{image.height} receipt')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
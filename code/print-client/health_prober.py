@@ -0,0 +1,181 @@
+"""
+Printer health prober for the print client
+Probes printer connectivity and paper status in the background so health reads cost nothing
+"""
+
+import random
+import threading
+import time
+import logging
+from typing import Callable, List, Optional
+
+from printer_base import BasePrinter, PAPER_NEAR_END, PAPER_OUT
+
+logger = logging.getLogger('PrinterClient.HealthProber')
+
+
+class PrinterHealth:
+    """Snapshot of the printer health at one point in time"""
+
+    __slots__ = ('reachable', 'paper', 'checked_at')
+
+    def __init__(self, reachable: bool, paper: Optional[str] = None, checked_at: Optional[float] = None):
+        """
+        Initialize health snapshot
+
+        Args:
+            reachable: Whether the printer answered
+            paper: Paper status (PAPER_OK, PAPER_NEAR_END, PAPER_OUT) or None if unknown
+            checked_at: time.monotonic() timestamp of the observation
+        """
+        self.reachable = reachable
+        self.paper = paper
+        self.checked_at = checked_at if checked_at is not None else time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the printer can print right now"""
+        return self.reachable and self.paper != PAPER_OUT
+
+    @property
+    def paper_low(self) -> bool:
+        """Whether the paper roll is nearly empty"""
+        return self.paper == PAPER_NEAR_END
+
+    def __repr__(self) -> str:
+        return f'PrinterHealth(reachable={self.reachable}, paper={self.paper!r})'
+
+
+# Called with (previous, current) health when the healthy state or paper status changes
+HealthListener = Callable[[PrinterHealth, PrinterHealth], None]
+
+
+class HealthProber:
+    """Background thread that periodically probes a printer and caches the result"""
+
+    def __init__(self, printer: BasePrinter, interval: float = 30.0, jitter: float = 0.2):
+        """
+        Initialize health prober
+
+        Args:
+            printer: Printer to probe
+            interval: Seconds between probes
+            jitter: Random fraction of the interval added or removed per probe
+        """
+        self.printer = printer
+        self.interval = interval
+        self.jitter = jitter
+        # Optimistic until the first probe; the breaker still guards real prints
+        self._health = PrinterHealth(reachable=True, checked_at=0.0)
+        self._check_paper = True
+        self._listeners: List[HealthListener] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def health(self) -> PrinterHealth:
+        """Latest cached health snapshot"""
+        return self._health
+
+    def is_healthy(self) -> bool:
+        """Cached health, without touching the printer"""
+        return self._health.healthy
+
+    def add_listener(self, listener: HealthListener) -> None:
+        """
+        Register a callback for health changes
+
+        Args:
+            listener: Function called with (previous, current) health
+        """
+        self._listeners.append(listener)
+
+    def start(self) -> None:
+        """Start the background probe thread"""
+        self._thread = threading.Thread(target=self._run, name='printer-health-prober', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background probe thread"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def probe_soon(self) -> None:
+        """Run the next probe right away instead of waiting for the interval"""
+        self._wakeup.set()
+
+    def record_result(self, success: bool) -> None:
+        """
+        Record the outcome of a real print as a health observation
+
+        Args:
+            success: Whether the print reached the printer
+        """
+        current = self._health
+        self._update(PrinterHealth(reachable=success, paper=current.paper))
+        if not success or not current.healthy:
+            # Confirm the new state (or a refilled paper roll) without waiting a full interval
+            self.probe_soon()
+
+    def probe(self) -> PrinterHealth:
+        """
+        Probe the printer now and update the cached health
+
+        Returns:
+            New health snapshot
+        """
+        reachable = self.printer.test_connection()
+        paper = self._health.paper
+        if reachable and self._check_paper:
+            status = self.printer.get_paper_status()
+            if status is not None:
+                paper = status
+            elif paper is None:
+                # Never answered a status request: the printer (or backend) does not support it
+                logger.debug('Paper status not supported by %s', self.printer.get_connection_info())
+                self._check_paper = False
+        health = PrinterHealth(reachable=reachable, paper=paper)
+        self._update(health)
+        return health
+
+    def _run(self) -> None:
+        """Probe loop"""
+        while not self._stopped.is_set():
+            # A print in progress is the freshest health signal, don't compete with it
+            if not getattr(self.printer, 'is_busy', False):
+                try:
+                    self.probe()
+                except Exception as e:
+                    logger.warning(f'Health probe failed: {e}')
+                    self._update(PrinterHealth(reachable=False, paper=self._health.paper))
+            delay = self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+            self._wakeup.wait(max(delay, 0.0))
+            self._wakeup.clear()
+
+    def _update(self, health: PrinterHealth) -> None:
+        """Store a new observation and notify listeners when the state changed"""
+        with self._lock:
+            previous = self._health
+            self._health = health
+        if previous.healthy == health.healthy and previous.paper == health.paper:
+            return
+
+        if health.healthy != previous.healthy:
+            if health.healthy:
+                logger.info('Printer is healthy again')
+            elif health.reachable:
+                logger.warning('Printer is out of paper')
+            else:
+                logger.warning('Printer is unreachable')
+        elif health.paper_low:
+            logger.warning('Printer paper is running low')
+
+        for listener in self._listeners:
+            try:
+                listener(previous, health)
+            except Exception as e:
+                logger.error(f'Health listener failed: {e}')
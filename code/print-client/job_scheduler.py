@@ -0,0 +1,219 @@
+"""
+Priority scheduler for print jobs
+Orders queued jobs by priority (delivery receipts before intake tickets) with aging so nothing starves
+"""
+
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple
+
+logger = logging.getLogger('PrinterClient.JobScheduler')
+
+# Priority levels (lower value is printed first)
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_HIGH: 'high',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_LOW: 'low',
+}
+
+# Default priority per printData type
+TYPE_PRIORITIES = {
+    'delivery': PRIORITY_HIGH,
+    # End-of-day reports are long, customers' tickets go first
+    'report': PRIORITY_LOW,
+}
+
+
+def get_job_priority(data: Dict[str, Any]) -> int:
+    """
+    Determine the priority of a print job
+
+    An explicit 'priority' field (on the job or in printData) wins, otherwise
+    the priority follows the ticket type.
+
+    Args:
+        data: Print job data as received from the server
+
+    Returns:
+        Priority level (PRIORITY_HIGH, PRIORITY_NORMAL or PRIORITY_LOW)
+    """
+    print_data = data.get('printData') or {}
+    explicit = data.get('priority', print_data.get('priority'))
+    if explicit is not None:
+        try:
+            return min(max(int(explicit), PRIORITY_HIGH), PRIORITY_LOW)
+        except (TypeError, ValueError):
+            logger.warning(f'Ignoring invalid job priority: {explicit!r}')
+    return TYPE_PRIORITIES.get(print_data.get('type'), PRIORITY_NORMAL)
+
+
+class ExpiryPolicy:
+    """Maximum age per ticket type after which a job is no longer worth printing"""
+
+    def __init__(self, max_ages: Optional[Dict[str, float]] = None, default_max_age: float = 0.0):
+        """
+        Initialize expiry policy
+
+        Args:
+            max_ages: Maximum age in seconds per printData type, 0 never expires
+            default_max_age: Maximum age in seconds for other types (intake tickets), 0 never expires
+        """
+        self.max_ages = dict(max_ages or {})
+        self.default_max_age = default_max_age
+
+    def max_age_for(self, ticket_type: Optional[str]) -> float:
+        """Maximum age in seconds for a ticket type, 0 if it never expires"""
+        return self.max_ages.get(ticket_type, self.default_max_age)
+
+    def is_expired(self, job: Any) -> bool:
+        """
+        Check whether a job waited too long to be printed
+
+        Args:
+            job: Validated print job
+
+        Returns:
+            True if the job is older than the maximum age for its type
+        """
+        max_age = self.max_age_for(job.ticket_type)
+        return max_age > 0 and job.age() > max_age
+
+
+class PriorityJobScheduler:
+    """Thread-safe priority queue for print jobs with aging"""
+
+    def __init__(self, aging_interval: float = 30.0):
+        """
+        Initialize job scheduler
+
+        Args:
+            aging_interval: Seconds of waiting after which a job is promoted by one priority level
+        """
+        self.aging_interval = aging_interval
+        self._queues: Dict[int, Deque[Tuple[float, Any]]] = {
+            level: deque() for level in PRIORITY_NAMES
+        }
+        self._condition = threading.Condition()
+        self._closed = False
+        # While held, jobs stay queued (and keep aging) but are not handed out
+        self._held = False
+
+        # Per-priority wait time statistics: [jobs, total wait, max wait]
+        self._wait_stats: Dict[int, list] = {level: [0, 0.0, 0.0] for level in PRIORITY_NAMES}
+
+    def put(self, job: Any, priority: int = PRIORITY_NORMAL) -> None:
+        """
+        Add a job to the queue
+
+        Args:
+            job: Validated print job
+            priority: Priority level of the job
+        """
+        with self._condition:
+            self._queues[priority].append((time.monotonic(), job))
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Take the next job to print, blocking until one is available and the queue is not held
+
+        Args:
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            Print job, or None on timeout or when the scheduler is closed
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._closed or (not self._held and self._size() > 0), timeout):
+                return None
+            if self._closed:
+                return None
+
+            now = time.monotonic()
+            level = self._select_level(now)
+            enqueued_at, job = self._queues[level].popleft()
+
+            wait = now - enqueued_at
+            stats = self._wait_stats[level]
+            stats[0] += 1
+            stats[1] += wait
+            stats[2] = max(stats[2], wait)
+
+        logger.debug(f'Dequeued {PRIORITY_NAMES[level]} priority job after {wait:.3f}s')
+        return job
+
+    def _select_level(self, now: float) -> int:
+        """Pick the queue whose head has the best priority after aging"""
+        best_level = None
+        best_score = None
+        for level, queue in self._queues.items():
+            if not queue:
+                continue
+            # Each aging interval spent waiting promotes the job by one level
+            score = level - (now - queue[0][0]) / self.aging_interval
+            if best_score is None or score < best_score:
+                best_level, best_score = level, score
+        return best_level
+
+    def _size(self) -> int:
+        """Total number of queued jobs (caller must hold the lock)"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self._size()
+
+    def get_wait_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get queue wait time statistics per priority level
+
+        Returns:
+            Dict of priority name to jobs, average and maximum wait in seconds, and current depth
+        """
+        with self._condition:
+            return {
+                PRIORITY_NAMES[level]: {
+                    'jobs': jobs,
+                    'avg_wait': total / jobs if jobs else 0.0,
+                    'max_wait': max_wait,
+                    'queued': len(self._queues[level]),
+                }
+                for level, (jobs, total, max_wait) in self._wait_stats.items()
+            }
+
+    def log_wait_stats(self) -> None:
+        """Log queue wait time statistics per priority level"""
+        for name, stats in self.get_wait_stats().items():
+            if stats['jobs']:
+                logger.info(
+                    f'Queue wait ({name}): {stats["jobs"]} jobs, '
+                    f'avg {stats["avg_wait"]:.2f}s, max {stats["max_wait"]:.2f}s'
+                )
+
+    def hold(self) -> None:
+        """Stop handing out jobs until release() is called, keeping them queued"""
+        with self._condition:
+            self._held = True
+
+    def release(self) -> None:
+        """Hand out queued jobs again after hold()"""
+        with self._condition:
+            self._held = False
+            self._condition.notify_all()
+
+    @property
+    def is_held(self) -> bool:
+        """Whether jobs are being kept queued"""
+        return self._held
+
+    def close(self) -> None:
+        """Close the scheduler and wake up waiting workers"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
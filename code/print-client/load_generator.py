@@ -0,0 +1,319 @@
+"""
+Repair Café traffic generator for the stand-in printer server
+Replays a café-day mix of intake and delivery jobs and reports end-to-end latency and throughput per printer
+
+Usage:
+    python load_generator.py --spawn-clients 2 [--rate 2] [--duration 60] [--reconnect-every 20]
+
+Without --spawn-clients, start real print clients against the printed SOCKETIO_URL instead.
+"""
+
+import argparse
+import random
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from printer_base import BasePrinter
+from standin_server import StandInServer
+from socket_client import SocketIOClient
+from ticket_formatter import TicketFormatter
+from load_report import LoadTracker
+from printer_client import PrintJobHandler
+
+logger = logging.getLogger('PrinterClient.LoadGenerator')
+
+AFDELINGEN = ['Elektro', 'Textiel', 'Fietsen', 'Computers', 'Houtwerk']
+VOORWERPEN = [
+    ('Koffiezetapparaat', 'Warmt niet meer op'),
+    ('Broek', 'Rits is kapot'),
+    ('Stofzuiger', 'Zuigt niet meer, maakt veel lawaai'),
+    ('Laptop', 'Start niet op na update'),
+    ('Stoel', 'Poot zit los'),
+    ('Fiets', 'Versnellingen verspringen'),
+    ('Radio', 'Geen geluid, lampje brandt wel'),
+]
+MATERIALS = [
+    ('Zekering 5A', 75), ('Schroef M3x10', 10), ('Soldeertin', 150), ('Netsnoer 2m', 495),
+    ('Krimpkous', 25), ('Rits 20cm', 250), ('Remkabel', 399), ('Houtlijm', 120),
+]
+MAX_MATERIALS = 8
+
+
+class SimulatedPrinter(BasePrinter):
+    """Printer that only takes time: a fixed setup per ticket plus a line speed in bytes per second"""
+
+    def __init__(self, name: str, bytes_per_second: float = 20000.0, setup_time: float = 0.05):
+        """
+        Initialize simulated printer
+
+        Args:
+            name: Name used in the connection info
+            bytes_per_second: Simulated transfer and print speed
+            setup_time: Simulated time per print session in seconds
+        """
+        self.name = name
+        self.bytes_per_second = bytes_per_second
+        self.setup_time = setup_time
+
+    def send_raw_data(self, data: bytes) -> None:
+        """Pretend to print the data"""
+        time.sleep(self.setup_time + len(data) / self.bytes_per_second)
+
+    def test_connection(self) -> bool:
+        """The simulated printer is always reachable"""
+        return True
+
+    def get_connection_info(self) -> str:
+        """Get connection information"""
+        return f'Simulated printer {self.name}'
+
+
+def make_intake_payload(rng: random.Random, volgnummer: str) -> Dict[str, Any]:
+    """
+    Build an intake ticket payload
+
+    Args:
+        rng: Random source
+        volgnummer: Tracking number
+
+    Returns:
+        'print-job' payload without printJobId
+    """
+    voorwerp, klacht = rng.choice(VOORWERPEN)
+    payload = {
+        'volgnummer': volgnummer,
+        'klantType': rng.choice(['Student', 'Externe']),
+        'afdelingNaam': rng.choice(AFDELINGEN),
+        'voorwerpBeschrijving': voorwerp,
+        'klachtBeschrijving': klacht,
+        'printData': None,
+    }
+    # Most tables print a customer copy and a label for the item
+    if rng.random() < 0.6:
+        payload['copyLabels'] = ['KLANT', 'VOORWERP']
+    return payload
+
+
+def make_delivery_payload(rng: random.Random, volgnummer: str) -> Dict[str, Any]:
+    """
+    Build a delivery receipt payload with a material list
+
+    Args:
+        rng: Random source
+        volgnummer: Tracking number
+
+    Returns:
+        'print-job' payload without printJobId
+    """
+    voorwerp, klacht = rng.choice(VOORWERPEN)
+    materials = []
+    for naam, prijs in rng.sample(MATERIALS, rng.randint(0, MAX_MATERIALS)):
+        aantal = rng.randint(1, 4)
+        materials.append({'naam': naam, 'aantal': aantal, 'prijsPerStuk': prijs, 'totaalPrijs': prijs * aantal})
+    subtotal = sum(m['totaalPrijs'] for m in materials)
+    return {
+        'volgnummer': volgnummer,
+        'klantType': rng.choice(['Student', 'Externe']),
+        'afdelingNaam': rng.choice(AFDELINGEN),
+        'voorwerpBeschrijving': voorwerp,
+        'klachtBeschrijving': klacht,
+        'printData': {
+            'type': 'delivery',
+            'advies': rng.choice(['Onderdeel vervangen.', 'Schoongemaakt en afgesteld.', 'Niet te repareren.']),
+            'materials': materials,
+            'subtotal': subtotal,
+            'totalPrice': subtotal,
+        },
+    }
+
+
+def delivery_share(progress: float, delivery_ratio: float) -> float:
+    """
+    Share of delivery jobs at a point in the café day
+
+    Intake dominates the start of the day and deliveries the end; the average over
+    the day equals delivery_ratio.
+
+    Args:
+        progress: Fraction of the run that has passed (0.0 - 1.0)
+        delivery_ratio: Average share of delivery jobs over the run
+
+    Returns:
+        Probability that the next job is a delivery receipt
+    """
+    swing = min(delivery_ratio, 1 - delivery_ratio)
+    return delivery_ratio + swing * (2 * progress - 1)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class LoadStats:
+    """Collects job outcomes per printer"""
+
+    def __init__(self):
+        """Initialize statistics"""
+        self.latencies: Dict[str, List[float]] = {}
+        self.failed: Dict[str, int] = {}
+        self.finished = 0
+        self.last_finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, printer_naam: str, print_job_id: int, success: bool, latency: float) -> None:
+        """Record one job outcome (StandInServer.on_result callback)"""
+        with self._lock:
+            self.finished += 1
+            self.last_finished_at = time.monotonic()
+            if success:
+                self.latencies.setdefault(printer_naam, []).append(latency)
+            else:
+                self.failed[printer_naam] = self.failed.get(printer_naam, 0) + 1
+
+    def report(self, submitted: int, elapsed: float) -> str:
+        """
+        Build the summary table
+
+        Args:
+            submitted: Number of jobs created
+            elapsed: Time in seconds from the first job to the last outcome
+
+        Returns:
+            Report text
+        """
+        with self._lock:
+            names = sorted(set(self.latencies) | set(self.failed))
+            rows: List[Tuple[str, List[float], int]] = [
+                (name, sorted(self.latencies.get(name, [])), self.failed.get(name, 0)) for name in names
+            ]
+            all_latencies = sorted(latency for _, values, _ in rows for latency in values)
+            rows.append(('TOTAL', all_latencies, sum(self.failed.values())))
+            finished = self.finished
+
+        lines = [
+            f'{"printer":<16} {"done":>6} {"failed":>6} {"jobs/s":>7} '
+            f'{"p50 ms":>8} {"p90 ms":>8} {"p99 ms":>8} {"max ms":>8}'
+        ]
+        for name, values, failed in rows:
+            throughput = len(values) / elapsed if elapsed > 0 else 0.0
+            lines.append(
+                f'{name:<16} {len(values):>6} {failed:>6} {throughput:>7.2f} '
+                f'{percentile(values, 0.50) * 1000:>8.0f} {percentile(values, 0.90) * 1000:>8.0f} '
+                f'{percentile(values, 0.99) * 1000:>8.0f} {(values[-1] if values else 0.0) * 1000:>8.0f}'
+            )
+        lines.append(f'submitted: {submitted}, unfinished: {submitted - finished}, elapsed: {elapsed:.1f}s')
+        return '\n'.join(lines)
+
+
+def spawn_client(server_url: str, name: str, args: argparse.Namespace) -> Tuple[SocketIOClient, PrintJobHandler]:
+    """Start an in-process print client with a simulated printer"""
+    socket_client = SocketIOClient(server_url, name, load_report_interval=5.0)
+    handler = PrintJobHandler(
+        socket_client,
+        SimulatedPrinter(name, bytes_per_second=args.printer_speed),
+        TicketFormatter(),
+        load_tracker=LoadTracker(capacity=args.client_capacity)
+    )
+    handler.start()
+    socket_client.connect()
+    return socket_client, handler
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run the load test"""
+    rng = random.Random(args.seed)
+    server = StandInServer()
+    stats = LoadStats()
+    server.on_result = stats.record
+    server.start(args.host, args.port)
+    server_url = f'http://{args.host}:{args.port}'
+
+    clients = []
+    for i in range(args.spawn_clients):
+        clients.append(spawn_client(server_url, f'Sim-{i + 1:02d}', args))
+    if not clients:
+        logger.warning(f'No clients spawned, start print clients with SOCKETIO_URL={server_url}')
+
+    submitted = 0
+    started = time.monotonic()
+    next_reconnect = started + args.reconnect_every if args.reconnect_every > 0 else None
+    try:
+        while True:
+            now = time.monotonic()
+            progress = (now - started) / args.duration
+            if progress >= 1:
+                break
+
+            if next_reconnect is not None and now >= next_reconnect:
+                # All printers drop at once, like a flaky venue Wi-Fi access point
+                dropped = [name for name in server.connected_printers if server.drop_printer(name)]
+                logger.warning(f'Reconnect burst: dropped {len(dropped)} printers')
+                next_reconnect += args.reconnect_every
+
+            submitted += 1
+            volgnummer = f'RC-2025-{submitted:04d}'
+            if rng.random() < delivery_share(progress, args.delivery_ratio):
+                server.submit_job(make_delivery_payload(rng, volgnummer))
+            else:
+                server.submit_job(make_intake_payload(rng, volgnummer))
+
+            # Poisson arrivals
+            time.sleep(rng.expovariate(args.rate))
+
+        # Let the printers finish what was sent
+        deadline = time.monotonic() + args.drain_timeout
+        while stats.finished < submitted and time.monotonic() < deadline:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        logger.info('Interrupted, reporting what finished so far')
+
+    elapsed = (stats.last_finished_at or time.monotonic()) - started
+    print(stats.report(submitted, elapsed))
+
+    for socket_client, handler in clients:
+        socket_client.disconnect()
+        handler.stop()
+    server.stop()
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Replay café-day print traffic against a stand-in server')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface for the stand-in server')
+    parser.add_argument('--port', type=int, default=3100, help='TCP port for the stand-in server')
+    parser.add_argument('--rate', type=float, default=1.0, help='Average number of new jobs per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='Seconds to generate jobs')
+    parser.add_argument('--delivery-ratio', type=float, default=0.4, help='Average share of delivery receipts (0.0 - 1.0)')
+    parser.add_argument('--reconnect-every', type=float, default=0.0, help='Seconds between reconnect bursts (0 disables them)')
+    parser.add_argument('--drain-timeout', type=float, default=30.0, help='Seconds to wait for unfinished jobs at the end')
+    parser.add_argument('--spawn-clients', type=int, default=0, help='In-process print clients with simulated printers')
+    parser.add_argument('--client-capacity', type=int, default=20, help='Credit window of each spawned client')
+    parser.add_argument('--printer-speed', type=float, default=20000.0, help='Simulated printer speed in bytes per second')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for a reproducible job mix')
+    parser.add_argument('--verbose', action='store_true', help='Show print client logging')
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0:
+        parser.error('--rate and --duration must be positive')
+    if not 0 <= args.delivery_ratio <= 1:
+        parser.error('--delivery-ratio must be between 0 and 1')
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    logger.setLevel(logging.INFO)
+    logging.getLogger('PrinterClient.StandInServer').setLevel(logging.INFO)
+    # Request lines and the dev server's complaints about closing websockets drown out the report
+    logging.getLogger('werkzeug').setLevel(logging.CRITICAL)
+    run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Printer load tracking for the print client
+Builds the compact load reports the server uses to route jobs to the least-loaded printer
+"""
+
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any, Deque
+
+logger = logging.getLogger('PrinterClient.LoadReport')
+
+# Status flags (bitmask), mirrored in rc-app/types/socket.ts
+FLAG_BUSY = 0x01            # A job is being printed right now
+FLAG_PRINTER_DOWN = 0x02    # The printer is known to be unreachable
+FLAG_RECENT_FAILURE = 0x04  # The last print attempt failed
+FLAG_PAPER_LOW = 0x08       # The paper roll is nearly empty
+
+
+class LoadTracker:
+    """Tracks recent print durations and outcomes for load reporting"""
+
+    def __init__(self, capacity: int = 20, window: int = 20):
+        """
+        Initialize load tracker
+
+        Args:
+            capacity: Number of jobs this client is willing to hold at once
+            window: Number of recent prints used for the average print time
+        """
+        self.capacity = capacity
+        self._durations: Deque[float] = deque(maxlen=window)
+        self._last_failed = False
+        self._lock = threading.Lock()
+
+    def record_print(self, duration: float, success: bool) -> None:
+        """
+        Record the outcome of a print job
+
+        Args:
+            duration: Time in seconds spent formatting and sending the job
+            success: Whether the job printed successfully
+        """
+        with self._lock:
+            if success:
+                self._durations.append(duration)
+            self._last_failed = not success
+
+    @property
+    def avg_print_time(self) -> float:
+        """Average print time in seconds over the recent window (0.0 if unknown)"""
+        with self._lock:
+            if not self._durations:
+                return 0.0
+            return sum(self._durations) / len(self._durations)
+
+    def build_report(
+        self,
+        queue_depth: int,
+        busy: bool,
+        printer_available: bool,
+        paper_low: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Build a compact load report
+
+        Args:
+            queue_depth: Number of jobs waiting or being printed
+            busy: Whether a job is being printed right now
+            printer_available: Whether the printer is believed to be reachable
+            paper_low: Whether the paper roll is nearly empty
+
+        Returns:
+            Load report dict to emit to the server
+        """
+        flags = 0
+        if busy:
+            flags |= FLAG_BUSY
+        if not printer_available:
+            flags |= FLAG_PRINTER_DOWN
+        if self._last_failed:
+            flags |= FLAG_RECENT_FAILURE
+        if paper_low:
+            flags |= FLAG_PAPER_LOW
+
+        return {
+            'queueDepth': queue_depth,
+            'avgPrintMs': round(self.avg_print_time * 1000),
+            'flags': flags,
+            'credits': max(0, self.capacity - queue_depth),
+        }
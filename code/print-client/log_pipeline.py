@@ -0,0 +1,173 @@
+"""
+Logging pipeline for the print client
+Hands log records to a background thread so slow log I/O never blocks the print path
+"""
+
+import json
+import queue
+import threading
+import time
+import logging
+import logging.handlers
+from typing import Dict, Any, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats log records as single-line JSON objects"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """
+        Format a record as JSON
+
+        Args:
+            record: Log record to format
+
+        Returns:
+            JSON object with time, level, logger, message and, for exceptions, the traceback
+        """
+        entry: Dict[str, Any] = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        """
+        Initialize queue handler
+
+        Args:
+            log_queue: Bounded queue read by the listener thread
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Prepare a record for the queue, on the logging thread
+
+        The message is merged with its arguments here, before the record is
+        queued: an argument such as a print job dict can still change after
+        the log call returns, and the listener would then log the later
+        state. Everything else (timestamps, JSON encoding, tracebacks) is left
+        to the listener thread, and the record is not copied or pickled as the
+        queue is in-process.
+
+        Args:
+            record: Log record from the calling thread
+
+        Returns:
+            The same record with its message merged and its arguments dropped
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Put a record on the queue without blocking
+
+        Args:
+            record: Prepared log record; dropped and counted if the queue is full
+        """
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogSampler:
+    """Rate limiter for per-job detail logging"""
+
+    def __init__(self, max_per_interval: int = 5, interval: float = 60.0):
+        """
+        Initialize log sampler
+
+        Args:
+            max_per_interval: Maximum detailed log entries per interval (0 disables, <0 logs everything)
+            interval: Interval length in seconds
+        """
+        self.max_per_interval = max_per_interval
+        self.interval = interval
+        self._window_start = time.monotonic()
+        self._count = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a detailed log entry may be written now
+
+        Returns:
+            True if the entry should be logged
+        """
+        if self.max_per_interval < 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.interval:
+                self._window_start = now
+                self._count = 0
+            if self._count < self.max_per_interval:
+                self._count += 1
+                return True
+            self.suppressed += 1
+            return False
+
+
+class LogPipeline:
+    """Background logging pipeline built on QueueHandler/QueueListener"""
+
+    def __init__(
+        self,
+        level: int = logging.INFO,
+        json_output: bool = False,
+        queue_size: int = 10000,
+        handlers: Optional[list] = None
+    ):
+        """
+        Initialize and install the logging pipeline on the root logger
+
+        Args:
+            level: Root log level
+            json_output: Write structured JSON lines instead of plain text
+            queue_size: Maximum number of pending records before new ones are dropped
+            handlers: Output handlers (default: stderr)
+        """
+        formatter = JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+        self.handlers = handlers or [logging.StreamHandler()]
+        for handler in self.handlers:
+            handler.setFormatter(formatter)
+
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.queue_handler = DroppingQueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(level)
+        self.listener.start()
+
+    def stop(self) -> None:
+        """Flush pending records and stop the background thread"""
+        self.listener.stop()
+        if self.queue_handler.dropped:
+            # Listener is stopped, write directly to the output handlers
+            record = logging.LogRecord(
+                'PrinterClient.LogPipeline', logging.WARNING, __file__, 0,
+                'Dropped %d log records because the log queue was full', (self.queue_handler.dropped,), None
+            )
+            for handler in self.handlers:
+                handler.handle(record)
+        logging.getLogger().removeHandler(self.queue_handler)
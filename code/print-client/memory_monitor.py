@@ -0,0 +1,306 @@
+"""
+Memory monitor for the print client
+Samples the resident set size, trims caches when it exceeds a budget and optionally profiles allocations per job type
+"""
+
+import ctypes
+import ctypes.util
+import gc
+import os
+import threading
+import time
+import tracemalloc
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger('PrinterClient.MemoryMonitor')
+
+# Allocation sites kept per job type between reports
+MAX_SITES = 50
+
+# Frames of the profiler itself and of the import machinery are not interesting
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def read_rss() -> Optional[int]:
+    """
+    Read the resident set size of this process
+
+    Returns:
+        RSS in bytes, or None where /proc is not available (Windows, macOS)
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * os.sysconf('SC_PAGE_SIZE')
+
+
+def _load_malloc_trim() -> Optional[Callable[[int], int]]:
+    """Find glibc's malloc_trim, which hands freed heap pages back to the OS"""
+    name = ctypes.util.find_library('c')
+    if not name:
+        return None
+    try:
+        return ctypes.CDLL(name).malloc_trim
+    except (OSError, AttributeError):
+        return None
+
+
+class MemoryMonitor:
+    """Background thread sampling RSS, enforcing a budget and collecting allocation profiles"""
+
+    def __init__(
+        self,
+        interval: float = 30.0,
+        rss_budget: int = 0,
+        profile: bool = False,
+        profile_frames: int = 1,
+        top: int = 5
+    ):
+        """
+        Initialize memory monitor
+
+        Args:
+            interval: Seconds between RSS samples
+            rss_budget: RSS in bytes above which caches are trimmed, 0 disables the budget
+            profile: Trace allocations with tracemalloc and attribute them to job types,
+                sampling one job per type per interval (costs CPU and memory, meant
+                for troubleshooting)
+            profile_frames: Stack frames stored per traced allocation
+            top: Allocation sites shown per job type in reports
+        """
+        self.interval = interval
+        self.rss_budget = rss_budget
+        self.profile = profile
+        self.top = top
+        self._trim_callbacks: List[Tuple[str, Callable[[], None]]] = []
+        self._malloc_trim = _load_malloc_trim()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.rss: Optional[int] = read_rss()
+        self.peak_rss = self.rss or 0
+        self.started_rss = self.rss
+        self.budget_exceeded = 0
+        self.trimmed_bytes = 0
+        self._over_budget = False
+
+        # Per job type: jobs profiled, and site -> [bytes retained, blocks retained]
+        self._profiled_jobs: Dict[str, int] = {}
+        self._retained: Dict[str, Dict[str, List[int]]] = {}
+        # Per job type: time.monotonic() of the last sampled job, and snapshots waiting to be compared
+        self._sampled_at: Dict[str, float] = {}
+        self._pending: Dict[str, Tuple[tracemalloc.Snapshot, tracemalloc.Snapshot]] = {}
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        if profile:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, profile_frames))
+            self._baseline = self._snapshot()
+
+        if self.rss is None:
+            logger.info('RSS sampling is not supported on this platform, memory budget disabled')
+
+    def add_trim_callback(self, name: str, callback: Callable[[], None]) -> None:
+        """
+        Register a cache to drop when RSS exceeds the budget
+
+        Args:
+            name: Cache name for log messages
+            callback: Function releasing the cached memory
+        """
+        self._trim_callbacks.append((name, callback))
+
+    def start(self) -> None:
+        """Start the sampling thread"""
+        if self.rss is None and not self.profile:
+            return
+        self._thread = threading.Thread(target=self._run, name='memory-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the sampling thread"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        """Sample loop"""
+        while not self._stopped.wait(self.interval):
+            try:
+                self._compare_pending()
+                self.check()
+            except Exception as e:
+                logger.warning(f'Memory check failed: {e}')
+
+    def check(self) -> Optional[int]:
+        """
+        Sample RSS now and trim the caches if it exceeds the budget
+
+        Returns:
+            RSS in bytes after any trimming, or None if it cannot be read
+        """
+        rss = read_rss()
+        if rss is None:
+            return None
+        with self._lock:
+            self.rss = rss
+            self.peak_rss = max(self.peak_rss, rss)
+        if self.rss_budget <= 0 or rss <= self.rss_budget:
+            if self._over_budget:
+                logger.info(f'RSS back under budget at {rss / 2**20:.1f}MB')
+                self._over_budget = False
+            return rss
+
+        self.trim()
+        after = read_rss() or rss
+        with self._lock:
+            self.budget_exceeded += 1
+            self.trimmed_bytes += max(0, rss - after)
+            self.rss = after
+        logger.warning(
+            f'RSS {rss / 2**20:.1f}MB over budget of {self.rss_budget / 2**20:.1f}MB, '
+            f'trimmed caches to {after / 2**20:.1f}MB'
+            f'{"" if after <= self.rss_budget else " (still over budget)"}'
+        )
+        if after > self.rss_budget and not self._over_budget:
+            self._over_budget = True
+            # Trimming did not help: show what grew, once per episode as the comparison is slow
+            if self.profile:
+                self.log_growth()
+        return after
+
+    def trim(self) -> None:
+        """Drop the registered caches, collect garbage and return free heap pages to the OS"""
+        for name, callback in self._trim_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f'Trimming {name} failed: {e}')
+        gc.collect()
+        if self._malloc_trim is not None:
+            self._malloc_trim(0)
+
+    @staticmethod
+    def _snapshot() -> tracemalloc.Snapshot:
+        """Current traced allocations without the profiler's own"""
+        return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+    @contextmanager
+    def job_scope(self, job_type: str) -> Iterator[None]:
+        """
+        Attribute the memory a block of work leaves allocated to a job type
+
+        Only snapshots are taken here; comparing them is much slower and is done
+        by the sampling thread. Does nothing unless profiling is enabled, or when
+        a job of the same type was sampled less than an interval ago.
+
+        Args:
+            job_type: Ticket type of the job ('intake', 'delivery', 'report')
+        """
+        if not self.profile or not self._claim_sample(job_type):
+            yield
+            return
+        before = self._snapshot()
+        try:
+            yield
+        finally:
+            after = self._snapshot()
+            with self._lock:
+                self._pending[job_type] = (before, after)
+
+    def _claim_sample(self, job_type: str) -> bool:
+        """Whether the next job of a type should be profiled"""
+        now = time.monotonic()
+        with self._lock:
+            if job_type in self._pending or now - self._sampled_at.get(job_type, -self.interval) < self.interval:
+                return False
+            self._sampled_at[job_type] = now
+            return True
+
+    def _compare_pending(self) -> None:
+        """Add the allocations retained by the sampled jobs to the profiles of their types"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for job_type, (before, after) in pending.items():
+            retained = after.compare_to(before, 'lineno')
+            with self._lock:
+                self._profiled_jobs[job_type] = self._profiled_jobs.get(job_type, 0) + 1
+                sites = self._retained.setdefault(job_type, {})
+                for stat in retained:
+                    if stat.size_diff <= 0:
+                        continue
+                    site = sites.setdefault(str(stat.traceback), [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += stat.count_diff
+                if len(sites) > MAX_SITES:
+                    for site in sorted(sites, key=lambda key: sites[key][0])[:len(sites) - MAX_SITES]:
+                        del sites[site]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get memory statistics
+
+        Returns:
+            Dict with current, peak and starting RSS and the budget in bytes, the
+            number of times the budget was exceeded, the bytes trimmed, and per
+            profiled job type the jobs and top allocation sites (site, bytes, blocks)
+        """
+        with self._lock:
+            return {
+                'rss': self.rss,
+                'peak_rss': self.peak_rss,
+                'started_rss': self.started_rss,
+                'rss_budget': self.rss_budget,
+                'budget_exceeded': self.budget_exceeded,
+                'trimmed_bytes': self.trimmed_bytes,
+                'jobs': {
+                    job_type: {
+                        'jobs': jobs,
+                        'top_sites': [
+                            (site, size, count)
+                            for site, (size, count) in sorted(
+                                self._retained[job_type].items(), key=lambda item: -item[1][0]
+                            )[:self.top]
+                        ],
+                    }
+                    for job_type, jobs in self._profiled_jobs.items()
+                },
+            }
+
+    def log_stats(self) -> None:
+        """Log RSS and the top allocation sites per job type"""
+        stats = self.get_stats()
+        if stats['rss'] is not None:
+            logger.info(
+                f'Memory: RSS {stats["rss"] / 2**20:.1f}MB (peak {stats["peak_rss"] / 2**20:.1f}MB, '
+                f'started at {stats["started_rss"] / 2**20:.1f}MB)'
+                + (f', budget exceeded {stats["budget_exceeded"]} times' if stats['budget_exceeded'] else '')
+            )
+        for job_type, profile in stats['jobs'].items():
+            lines = [f'Memory left allocated by {profile["jobs"]} sampled {job_type} jobs:']
+            lines += [
+                f'  {size / 1024:8.1f} kB in {count:5d} blocks  {site}'
+                for site, size, count in profile['top_sites']
+            ]
+            logger.info('\n'.join(lines))
+
+    def log_growth(self) -> None:
+        """Log the allocation sites that grew most since the monitor started (profiling only)"""
+        if self._baseline is None:
+            return
+        growth = self._snapshot().compare_to(self._baseline, 'lineno')[:self.top]
+        lines = ['Memory growth since start:']
+        lines += [
+            f'  {stat.size_diff / 1024:+8.1f} kB in {stat.count_diff:+5d} blocks  {stat.traceback}'
+            for stat in growth
+        ]
+        logger.info('\n'.join(lines))
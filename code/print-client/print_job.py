@@ -0,0 +1,408 @@
+"""
+Print job model for the print client
+Validates the raw Socket.IO payload once at receive time into a compact typed job
+"""
+
+import time
+import logging
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Iterator, Tuple
+
+from job_scheduler import get_job_priority
+
+logger = logging.getLogger('PrinterClient.PrintJob')
+
+# Upper bound on copies per job, guards against runaway payloads
+MAX_COPIES = 10
+
+
+class PrintJobValidationError(ValueError):
+    """Exception raised when a print job payload cannot be used"""
+    pass
+
+
+def _to_int(value: Any, field: str) -> int:
+    """Convert a payload value to int, falling back to 0 for missing or invalid values"""
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        logger.warning(f'Invalid {field} value {value!r}, using 0')
+        return 0
+
+
+def _get_copies(data: Dict[str, Any], print_data: Dict[str, Any]) -> Tuple[int, Tuple[str, ...]]:
+    """
+    Read the number of copies and the per-copy labels (on the job or in printData)
+
+    Returns:
+        (copies, labels); without an explicit count there is one copy per label
+    """
+    labels = data.get('copyLabels', print_data.get('copyLabels')) or ()
+    if not isinstance(labels, (list, tuple)):
+        logger.warning(f'Ignoring invalid copyLabels: {labels!r}')
+        labels = ()
+    labels = tuple(str(label) for label in labels if label)
+
+    copies = data.get('copies', print_data.get('copies'))
+    copies = _to_int(copies, 'copies') if copies is not None else len(labels)
+    return min(max(copies, 1), MAX_COPIES), labels[:MAX_COPIES]
+
+
+def parse_timestamp(value: Any, field: str) -> Optional[float]:
+    """Convert an ISO 8601 payload timestamp to epoch seconds, None for missing or invalid values"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        logger.warning(f'Invalid {field} value {value!r}, ignoring it')
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_materials(materials: Any) -> Tuple['Material', ...]:
+    """Convert the materials list of a payload, skipping invalid entries"""
+    return tuple(
+        Material(
+            naam=material.get('naam') or 'Unknown',
+            aantal=_to_int(material.get('aantal'), 'aantal'),
+            prijs_per_stuk=_to_int(material.get('prijsPerStuk'), 'prijsPerStuk')
+        )
+        for material in (materials or [])
+        if isinstance(material, dict)
+    )
+
+
+class Material:
+    """Material line on a delivery receipt"""
+
+    __slots__ = ('naam', 'aantal', 'prijs_per_stuk')
+
+    def __init__(self, naam: str, aantal: int, prijs_per_stuk: int):
+        """
+        Initialize material line
+
+        Args:
+            naam: Material name
+            aantal: Quantity used
+            prijs_per_stuk: Price per unit in cents
+        """
+        self.naam = naam
+        self.aantal = aantal
+        self.prijs_per_stuk = prijs_per_stuk
+
+    def __repr__(self) -> str:
+        return f'Material({self.naam!r}, {self.aantal}, {self.prijs_per_stuk})'
+
+
+class ReportItem:
+    """Item line of an end-of-day report, fetched page by page while printing"""
+
+    __slots__ = (
+        'volgnummer', 'afdeling_naam', 'status', 'voorwerp_beschrijving',
+        'material_names', 'material_quantities', 'material_prices', 'total_price'
+    )
+
+    def __init__(
+        self,
+        volgnummer: str,
+        afdeling_naam: str,
+        status: str,
+        voorwerp_beschrijving: Optional[str] = None,
+        materials: Tuple[Material, ...] = (),
+        total_price: int = 0
+    ):
+        """
+        Initialize report item
+
+        Args:
+            volgnummer: Tracking number
+            afdeling_naam: Department name
+            status: Item status name
+            voorwerp_beschrijving: Item description (optional)
+            materials: Materials used
+            total_price: Total price of the materials in cents
+        """
+        self.volgnummer = volgnummer
+        self.afdeling_naam = afdeling_naam
+        self.status = status
+        self.voorwerp_beschrijving = voorwerp_beschrijving
+        self.material_names = tuple(m.naam for m in materials)
+        self.material_quantities = array('q', (m.aantal for m in materials))
+        self.material_prices = array('q', (m.prijs_per_stuk for m in materials))
+        self.total_price = total_price
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any]) -> 'ReportItem':
+        """
+        Parse one item of a 'report-page' answer
+
+        Expected data format:
+        {
+            'volgnummer': str,
+            'afdelingNaam': str,
+            'status': str,
+            'voorwerpBeschrijving': str | None,
+            'materials': list[{'naam': str, 'aantal': int, 'prijsPerStuk': int}],
+            'totalPrice': int
+        }
+
+        Args:
+            data: Report item as received from the server
+
+        Returns:
+            Report item; missing fields fall back to empty values
+        """
+        return cls(
+            volgnummer=str(data.get('volgnummer') or ''),
+            afdeling_naam=str(data.get('afdelingNaam') or ''),
+            status=str(data.get('status') or ''),
+            voorwerp_beschrijving=data.get('voorwerpBeschrijving'),
+            materials=_parse_materials(data.get('materials')),
+            total_price=_to_int(data.get('totalPrice'), 'totalPrice')
+        )
+
+    def iter_materials(self) -> Iterator[Tuple[str, int, int]]:
+        """
+        Iterate over material lines
+
+        Returns:
+            Iterator of (naam, aantal, prijs_per_stuk) tuples
+        """
+        return zip(self.material_names, self.material_quantities, self.material_prices)
+
+    def __repr__(self) -> str:
+        return f'ReportItem({self.volgnummer!r}, {self.afdeling_naam!r}, {self.status!r})'
+
+
+class PrintJob:
+    """Validated print job as received from the server"""
+
+    __slots__ = (
+        'print_job_id',
+        'volgnummer',
+        'klant_type',
+        'afdeling_naam',
+        'voorwerp_beschrijving',
+        'klacht_beschrijving',
+        'ticket_type',
+        'advies',
+        'material_names',
+        'material_quantities',
+        'material_prices',
+        'total_price',
+        'copies',
+        'copy_labels',
+        'foto_url',
+        'report_title',
+        'priority',
+        'received_at',
+        'created_at',
+    )
+
+    def __init__(
+        self,
+        print_job_id: int,
+        volgnummer: str,
+        klant_type: str,
+        afdeling_naam: str,
+        voorwerp_beschrijving: Optional[str] = None,
+        klacht_beschrijving: Optional[str] = None,
+        ticket_type: Optional[str] = None,
+        advies: Optional[str] = None,
+        materials: Tuple[Material, ...] = (),
+        total_price: Optional[int] = None,
+        copies: int = 1,
+        copy_labels: Tuple[str, ...] = (),
+        foto_url: Optional[str] = None,
+        report_title: Optional[str] = None,
+        priority: int = 1,
+        received_at: Optional[float] = None,
+        created_at: Optional[float] = None
+    ):
+        """
+        Initialize print job
+
+        Args:
+            print_job_id: ID of the print job on the server
+            volgnummer: Tracking number
+            klant_type: Customer type (Student/Externe)
+            afdeling_naam: Department name
+            voorwerp_beschrijving: Item description (optional)
+            klacht_beschrijving: Problem description (optional)
+            ticket_type: printData type ('delivery', ...) or None for intake tickets
+            advies: Repair advice for delivery receipts (optional)
+            materials: Materials used (delivery receipts)
+            total_price: Total price in cents, None if not provided
+            copies: Number of copies to print
+            copy_labels: Header printed above each copy ('KLANT', 'VOORWERP', ...)
+            foto_url: Item photo (URL, /uploads/... path or data: URI), None if there is none
+            report_title: Heading of an end-of-day report (report jobs only)
+            priority: Scheduling priority (lower is printed first)
+            received_at: time.monotonic() timestamp when the job was received
+            created_at: time.time() timestamp (on this machine's clock) when the server created the job, None if unknown
+        """
+        self.print_job_id = print_job_id
+        self.volgnummer = volgnummer
+        self.klant_type = klant_type
+        self.afdeling_naam = afdeling_naam
+        self.voorwerp_beschrijving = voorwerp_beschrijving
+        self.klacht_beschrijving = klacht_beschrijving
+        self.ticket_type = ticket_type
+        self.advies = advies
+        # Materials are stored column-wise as compact int arrays
+        self.material_names = tuple(m.naam for m in materials)
+        self.material_quantities = array('q', (m.aantal for m in materials))
+        self.material_prices = array('q', (m.prijs_per_stuk for m in materials))
+        self.total_price = total_price
+        self.copies = copies
+        self.copy_labels = copy_labels
+        self.foto_url = foto_url
+        self.report_title = report_title
+        self.priority = priority
+        self.received_at = received_at if received_at is not None else time.monotonic()
+        self.created_at = created_at
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any], clock_offset: Optional[float] = None) -> 'PrintJob':
+        """
+        Parse and validate a 'print-job' payload
+
+        Expected data format:
+        {
+            'printJobId': int,
+            'volgnummer': str,
+            'klantType': str,
+            'afdelingNaam': str,
+            'voorwerpBeschrijving': str | None,
+            'klachtBeschrijving': str | None,
+            'printData': dict | None,
+            'copies': int (optional, also accepted in printData),
+            'copyLabels': list[str] (optional, also accepted in printData),
+            'fotoUrl': str (optional, also accepted in printData),
+            'createdAt': str (optional, ISO 8601)
+        }
+
+        Args:
+            data: Print job data as received from the server
+            clock_offset: Server clock minus the local clock in seconds. createdAt
+                is only used when it is known; otherwise the job's age counts
+                from when it was received, which no clock skew can distort
+
+        Returns:
+            Validated print job
+
+        Raises:
+            PrintJobValidationError: If the payload has no usable printJobId
+        """
+        if not isinstance(data, dict):
+            raise PrintJobValidationError(f'Print job payload must be an object, got {type(data).__name__}')
+
+        print_job_id = data.get('printJobId')
+        if not isinstance(print_job_id, int) or isinstance(print_job_id, bool):
+            raise PrintJobValidationError(f'Print job has no valid printJobId: {print_job_id!r}')
+
+        print_data = data.get('printData') or {}
+        if not isinstance(print_data, dict):
+            logger.warning(f'Ignoring invalid printData for job {print_job_id}')
+            print_data = {}
+
+        materials = _parse_materials(print_data.get('materials'))
+
+        total_price = print_data.get('totalPrice')
+        if total_price is not None:
+            total_price = _to_int(total_price, 'totalPrice')
+
+        copies, copy_labels = _get_copies(data, print_data)
+
+        foto_url = data.get('fotoUrl', print_data.get('fotoUrl'))
+        if foto_url is not None and not isinstance(foto_url, str):
+            logger.warning(f'Ignoring invalid fotoUrl for job {print_job_id}')
+            foto_url = None
+
+        created_at = parse_timestamp(data.get('createdAt'), 'createdAt') if clock_offset is not None else None
+
+        return cls(
+            print_job_id=print_job_id,
+            volgnummer=data.get('volgnummer'),
+            klant_type=data.get('klantType'),
+            afdeling_naam=data.get('afdelingNaam'),
+            voorwerp_beschrijving=data.get('voorwerpBeschrijving'),
+            klacht_beschrijving=data.get('klachtBeschrijving'),
+            ticket_type=print_data.get('type'),
+            advies=print_data.get('advies'),
+            materials=materials,
+            total_price=total_price,
+            copies=copies,
+            copy_labels=copy_labels,
+            foto_url=foto_url or None,
+            report_title=print_data.get('titel'),
+            priority=get_job_priority(data),
+            created_at=created_at - clock_offset if created_at is not None else None
+        )
+
+    @property
+    def is_delivery(self) -> bool:
+        """Whether this job is a delivery receipt"""
+        return self.ticket_type == 'delivery'
+
+    @property
+    def is_report(self) -> bool:
+        """Whether this job is an end-of-day report, whose items are fetched while printing"""
+        return self.ticket_type == 'report'
+
+    def age(self) -> float:
+        """Seconds since the server created the job, or since it was received if the server did not say"""
+        if self.created_at is not None:
+            return time.time() - self.created_at
+        return time.monotonic() - self.received_at
+
+    @property
+    def material_count(self) -> int:
+        """Number of material lines"""
+        return len(self.material_names)
+
+    def iter_materials(self) -> Iterator[Tuple[str, int, int]]:
+        """
+        Iterate over material lines
+
+        Returns:
+            Iterator of (naam, aantal, prijs_per_stuk) tuples
+        """
+        return zip(self.material_names, self.material_quantities, self.material_prices)
+
+    @property
+    def materials(self) -> Tuple[Material, ...]:
+        """Material lines as Material objects"""
+        return tuple(Material(*line) for line in self.iter_materials())
+
+    def content_key(self) -> Tuple:
+        """
+        Normalized ticket content, independent of job id, copies and scheduling
+
+        Returns:
+            Tuple of all fields that influence the printed ticket
+        """
+        return (
+            self.volgnummer,
+            self.klant_type,
+            self.afdeling_naam,
+            self.voorwerp_beschrijving,
+            self.klacht_beschrijving,
+            self.ticket_type,
+            self.advies,
+            self.material_names,
+            self.material_quantities.tolist(),
+            self.material_prices.tolist(),
+            self.total_price,
+            self.foto_url,
+            self.report_title,
+        )
+
+    def __repr__(self) -> str:
+        return f'PrintJob(#{self.print_job_id}, {self.volgnummer!r}, type={self.ticket_type!r})'
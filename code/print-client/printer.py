@@ -3,14 +3,38 @@ Network printer implementation for TM-T88IV thermal printer
 Handles low-level printer communication via network socket
 """
 
+import os
 import socket
 import logging
-from typing import Optional
+from collections import deque
+from typing import Optional, Sequence
 
-from printer_base import BasePrinter, PrinterCommunicationError
+from printer_base import BasePrinter, BatchSendError, Buffers, PAPER_OK, PAPER_NEAR_END, PAPER_OUT
 
 logger = logging.getLogger('PrinterClient.NetworkPrinter')
 
+# Maximum number of buffers per sendmsg call
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+
+def _sendmsg_all(sock: socket.socket, buffers: Buffers) -> None:
+    """Write all buffers with vectored sends, resuming after partial writes"""
+    pending = deque(memoryview(buffer).cast('B') for buffer in buffers if len(buffer))
+    while pending:
+        batch = [pending[i] for i in range(min(len(pending), IOV_MAX))]
+        sent = sock.sendmsg(batch)
+        while sent:
+            head = pending[0]
+            if sent >= len(head):
+                sent -= len(head)
+                pending.popleft()
+            else:
+                pending[0] = head[sent:]
+                sent = 0
+
 
 class NetworkPrinter(BasePrinter):
     """Network-based thermal printer implementation via TCP/IP socket"""
@@ -41,33 +65,66 @@ class NetworkPrinter(BasePrinter):
         Raises:
             PrinterCommunicationError: If connection or sending fails
         """
+        self.send_buffers((data,))
+    
+    def send_buffers(self, buffers: Buffers) -> None:
+        """
+        Send buffers to the printer over one connection using vectored I/O
+        
+        Args:
+            buffers: Byte buffers in output order
+            
+        Raises:
+            PrinterCommunicationError: If connection or sending fails
+        """
+        self.send_batch((buffers,))
+    
+    def send_batch(self, batch: Sequence[Buffers]) -> None:
+        """
+        Send several tickets back-to-back over a single connection
+        
+        Args:
+            batch: Buffers of each ticket, in output order
+            
+        Raises:
+            BatchSendError: If connecting or sending fails; tickets before the failing one were written
+        """
         sock = None
+        completed = 0
+        offset = 0
         try:
             # Create socket connection
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             sock.settimeout(self.timeout)
             
-            logger.info(f'Connecting to printer at {self.printer_ip}:{self.printer_port}')
+            logger.debug('Connecting to printer at %s:%s', self.printer_ip, self.printer_port)
             sock.connect((self.printer_ip, self.printer_port))
             
-            # Send data
-            sock.sendall(data)
-            logger.info('Print data sent successfully')
+            for buffers in batch:
+                # Send data without concatenating the buffers (sendmsg is not available on Windows)
+                if hasattr(sock, 'sendmsg'):
+                    _sendmsg_all(sock, buffers)
+                else:
+                    for buffer in buffers:
+                        sock.sendall(buffer)
+                completed += 1
+                offset += sum(len(buffer) for buffer in buffers)
+            logger.debug('Print data sent successfully (%d tickets, %d bytes)', completed, offset)
             
         except socket.timeout:
             error_msg = f'Printer connection timeout at {self.printer_ip}:{self.printer_port}'
             logger.error(error_msg)
-            raise PrinterCommunicationError(error_msg)
+            raise BatchSendError(error_msg, completed, offset)
             
         except socket.error as e:
             error_msg = f'Failed to connect to printer: {e}'
             logger.error(f'Socket error: {e}')
-            raise PrinterCommunicationError(error_msg)
+            raise BatchSendError(error_msg, completed, offset)
             
         except Exception as e:
             error_msg = f'Unexpected printer error: {e}'
             logger.error(error_msg)
-            raise PrinterCommunicationError(error_msg)
+            raise BatchSendError(error_msg, completed, offset)
             
         finally:
             if sock:
@@ -88,11 +145,60 @@ class NetworkPrinter(BasePrinter):
             sock.settimeout(self.timeout)
             sock.connect((self.printer_ip, self.printer_port))
             sock.close()
-            logger.info('Printer connection test successful')
+            logger.debug('Printer connection test successful')
             return True
         except Exception as e:
             logger.warning(f'Printer connection test failed: {e}')
             return False
+    
+    def get_paper_status(self) -> Optional[str]:
+        """
+        Read the paper roll sensor with a DLE EOT 4 real-time status request
+        
+        Returns:
+            PAPER_OK, PAPER_NEAR_END or PAPER_OUT, or None if the printer did not answer
+        """
+        try:
+            with socket.create_connection((self.printer_ip, self.printer_port), timeout=self.timeout) as sock:
+                sock.sendall(b'\x10\x04\x04')
+                response = sock.recv(1)
+        except OSError as e:
+            logger.debug('Paper status request failed: %s', e)
+            return None
+        if not response:
+            return None
+        status = response[0]
+        if status & 0x60:
+            return PAPER_OUT
+        if status & 0x0C:
+            return PAPER_NEAR_END
+        return PAPER_OK
+    
+    def query(self, command: bytes, replies: int = 1, terminator: bytes = b'\x00', max_length: int = 256) -> Optional[bytes]:
+        """
+        Send a command and read the printer's replies over one connection
+        
+        Args:
+            command: Raw command bytes (may contain several requests)
+            replies: Number of terminated replies to wait for
+            terminator: Byte ending each reply
+            max_length: Maximum number of bytes to read
+            
+        Returns:
+            The bytes read, or None if the printer did not answer
+        """
+        response = b''
+        try:
+            with socket.create_connection((self.printer_ip, self.printer_port), timeout=self.timeout) as sock:
+                sock.sendall(command)
+                while response.count(terminator) < replies and len(response) < max_length:
+                    chunk = sock.recv(max_length - len(response))
+                    if not chunk:
+                        break
+                    response += chunk
+        except OSError as e:
+            logger.debug('Printer query failed after %d bytes: %s', len(response), e)
+        return response or None
 
 
 # Backward compatibility alias
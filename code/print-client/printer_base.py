@@ -5,16 +5,121 @@ Provides abstraction for different connection types (network, USB, etc.)
 
 from abc import ABC, abstractmethod
 import logging
-from typing import Optional
+from typing import Iterable, Iterator, Optional, Sequence, Tuple, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from printer_profile import PrinterProfile
 
 logger = logging.getLogger('PrinterClient.PrinterBase')
 
+# A ticket split into buffers that are written back-to-back without concatenating
+Buffers = Sequence[Union[bytes, bytearray, memoryview]]
+
+# Paper roll sensor states reported by get_paper_status
+PAPER_OK = 'ok'
+PAPER_NEAR_END = 'near_end'
+PAPER_OUT = 'out'
+
 
 class PrinterCommunicationError(Exception):
     """Exception raised for printer communication errors"""
     pass
 
 
+class BatchSendError(PrinterCommunicationError):
+    """Exception raised when a batch of tickets fails part way through"""
+    
+    def __init__(self, message: str, completed: int, offset: int):
+        """
+        Initialize batch send error
+        
+        Args:
+            message: Description of the error
+            completed: Number of tickets fully written before the failure
+            offset: Byte offset into the batch where the failing ticket started
+        """
+        super().__init__(message)
+        self.completed = completed
+        self.offset = offset
+
+
+class ChunkStream:
+    """
+    Chunks of one long print, produced while they are sent
+    
+    Each send attempt pulls chunks from the source as the backend writes them.
+    The chunks are not kept, so a failed attempt can only be resumed with the
+    chunk that was being written when it failed.
+    """
+    
+    __slots__ = ('_chunks', '_current', '_pulled', '_pulled_bytes', '_resume', 'chunks_sent', 'bytes_sent')
+    
+    def __init__(self, chunks: Iterable[bytes]):
+        """
+        Initialize chunk stream
+        
+        Args:
+            chunks: Byte chunks in output order, typically a generator
+        """
+        self._chunks = iter(chunks)
+        self._current: Optional[bytes] = None
+        self._pulled = 0
+        self._pulled_bytes = 0
+        self._resume = False
+        self.chunks_sent = 0
+        self.bytes_sent = 0
+    
+    @classmethod
+    def wrap(cls, chunks: Iterable[bytes]) -> 'ChunkStream':
+        """Use a stream as is, wrap any other iterable of chunks"""
+        return chunks if isinstance(chunks, cls) else cls(chunks)
+    
+    def attempt(self) -> Iterator[Tuple[bytes]]:
+        """
+        Remaining chunks for one send_batch call, each as a one-buffer ticket
+        
+        Returns:
+            Iterator starting with the chunk a previous attempt failed on
+        """
+        self._pulled = 0
+        self._pulled_bytes = 0
+        if self._resume:
+            self._resume = False
+            yield self._pull(self._current)
+        for chunk in self._chunks:
+            yield self._pull(chunk)
+    
+    def _pull(self, chunk: bytes) -> Tuple[bytes]:
+        """Hand a chunk to the backend"""
+        self._current = chunk
+        self._pulled += 1
+        self._pulled_bytes += len(chunk)
+        return (chunk,)
+    
+    def send(self, printer: 'BasePrinter') -> None:
+        """
+        Send the rest of the stream to a printer in one session
+        
+        Args:
+            printer: Printer to write the chunks to
+        
+        Raises:
+            PrinterCommunicationError: If sending fails; the next call resumes
+                with the chunk that was being written
+        """
+        try:
+            printer.send_batch(self.attempt())
+        except PrinterCommunicationError as e:
+            written = e.completed if isinstance(e, BatchSendError) else 0
+            self.chunks_sent += written
+            self.bytes_sent += e.offset if isinstance(e, BatchSendError) else 0
+            # Backends pull a chunk right before writing it, so one more pulled than written broke off mid-write
+            self._resume = self._pulled > written
+            raise
+        self.chunks_sent += self._pulled
+        self.bytes_sent += self._pulled_bytes
+
+
 class BasePrinter(ABC):
     """Abstract base class for thermal printer implementations"""
     
@@ -31,6 +136,57 @@ class BasePrinter(ABC):
         """
         pass
     
+    def send_buffers(self, buffers: Buffers) -> None:
+        """
+        Send a sequence of buffers to the printer as one print
+        
+        Backends that can write buffers in order (vectored I/O) override this to
+        avoid copying them; the default joins them into a single send_raw_data call.
+        
+        Args:
+            buffers: Byte buffers in output order
+            
+        Raises:
+            PrinterCommunicationError: If connection or sending fails
+        """
+        self.send_raw_data(b''.join(buffers))
+    
+    def send_batch(self, batch: Sequence[Buffers]) -> None:
+        """
+        Send several tickets back-to-back
+        
+        Backends override this to send the whole batch in one session; the
+        default sends the tickets one by one.
+        
+        Args:
+            batch: Buffers of each ticket, in output order
+            
+        Raises:
+            BatchSendError: If a ticket fails; tickets before it were written
+        """
+        offset = 0
+        for index, buffers in enumerate(batch):
+            try:
+                self.send_buffers(buffers)
+            except PrinterCommunicationError as e:
+                raise BatchSendError(str(e), completed=index, offset=offset) from e
+            offset += sum(len(buffer) for buffer in buffers)
+    
+    def send_stream(self, chunks: Iterable[bytes]) -> None:
+        """
+        Send one long print whose chunks are produced while it is written
+        
+        The chunks go out in a single session as they are produced, so only the
+        chunk being written is held in memory.
+        
+        Args:
+            chunks: Byte chunks in output order (a generator or a ChunkStream)
+            
+        Raises:
+            PrinterCommunicationError: If sending fails
+        """
+        ChunkStream.wrap(chunks).send(self)
+    
     @abstractmethod
     def test_connection(self) -> bool:
         """
@@ -50,3 +206,37 @@ class BasePrinter(ABC):
             String describing the connection (e.g., "Network: 192.168.1.100:9100")
         """
         pass
+    
+    def set_profile(self, profile: 'PrinterProfile') -> None:
+        """
+        Adapt the transfer to the capabilities of the connected printer
+        
+        Args:
+            profile: Printer capability profile
+        """
+        pass
+    
+    def get_paper_status(self) -> Optional[str]:
+        """
+        Read the paper roll sensor
+        
+        Returns:
+            PAPER_OK, PAPER_NEAR_END or PAPER_OUT, or None if not supported or unreadable
+        """
+        return None
+    
+    def query(self, command: bytes, replies: int = 1, terminator: bytes = b'\x00', max_length: int = 256) -> Optional[bytes]:
+        """
+        Send a command and read the printer's replies
+        
+        Args:
+            command: Raw command bytes (may contain several requests)
+            replies: Number of terminated replies to wait for
+            terminator: Byte ending each reply
+            max_length: Maximum number of bytes to read
+            
+        Returns:
+            The bytes read (possibly fewer replies than requested), or None if the
+            backend cannot read from the printer or nothing was answered
+        """
+        return None
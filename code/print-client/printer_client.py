@@ -6,18 +6,38 @@ Connects to the Next.js Socket.IO server to receive print jobs
 This is the main entry point that orchestrates the different components.
 """
 
+import time
+
+# Captured before the heavier imports so startup latency covers the whole boot
+PROCESS_START = time.monotonic()
+
+import functools
 import os
 import sys
 import logging
 import signal
 import threading
-from typing import Dict, Any
+from contextlib import nullcontext
+from typing import Dict, Any, ContextManager, List, Optional
 from dotenv import load_dotenv
 
 from socket_client import SocketIOClient
-from printer_base import PrinterCommunicationError
-from printer_factory import create_printer
+from printer_base import PrinterCommunicationError, BatchSendError
+from printer_factory import create_printer, parse_printer_list
+from printer_group import PrinterGroup
+from retry_printer import RetryingPrinter, RetryPolicy, CircuitBreaker
 from ticket_formatter import TicketFormatter
+from ticket_image import PhotoRenderer
+from render_cache import RenderCache
+from load_report import LoadTracker
+from job_scheduler import PriorityJobScheduler, ExpiryPolicy, PRIORITY_NAMES
+from print_job import PrintJob, PrintJobValidationError
+from log_pipeline import LogPipeline, LogSampler
+from health_prober import HealthProber, PrinterHealth
+from printer_profile import PrinterProfile, ProfileCache, DEFAULT_CACHE_PATH, common_profile, load_profile_in_background
+from stall_watchdog import StallWatchdog
+from day_report import ReportPages
+from memory_monitor import MemoryMonitor
 
 logger = logging.getLogger('PrinterClient')
 
@@ -29,7 +49,18 @@ class PrintJobHandler:
         self,
         socket_client: SocketIOClient,
         printer,  # BasePrinter
-        formatter: TicketFormatter
+        formatter: TicketFormatter,
+        scheduler: Optional[PriorityJobScheduler] = None,
+        load_tracker: Optional[LoadTracker] = None,
+        health_prober: Optional[HealthProber] = None,
+        max_batch_size: int = 5,
+        watchdog: Optional[StallWatchdog] = None,
+        warm_up: bool = False,
+        expiry_policy: Optional[ExpiryPolicy] = None,
+        report_page_size: int = 50,
+        report_chunk_bytes: int = 4096,
+        memory_monitor: Optional[MemoryMonitor] = None,
+        workers: int = 1
     ):
         """
         Initialize print job handler
@@ -38,80 +69,444 @@ class PrintJobHandler:
             socket_client: Socket.IO client for server communication
             printer: Printer instance (Network or USB)
             formatter: Ticket formatter for ESC/POS generation
+            scheduler: Priority scheduler for queued jobs
+            load_tracker: Tracker for print times used in load reports
+            health_prober: Background prober providing cached printer health
+            max_batch_size: Maximum number of ready jobs printed in one printer session
+            watchdog: Stall watchdog timing the job stages
+            warm_up: Render sample tickets and open the printer before accepting jobs
+            expiry_policy: Maximum job age per ticket type, older jobs are reported expired instead of printed
+            report_page_size: Items fetched from the server per page of an end-of-day report
+            report_chunk_bytes: Bytes of a report rendered before they are sent to the printer
+            memory_monitor: Memory monitor attributing allocations to job types
+            workers: Print worker threads; one per printer of a group lets the members print in parallel
         """
         self.socket_client = socket_client
         self.printer = printer
         self.formatter = formatter
+        self.scheduler = scheduler or PriorityJobScheduler()
+        self.load_tracker = load_tracker or LoadTracker()
+        self.health_prober = health_prober
+        self.max_batch_size = max(1, max_batch_size)
+        self.watchdog = watchdog
+        self.warm_up = warm_up
+        self.expiry_policy = expiry_policy
+        self.report_page_size = max(1, report_page_size)
+        self.report_chunk_bytes = max(512, report_chunk_bytes)
+        self.memory_monitor = memory_monitor
+        self.workers = max(1, workers)
         
-        # Register callback with socket client
+        # No credits are advertised until the warm-up is done, so the server holds the first jobs.
+        # The warm-up overlaps the connect: whichever of the two finishes last offers the window
+        self._warming = warm_up
+        # Credits the server still holds: jobs it may send without waiting for us
+        self._credits_granted = 0
+        self._credit_lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        # Set once the warm-up is done (or skipped); the other workers wait for it
+        self._ready = threading.Event()
+        # Guards the counters the workers share
+        self._state_lock = threading.Lock()
+        self._in_flight = 0
+        self._expired = 0
+        self._processed = 0
+        
+        # Register callbacks with socket client
         self.socket_client.set_print_job_callback(self.handle_print_job)
+        self.socket_client.set_load_report_provider(self.get_load_report)
+        self.socket_client.set_credit_provider(self.get_initial_credits)
+        self.socket_client.set_registered_callback(self._on_registered)
+        if self.health_prober is not None:
+            self.health_prober.add_listener(self._on_health_change)
+            if not self.health_prober.is_healthy():
+                self.scheduler.hold()
+    
+    def start(self) -> None:
+        """Start the worker threads that print queued jobs"""
+        if not self.warm_up:
+            self._ready.set()
+        for index in range(self.workers):
+            name = 'print-worker' if self.workers == 1 else f'print-worker-{index + 1}'
+            worker = threading.Thread(target=self._worker_loop, args=(index == 0 and self.warm_up,), name=name, daemon=True)
+            worker.start()
+            self._workers.append(worker)
+    
+    def stop(self) -> None:
+        """Stop the worker threads"""
+        self.scheduler.close()
+        for worker in self._workers:
+            worker.join(timeout=5)
     
     def handle_print_job(self, data: Dict[str, Any]) -> None:
         """
-        Handle incoming print job
-        
-        Expected data format:
-        {
-            'printJobId': int,
-            'volgnummer': str,
-            'klantType': str,
-            'afdelingNaam': str,
-            'voorwerpBeschrijving': str | None,
-            'klachtBeschrijving': str | None,
-            'printData': dict | None
-        }
-        """
-        print_job_id = data.get('printJobId')
-        volgnummer = data.get('volgnummer')
-        klant_type = data.get('klantType')
-        afdeling_naam = data.get('afdelingNaam')
-        voorwerp_beschrijving = data.get('voorwerpBeschrijving')
-        klacht_beschrijving = data.get('klachtBeschrijving')
-        print_data = data.get('printData')
-        
-        # Log the print job data
-        self.formatter.log_print_data(print_job_id, data)
+        Queue incoming print job by priority
+        
+        Args:
+            data: Print job data as received from the server
+        """
+        with self._credit_lock:
+            if self._credits_granted > 0:
+                self._credits_granted -= 1
+            else:
+                # Server without flow control (or a resend): hold it locally anyway
+                logger.debug('Print job received beyond the credit window')
         
         try:
-            # Format the ticket
-            ticket_bytes = self.formatter.format_ticket(
-                volgnummer=volgnummer,
-                klant_type=klant_type,
-                afdeling_naam=afdeling_naam,
-                voorwerp_beschrijving=voorwerp_beschrijving,
-                klacht_beschrijving=klacht_beschrijving,
-                print_data=print_data
-            )
-            
-            # Send to printer
-            self.printer.send_raw_data(ticket_bytes)
-            
-            # Notify server of success
-            self.socket_client.emit_print_completed(print_job_id)
+            job = PrintJob.from_payload(data, clock_offset=self.socket_client.clock_offset)
+        except PrintJobValidationError as e:
+            logger.error('Rejected print job: %s', e)
+            print_job_id = data.get('printJobId') if isinstance(data, dict) else None
+            if print_job_id is not None:
+                self.socket_client.emit_print_failed(print_job_id, str(e))
+            self._replenish_credits()
+            return
+        
+        if self._expire_if_stale(job):
+            self._replenish_credits()
+            return
+        
+        self.scheduler.put(job, job.priority)
+        logger.info(
+            'Queued print job %s (%s priority, %d waiting)',
+            job.print_job_id, PRIORITY_NAMES[job.priority], len(self.scheduler)
+        )
+    
+    def _worker_loop(self, warm_up: bool) -> None:
+        """
+        Print queued jobs in priority order, coalescing ready jobs into one printer session
+        
+        Args:
+            warm_up: Run the warm-up first (one worker does), the others wait for it
+        """
+        if warm_up:
+            self._warm_up()
+        else:
+            self._ready.wait()
+        while True:
+            job = self.scheduler.get()
+            if job is None:
+                break
+            # Share a backlog with the other workers instead of taking it all in one session
+            batch_size = min(self.max_batch_size, -(-(len(self.scheduler) + 1) // self.workers))
+            batch = [job]
+            while len(batch) < batch_size:
+                next_job = self.scheduler.get(timeout=0)
+                if next_job is None:
+                    break
+                batch.append(next_job)
+            try:
+                self.process_batch(batch)
+            except Exception:
+                # One broken job must not stop the worker for all jobs after it
+                logger.exception('Print worker failed, continuing with the next job')
             
+            # Report wait times once a backlog has drained, from the worker that finished last
+            with self._state_lock:
+                self._processed += len(batch)
+                drained = len(self.scheduler) == 0 and self._in_flight == 0
+                if drained:
+                    processed, expired = self._processed, self._expired
+                    self._processed = self._expired = 0
+            if drained:
+                self._log_backlog_stats(processed, expired)
+    
+    def _log_backlog_stats(self, processed: int, expired: int) -> None:
+        """Log the statistics of a drained backlog"""
+        if processed > 1:
+            self.scheduler.log_wait_stats()
+            if self.formatter.render_cache is not None:
+                self.formatter.render_cache.log_stats()
+            if self.formatter.photo_renderer is not None:
+                self.formatter.photo_renderer.log_stats()
+            if self.watchdog is not None:
+                self.watchdog.log_stats()
+            log_printer_stats = getattr(self.printer, 'log_stats', None)
+            if log_printer_stats:
+                log_printer_stats()
+            if self.memory_monitor is not None:
+                self.memory_monitor.log_stats()
+        if expired:
+            logger.info('Expired %d stale print jobs instead of printing them', expired)
+    
+    def _warm_up(self) -> None:
+        """Pay the one-time initialization costs before the first customer's ticket"""
+        started = time.monotonic()
+        try:
+            with self._stage('warm-up:render', None):
+                templates = self.formatter.warm_up()
+            rendered = time.monotonic()
+            with self._stage('warm-up:printer', None):
+                printer_ok = self.printer.test_connection()
+            finished = time.monotonic()
+            logger.info(
+                'Warm-up finished in %.3fs (%d templates rendered in %.3fs, printer %s after %.3fs)',
+                finished - started, templates, rendered - started,
+                'ready' if printer_ok else 'NOT reachable', finished - rendered
+            )
+        except Exception as e:
+            logger.warning('Warm-up failed after %.3fs: %s', time.monotonic() - started, e)
+        finally:
+            # Under the credit lock, so a registration sees either no window or all of it
+            with self._credit_lock:
+                self._warming = False
+            self._ready.set()
+        logger.info('Ready for print jobs %.3fs after start', time.monotonic() - self.socket_client.started_at)
+        # Only reaches the server once registered; before that the registration carries the window
+        self._replenish_credits()
+    
+    def process_print_job(self, job: PrintJob) -> None:
+        """
+        Format and print a single job
+        
+        Args:
+            job: Validated print job
+        """
+        self.process_batch([job])
+    
+    def process_batch(self, jobs: List[PrintJob]) -> None:
+        """
+        Format jobs and print them back-to-back in one printer session
+        
+        Success or failure is reported to the server per job: jobs written
+        before a failure are completed, the failing job and the rest failed.
+        End-of-day reports are streamed after the tickets, each in its own session.
+        
+        Args:
+            jobs: Validated print jobs in print order
+        """
+        with self._state_lock:
+            self._in_flight += len(jobs)
+        started = time.monotonic()
+        reports: List[PrintJob] = []
+        try:
+            # Format the tickets (all copies of a job go out in one write)
+            ready: List[PrintJob] = []
+            batch = []
+            for job in jobs:
+                # Jobs can go stale while waiting in the queue as well
+                if self._expire_if_stale(job):
+                    continue
+                if job.is_report:
+                    reports.append(job)
+                    continue
+                self.formatter.log_print_data(job)
+                try:
+                    with self._stage('job:format', job.print_job_id), self._memory_scope(job):
+                        batch.append(self.formatter.format_copies(job))
+                    ready.append(job)
+                except Exception as e:
+                    error_msg = f'Unexpected error: {e}'
+                    logger.exception(error_msg)
+                    self._finish_job(job, False, error_msg)
+            if ready:
+                self._send_tickets(ready, batch, started)
+            for job in reports:
+                self._print_report(job)
+        finally:
+            with self._state_lock:
+                self._in_flight -= len(jobs)
+            self._replenish_credits()
+    
+    def _send_tickets(self, ready: List[PrintJob], batch: List[Any], started: float) -> None:
+        """Send formatted tickets in one printer session and report the outcome per job"""
+        if len(ready) > 1:
+            logger.info('Printing %d jobs in one session', len(ready))
+        
+        # Send to printer
+        completed = len(ready)
+        error_msg = None
+        try:
+            with self._stage('job:send', [job.print_job_id for job in ready]):
+                self.printer.send_batch(batch)
         except PrinterCommunicationError as e:
-            # Notify server of failure
-            self.socket_client.emit_print_failed(print_job_id, str(e))
+            completed = e.completed if isinstance(e, BatchSendError) else 0
+            error_msg = str(e)
+            self._record_health(False)
         except Exception as e:
             # Catch any unexpected errors
+            completed = 0
             error_msg = f'Unexpected error: {e}'
-            logger.error(error_msg)
-            self.socket_client.emit_print_failed(print_job_id, error_msg)
+            logger.exception(error_msg)
+        else:
+            self._record_health(True)
+        
+        # Spread the session time over the jobs for the average print time
+        duration = (time.monotonic() - started) / len(ready)
+        for index, job in enumerate(ready):
+            if index < completed:
+                self._finish_job(job, True, duration=duration)
+            else:
+                self._finish_job(job, False, error_msg, duration)
+    
+    def _print_report(self, job: PrintJob) -> None:
+        """
+        Stream an end-of-day report to the printer while its items are fetched
+        
+        Pages are requested from the server as the printer takes the previous
+        ones, so memory use does not grow with the length of the report.
+        
+        Args:
+            job: Report print job
+        """
+        self.formatter.log_print_data(job)
+        started = time.monotonic()
+        pages = ReportPages(lambda page: self._fetch_report_page(job, page))
+        error_msg = None
+        try:
+            with self._memory_scope(job):
+                self.printer.send_stream(self.formatter.iter_report(job, pages, self.report_chunk_bytes))
+        except PrinterCommunicationError as e:
+            error_msg = str(e)
+            self._record_health(False)
+        except Exception as e:
+            error_msg = f'Unexpected error: {e}'
+            logger.exception(error_msg)
+        else:
+            self._record_health(True)
+            if pages.error:
+                # The printed part ends with a notice, the server keeps the job failed so it can be printed again
+                error_msg = f'Report incomplete: {pages.error}'
+        
+        duration = time.monotonic() - started
+        logger.info('Report %s: %d items from %d pages in %.2fs', job.print_job_id, pages.items, pages.pages, duration)
+        self._finish_job(job, error_msg is None, error_msg, duration)
+    
+    def _fetch_report_page(self, job: PrintJob, page: int) -> Optional[Dict[str, Any]]:
+        """Request one page of report items from the server"""
+        with self._stage('report:fetch', job.print_job_id):
+            return self.socket_client.fetch_report_page(job.print_job_id, page, self.report_page_size)
+    
+    def _finish_job(self, job: PrintJob, success: bool, error_msg: Optional[str] = None, duration: float = 0.0) -> None:
+        """Notify the server of the outcome of a job and record it for load reporting"""
+        self.load_tracker.record_print(duration, success)
+        with self._stage('job:report', job.print_job_id):
+            if success:
+                self.socket_client.emit_print_completed(job.print_job_id)
+            else:
+                self.socket_client.emit_print_failed(job.print_job_id, error_msg or 'Unknown error')
+    
+    def _expire_if_stale(self, job: PrintJob) -> bool:
+        """
+        Report a job as expired if it is too old to be worth printing
+        
+        Args:
+            job: Validated print job
+        
+        Returns:
+            True if the job expired and must not be printed
+        """
+        if self.expiry_policy is None or not self.expiry_policy.is_expired(job):
+            return False
+        age = job.age()
+        max_age = self.expiry_policy.max_age_for(job.ticket_type)
+        logger.info('Print job %s expired (%.0fs old, limit %gs), not printing it', job.print_job_id, age, max_age)
+        with self._state_lock:
+            self._expired += 1
+        with self._stage('job:report', job.print_job_id):
+            self.socket_client.emit_print_failed(
+                job.print_job_id,
+                f'Expired: job was {age:.0f}s old (limit {max_age:g}s)',
+                reason='expired'
+            )
+        return True
+    
+    def _stage(self, name: str, job_id: Any) -> ContextManager[None]:
+        """Time a job stage with the stall watchdog, if one is set"""
+        if self.watchdog is None:
+            return nullcontext()
+        return self.watchdog.stage(name, job_id)
+    
+    def _memory_scope(self, job: PrintJob) -> ContextManager[None]:
+        """Attribute the memory a job leaves allocated to its ticket type, if profiling"""
+        if self.memory_monitor is None:
+            return nullcontext()
+        return self.memory_monitor.job_scope(job.ticket_type or 'intake')
+    
+    def get_load_report(self) -> Dict[str, Any]:
+        """
+        Build a load report for the server
+        
+        Returns:
+            Compact load report (queue depth, average print time, status flags, credits)
+        """
+        in_flight = self._in_flight
+        busy = in_flight > 0
+        available = getattr(self.printer, 'is_available', True)
+        paper_low = False
+        if self.health_prober is not None:
+            health = self.health_prober.health
+            available = available and health.healthy
+            paper_low = health.paper_low
+        return self.load_tracker.build_report(
+            queue_depth=len(self.scheduler) + in_flight,
+            busy=busy,
+            printer_available=available,
+            paper_low=paper_low
+        )
+    
+    def _free_slots(self) -> int:
+        """Number of jobs that fit in the local queue right now"""
+        if self._warming:
+            return 0
+        return self.load_tracker.capacity - len(self.scheduler) - self._in_flight
+    
+    def get_initial_credits(self) -> int:
+        """
+        Credit window advertised when (re)registering with the server
+        
+        Returns:
+            Number of jobs the server may send right away
+        """
+        with self._credit_lock:
+            self._credits_granted = max(0, self._free_slots())
+            return self._credits_granted
+    
+    def _replenish_credits(self) -> None:
+        """Return credits for freed queue slots that the server does not hold yet"""
+        with self._credit_lock:
+            credits = self._free_slots() - self._credits_granted
+            # Only count credits the server received, the rest is offered again next time
+            if credits > 0 and self.socket_client.emit_credits(credits):
+                self._credits_granted += credits
+    
+    def _on_registered(self) -> None:
+        """
+        Offer the slots freed since the registration was sent, which the server does not know about yet
+        
+        This includes the whole window when the warm-up ended between
+        register-printer (sent with 0 credits) and printer-registered.
+        """
+        self._replenish_credits()
+    
+    def _record_health(self, reachable: bool) -> None:
+        """Feed the outcome of a send to the health prober"""
+        if self.health_prober is not None:
+            self.health_prober.record_result(reachable)
+    
+    def _on_health_change(self, previous: PrinterHealth, current: PrinterHealth) -> None:
+        """Hold or resume the queue and push a fresh load report so the server routes around (or back to) this printer"""
+        if current.healthy and self.scheduler.is_held:
+            logger.info('Printer recovered, printing %d queued jobs', len(self.scheduler))
+            self.scheduler.release()
+        elif not current.healthy and not self.scheduler.is_held:
+            logger.info('Printer cannot print, holding queued jobs until it recovers')
+            self.scheduler.hold()
+        self.socket_client.emit_load_report()
 
 
-def setup_logging(debug: bool = False):
+def setup_logging(debug: bool = False, json_output: bool = False) -> LogPipeline:
     """Setup logging configuration"""
     level = logging.DEBUG if debug else logging.INFO
     
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    # Records are written by a background thread so log I/O stays off the print path
+    pipeline = LogPipeline(level=level, json_output=json_output)
     
     # Disable urllib3 SSL warnings in development if SSL verification is disabled
     if not debug:
         import urllib3
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    
+    return pipeline
 
 
 def main():
@@ -136,11 +531,79 @@ def main():
     usb_in_ep = int(os.getenv('USB_IN_EP', '0x81'), 16)
     usb_out_ep = int(os.getenv('USB_OUT_EP', '0x03'), 16)
     
+    # Printer group: several printers behind this registration, e.g. 'network:192.168.1.8,usb:POS-80C'
+    # (replaces CONNECTION_TYPE and the single printer settings above)
+    printer_group = parse_printer_list(os.getenv('PRINTER_GROUP', ''))
+    printer_failure_cooldown = float(os.getenv('PRINTER_FAILURE_COOLDOWN', '30'))
+    
+    # Retry and circuit breaker settings
+    retry_attempts = int(os.getenv('PRINT_RETRY_ATTEMPTS', '3'))
+    retry_base_delay = float(os.getenv('PRINT_RETRY_BASE_DELAY', '0.5'))
+    retry_max_delay = float(os.getenv('PRINT_RETRY_MAX_DELAY', '5'))
+    circuit_failure_threshold = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+    circuit_reset_timeout = float(os.getenv('CIRCUIT_RESET_TIMEOUT', '30'))
+    circuit_hold_jobs = os.getenv('CIRCUIT_HOLD_JOBS', 'true').lower() in ('true', '1', 'yes')
+    circuit_hold_timeout = float(os.getenv('CIRCUIT_HOLD_TIMEOUT', '300'))
+    circuit_probe_interval = float(os.getenv('CIRCUIT_PROBE_INTERVAL', '5'))
+    
+    # Background health probing (0 disables it)
+    health_probe_interval = float(os.getenv('HEALTH_PROBE_INTERVAL', '30'))
+    
+    # Render sample tickets and open the printer before accepting the first job
+    startup_warm_up = os.getenv('STARTUP_WARM_UP', 'true').lower() in ('true', '1', 'yes')
+    
+    # Stall watchdog: seconds before a running event handler or job stage is reported (0 disables it)
+    stall_threshold = float(os.getenv('STALL_THRESHOLD', '10'))
+    
+    # Job scheduling settings
+    job_aging_interval = float(os.getenv('JOB_AGING_INTERVAL', '30'))
+    job_queue_capacity = int(os.getenv('JOB_QUEUE_CAPACITY', '20'))
+    
+    # Stale job expiry: maximum age in seconds per ticket type (0 never expires)
+    job_expiry_intake = float(os.getenv('JOB_EXPIRY_INTAKE', '0'))
+    job_expiry_delivery = float(os.getenv('JOB_EXPIRY_DELIVERY', '0'))
+    print_batch_size = int(os.getenv('PRINT_BATCH_SIZE', '5'))
+    
+    # End-of-day reports: items per page fetched from the server, bytes per write to the printer
+    report_page_size = int(os.getenv('REPORT_PAGE_SIZE', '50'))
+    report_chunk_bytes = int(os.getenv('REPORT_CHUNK_BYTES', '4096'))
+    load_report_interval = float(os.getenv('LOAD_REPORT_INTERVAL', '10'))
+    
+    # Render cache settings (0 disables the cache)
+    render_cache_bytes = int(os.getenv('RENDER_CACHE_BYTES', str(1024 * 1024)))
+    
+    # Ticket templates (hot-reloaded when the files change)
+    template_dir = os.getenv('TICKET_TEMPLATE_DIR') or None
+    
+    # Item photo thumbnails (downloaded from the server, cached per photo)
+    ticket_photos = os.getenv('TICKET_PHOTOS', 'true').lower() in ('true', '1', 'yes')
+    ticket_photo_cache_entries = int(os.getenv('TICKET_PHOTO_CACHE_ENTRIES', '64'))
+    
+    # Raster images (QR codes, photos) are sent in bands of this many rows (0 sends them whole)
+    raster_band_rows = int(os.getenv('RASTER_BAND_ROWS', '256'))
+    
+    # Printer capability profile (0 days probes the printer on every start)
+    profile_cache_path = os.getenv('PRINTER_PROFILE_CACHE') or DEFAULT_CACHE_PATH
+    profile_max_age_days = float(os.getenv('PRINTER_PROFILE_MAX_AGE_DAYS', '7'))
+    
+    server_ready_timeout = float(os.getenv('SERVER_READY_TIMEOUT', '30'))
+    socketio_serializer = os.getenv('SOCKETIO_SERIALIZER', 'json').lower()
+    
     ssl_verify = os.getenv('SSL_VERIFY').lower() in ('true', '1', 'yes')
     debug = os.getenv('DEBUG', 'true').lower() in ('true', '1', 'yes')
     
+    # Memory monitoring: RSS budget in MB that triggers cache trimming (0 disables it),
+    # allocation profiling per job type with tracemalloc (slow, for troubleshooting)
+    memory_rss_budget_mb = float(os.getenv('MEMORY_RSS_BUDGET_MB', '0'))
+    memory_profile = os.getenv('MEMORY_PROFILE', 'false').lower() in ('true', '1', 'yes')
+    memory_check_interval = float(os.getenv('MEMORY_CHECK_INTERVAL', '30'))
+    
+    # Logging settings
+    log_json = os.getenv('LOG_JSON', 'false').lower() in ('true', '1', 'yes')
+    log_job_details_per_minute = int(os.getenv('LOG_JOB_DETAILS_PER_MINUTE', '5'))
+    
     # Setup logging
-    setup_logging(debug)
+    log_pipeline = setup_logging(debug, log_json)
     
     logger.info('='*60)
     logger.info('Repair Café Printer Client')
@@ -148,8 +611,10 @@ def main():
     logger.info('Configuration:')
     logger.info(f'  Server URL: {socketio_url}')
     logger.info(f'  Printer ID: {printer_id}')
-    logger.info(f'  Connection Type: {connection_type}')
-    if connection_type == 'network':
+    logger.info(f'  Connection Type: {"group" if printer_group else connection_type}')
+    if printer_group:
+        logger.info(f'  Printer Group: {len(printer_group)} printers, failure cooldown {printer_failure_cooldown:g}s')
+    elif connection_type == 'network':
         logger.info(f'  Printer IP: {printer_ip}')
         logger.info(f'  Printer Port: {printer_port}')
     elif connection_type == 'usb':
@@ -161,37 +626,173 @@ def main():
             logger.info(f'  USB Interface: {usb_interface}')
             logger.info(f'  USB In EP: {hex(usb_in_ep)}')
             logger.info(f'  USB Out EP: {hex(usb_out_ep)}')
+    logger.info(f'  Print Retries: {retry_attempts} (backoff {retry_base_delay}s - {retry_max_delay}s)')
+    logger.info(f'  Circuit Breaker: {circuit_failure_threshold} failures, reset after {circuit_reset_timeout}s')
+    if circuit_hold_jobs:
+        logger.info(f'  Hold Jobs While Down: up to {circuit_hold_timeout}s')
+    if health_probe_interval > 0:
+        logger.info(f'  Health Probe: every {health_probe_interval:g}s')
+    logger.info(f'  Startup Warm-up: {startup_warm_up}')
+    logger.info(f'  Ticket Photos: {ticket_photos}')
+    logger.info(f'  Raster Bands: {f"{raster_band_rows} rows" if raster_band_rows > 0 else "off"}')
+    logger.info(f'  Job Expiry: intake {job_expiry_intake:g}s, delivery {job_expiry_delivery:g}s (0 = never)')
+    if stall_threshold > 0:
+        logger.info(f'  Stall Watchdog: {stall_threshold:g}s')
+    if memory_rss_budget_mb > 0 or memory_profile:
+        logger.info(
+            f'  Memory Monitor: budget {f"{memory_rss_budget_mb:g}MB" if memory_rss_budget_mb > 0 else "off"}, '
+            f'profiling {memory_profile}, every {memory_check_interval:g}s'
+        )
+    logger.info(f'  Socket.IO Serializer: {socketio_serializer}')
     logger.info(f'  SSL Verify: {ssl_verify}')
     logger.info(f'  Debug: {debug}')
     logger.info('='*60)
     
     # Initialize components
+    watchdog = StallWatchdog(threshold=stall_threshold) if stall_threshold > 0 else None
+    
+    # Started before the other components so profiling sees their allocations
+    memory_monitor = MemoryMonitor(
+        interval=memory_check_interval,
+        rss_budget=int(memory_rss_budget_mb * 1024 * 1024),
+        profile=memory_profile
+    ) if memory_rss_budget_mb > 0 or memory_profile else None
+    
     socket_client = SocketIOClient(
         server_url=socketio_url,
         printer_name=printer_id,
         ssl_verify=ssl_verify,
-        debug=debug
+        debug=debug,
+        started_at=PROCESS_START,
+        ready_timeout=server_ready_timeout,
+        load_report_interval=load_report_interval,
+        serializer=socketio_serializer,
+        watchdog=watchdog
     )
     
-    # Create printer based on connection type
-    printer = create_printer(
-        connection_type=connection_type,
-        printer_ip=printer_ip,
-        printer_port=printer_port,
-        printer_name=windows_printer_name,
-        usb_vendor_id=usb_vendor_id,
-        usb_product_id=usb_product_id,
-        usb_interface=usb_interface,
-        usb_in_ep=usb_in_ep,
-        usb_out_ep=usb_out_ep
-    )
+    def with_retries(backend, hold_jobs: bool) -> RetryingPrinter:
+        """Wrap a printer with its own retry and circuit breaker layer"""
+        return RetryingPrinter(
+            backend,
+            policy=RetryPolicy(
+                max_attempts=retry_attempts,
+                base_delay=retry_base_delay,
+                max_delay=retry_max_delay
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=circuit_failure_threshold,
+                reset_timeout=circuit_reset_timeout
+            ),
+            hold_jobs=hold_jobs,
+            hold_timeout=circuit_hold_timeout,
+            probe_interval=circuit_probe_interval
+        )
+    
+    usb_options = dict(usb_interface=usb_interface, usb_in_ep=usb_in_ep, usb_out_ep=usb_out_ep)
+    if printer_group:
+        # Members fail fast so the group fails over; the group holds the job once all of them failed
+        printer = PrinterGroup(
+            [with_retries(create_printer(**usb_options, **spec), hold_jobs=False) for spec in printer_group],
+            failure_cooldown=printer_failure_cooldown,
+            hold_jobs=circuit_hold_jobs,
+            hold_timeout=circuit_hold_timeout,
+            hold_interval=circuit_probe_interval
+        )
+    else:
+        # Create printer based on connection type
+        printer = with_retries(
+            create_printer(
+                connection_type=connection_type,
+                printer_ip=printer_ip,
+                printer_port=printer_port,
+                printer_name=windows_printer_name,
+                usb_vendor_id=usb_vendor_id,
+                usb_product_id=usb_product_id,
+                **usb_options
+            ),
+            hold_jobs=circuit_hold_jobs
+        )
     
     logger.info(f'Printer initialized: {printer.get_connection_info()}')
     
-    formatter = TicketFormatter()
+    # Use the cached capabilities right away, probe a printer only when there are none.
+    # Group members can be different models, so each one has its own profile
+    profile_cache = ProfileCache(profile_cache_path, max_age=profile_max_age_days * 86400) if profile_max_age_days > 0 else None
+    profiled_printers = printer.printers if isinstance(printer, PrinterGroup) else [printer]
+    profiles: List[Optional[PrinterProfile]] = [
+        profile_cache.get(member.get_connection_info()) if profile_cache else None
+        for member in profiled_printers
+    ]
+    for member, profile in zip(profiled_printers, profiles):
+        if profile is not None:
+            logger.info(f'Printer profile (cached) of {member.get_connection_info()}: {profile}')
+    profile = common_profile(profiles) if all(profiles) else None
+    
+    formatter = TicketFormatter(
+        render_cache=RenderCache(max_bytes=render_cache_bytes) if render_cache_bytes > 0 else None,
+        template_dir=template_dir,
+        detail_sampler=LogSampler(max_per_interval=log_job_details_per_minute, interval=60.0),
+        profile=profile,
+        photo_renderer=PhotoRenderer(
+            base_url=socketio_url,
+            max_entries=ticket_photo_cache_entries,
+            ssl_verify=ssl_verify
+        ) if ticket_photos else None,
+        raster_band_rows=raster_band_rows
+    )
+    profile_lock = threading.Lock()
+    
+    def apply_profile(index: int, resolved: PrinterProfile) -> None:
+        """Adapt the transfer to one printer and the ticket layout to all of them"""
+        profiled_printers[index].set_profile(resolved)
+        with profile_lock:
+            profiles[index] = resolved
+            if all(profiles):
+                formatter.set_profile(common_profile(profiles))
+    
+    for index, (member, cached) in enumerate(zip(profiled_printers, profiles)):
+        if cached is None:
+            load_profile_in_background(member, profile_cache, functools.partial(apply_profile, index))
+        else:
+            member.set_profile(cached)
+    
+    if memory_monitor is not None:
+        if formatter.render_cache is not None:
+            memory_monitor.add_trim_callback('render cache', formatter.render_cache.clear)
+        if formatter.photo_renderer is not None:
+            memory_monitor.add_trim_callback('photo cache', formatter.photo_renderer.clear)
+    
+    health_prober = HealthProber(printer, interval=health_probe_interval) if health_probe_interval > 0 else None
     
     # Create print job handler to coordinate components
-    _handler = PrintJobHandler(socket_client, printer, formatter)
+    handler = PrintJobHandler(
+        socket_client,
+        printer,
+        formatter,
+        scheduler=PriorityJobScheduler(aging_interval=job_aging_interval),
+        load_tracker=LoadTracker(capacity=job_queue_capacity),
+        health_prober=health_prober,
+        max_batch_size=print_batch_size,
+        watchdog=watchdog,
+        warm_up=startup_warm_up,
+        expiry_policy=ExpiryPolicy(
+            # Reports are printed whenever they come, however long they waited
+            max_ages={'delivery': job_expiry_delivery, 'report': 0},
+            default_max_age=job_expiry_intake
+        ),
+        report_page_size=report_page_size,
+        report_chunk_bytes=report_chunk_bytes,
+        memory_monitor=memory_monitor,
+        # One worker per group member, so the members print in parallel
+        workers=len(profiled_printers)
+    )
+    handler.start()
+    if health_prober is not None:
+        health_prober.start()
+    if watchdog is not None:
+        watchdog.start()
+    if memory_monitor is not None:
+        memory_monitor.start()
     
     try:
         socket_client.connect()
@@ -212,7 +813,16 @@ def main():
         sys.exit(1)
     finally:
         socket_client.disconnect()
+        handler.stop()
+        if health_prober is not None:
+            health_prober.stop()
+        if watchdog is not None:
+            watchdog.stop()
+        if memory_monitor is not None:
+            memory_monitor.stop()
+        printer.close()
         logger.info('Printer client stopped.')
+        log_pipeline.stop()
 
 
 if __name__ == '__main__':
@@ -3,8 +3,9 @@ Printer factory for creating printer instances
 Simplifies printer instantiation based on connection type
 """
 
+import sys
 import logging
-from typing import Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from printer_base import BasePrinter
 from printer import NetworkPrinter
@@ -12,14 +13,18 @@ from usb_printer import USBPrinter
 
 logger = logging.getLogger('PrinterClient.PrinterFactory')
 
+# POS-80C
+DEFAULT_USB_VENDOR_ID = 0x0519
+DEFAULT_USB_PRODUCT_ID = 0x0003
+
 
 def create_printer(
     connection_type: str = 'network',
     printer_ip: Optional[str] = None,
     printer_port: int = 9100,
     printer_name: Optional[str] = None,
-    usb_vendor_id: int = 0x0519,
-    usb_product_id: int = 0x0003,
+    usb_vendor_id: int = DEFAULT_USB_VENDOR_ID,
+    usb_product_id: int = DEFAULT_USB_PRODUCT_ID,
     usb_interface: int = 0,
     usb_in_ep: int = 0x81,
     usb_out_ep: int = 0x03
@@ -78,3 +83,97 @@ def create_printer(
     
     else:
         raise ValueError(f"Invalid connection_type: {connection_type}. Must be 'network' or 'usb'")
+
+
+def parse_printer_spec(spec: str) -> Dict[str, Any]:
+    """
+    Parse one entry of a printer list into create_printer arguments
+    
+    Formats:
+        network:<ip>[:<port>]     e.g. network:192.168.1.8:9100
+        usb:<windows printer>     e.g. usb:POS-80C
+        usb:<vid>:<pid>           e.g. usb:0x0519:0x0003
+    
+    Args:
+        spec: Printer spec
+    
+    Returns:
+        Keyword arguments for create_printer
+    
+    Raises:
+        ValueError: If the spec cannot be parsed
+    """
+    connection_type, _, target = spec.strip().partition(':')
+    connection_type = connection_type.lower()
+    if not target:
+        raise ValueError(f"Invalid printer spec {spec!r}: expected '<type>:<target>'")
+    
+    if connection_type == 'network':
+        host, _, port = target.partition(':')
+        try:
+            return {'connection_type': 'network', 'printer_ip': host, 'printer_port': int(port) if port else 9100}
+        except ValueError:
+            raise ValueError(f'Invalid port in printer spec {spec!r}') from None
+    
+    if connection_type == 'usb':
+        ids = target.split(':')
+        if len(ids) == 2 and all(part.lower().startswith('0x') for part in ids):
+            try:
+                return {'connection_type': 'usb', 'usb_vendor_id': int(ids[0], 16), 'usb_product_id': int(ids[1], 16)}
+            except ValueError:
+                raise ValueError(f'Invalid USB IDs in printer spec {spec!r}') from None
+        return {'connection_type': 'usb', 'printer_name': target}
+    
+    raise ValueError(f"Invalid printer spec {spec!r}: type must be 'network' or 'usb'")
+
+
+def _device_identity(kwargs: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Device that create_printer would open for the given arguments"""
+    if kwargs['connection_type'] == 'network':
+        return ('network', kwargs['printer_ip'].lower(), kwargs['printer_port'])
+    # Windows printer names are only used on Windows, elsewhere USBPrinter opens the first
+    # device with the VID:PID (the POS-80C defaults when only a name is given)
+    if kwargs.get('printer_name') and sys.platform == 'win32':
+        return ('usb-name', kwargs['printer_name'].lower())
+    return (
+        'usb',
+        kwargs.get('usb_vendor_id', DEFAULT_USB_VENDOR_ID),
+        kwargs.get('usb_product_id', DEFAULT_USB_PRODUCT_ID)
+    )
+
+
+def parse_printer_list(value: str) -> List[Dict[str, Any]]:
+    """
+    Parse a comma-separated list of printer specs (see parse_printer_spec)
+    
+    USB printers are opened by VID:PID, so two printers of the same model
+    cannot be told apart (on Windows they can by their printer names). Such
+    lists are rejected instead of sending every job to the same device.
+    
+    Args:
+        value: Printer specs separated by commas
+    
+    Returns:
+        create_printer arguments per printer, in the listed order
+    
+    Raises:
+        ValueError: If a spec cannot be parsed or two specs open the same device
+    """
+    printers = []
+    seen: Dict[Tuple[Any, ...], str] = {}
+    for spec in value.split(','):
+        if not spec.strip():
+            continue
+        kwargs = parse_printer_spec(spec)
+        identity = _device_identity(kwargs)
+        if identity in seen:
+            hint = ''
+            if identity[0] == 'usb':
+                hint = (
+                    ': USB printers are opened by VID:PID, so only one printer per model can be '
+                    'used (on Windows, list them by printer name instead)'
+                )
+            raise ValueError(f'Printer specs {seen[identity]!r} and {spec.strip()!r} open the same device{hint}')
+        seen[identity] = spec.strip()
+        printers.append(kwargs)
+    return printers
@@ -0,0 +1,423 @@
+"""
+Printer group for the print client
+Puts several printers behind one registration: jobs go to the least-busy healthy printer and fail over to the others,
+and are held while every printer is down
+"""
+
+import threading
+import time
+import logging
+from typing import Dict, Any, Iterable, List, Optional, Sequence, TYPE_CHECKING
+
+from printer_base import (
+    BasePrinter, PrinterCommunicationError, BatchSendError, Buffers, ChunkStream,
+    PAPER_OK, PAPER_NEAR_END, PAPER_OUT
+)
+
+if TYPE_CHECKING:
+    from printer_profile import PrinterProfile
+
+logger = logging.getLogger('PrinterClient.PrinterGroup')
+
+# Best paper status first
+PAPER_RANK = {PAPER_OK: 0, PAPER_NEAR_END: 1, PAPER_OUT: 2}
+
+
+def _batch_size(batch: Sequence[Buffers]) -> int:
+    """Number of bytes in a batch of tickets"""
+    return sum(len(buffer) for buffers in batch for buffer in buffers)
+
+
+class _Member:
+    """Dispatch state and statistics of one printer in a group"""
+
+    __slots__ = (
+        'printer', 'name', 'in_flight', 'failed_until', 'paper',
+        'tickets', 'bytes', 'busy_time', 'errors', 'failovers', 'last_error'
+    )
+
+    def __init__(self, printer: BasePrinter):
+        self.printer = printer
+        self.name = printer.get_connection_info()
+        self.in_flight = 0
+        # time.monotonic() until which the member is skipped after a failure
+        self.failed_until = 0.0
+        self.paper: Optional[str] = None
+        self.tickets = 0
+        self.bytes = 0
+        self.busy_time = 0.0
+        self.errors = 0
+        self.failovers = 0
+        self.last_error: Optional[str] = None
+
+
+class PrinterGroup(BasePrinter):
+    """Composite printer dispatching to the least-busy healthy member with automatic failover"""
+
+    def __init__(
+        self,
+        printers: Sequence[BasePrinter],
+        failure_cooldown: float = 30.0,
+        hold_jobs: bool = True,
+        hold_timeout: float = 300.0,
+        hold_interval: float = 5.0
+    ):
+        """
+        Initialize printer group
+
+        Members should fail fast (RetryingPrinter with hold_jobs=False) so a job
+        moves on to the next member; holding happens here, once every member failed.
+
+        Args:
+            printers: Member printers in order of preference (usually each wrapped in a RetryingPrinter)
+            failure_cooldown: Seconds a member is only used as a last resort after it failed
+            hold_jobs: Hold jobs while every member is down instead of failing them
+            hold_timeout: Maximum time in seconds a job is held
+            hold_interval: Seconds between checks whether a member is back while a job is held
+
+        Raises:
+            ValueError: If no printers are given
+        """
+        if not printers:
+            raise ValueError('A printer group needs at least one printer')
+        self.failure_cooldown = failure_cooldown
+        self.hold_jobs = hold_jobs
+        self.hold_timeout = hold_timeout
+        self.hold_interval = hold_interval
+        self._members = [_Member(printer) for printer in printers]
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def printers(self) -> List[BasePrinter]:
+        """Member printers"""
+        return [member.printer for member in self._members]
+
+    @property
+    def is_available(self) -> bool:
+        """Whether at least one member is believed to be reachable"""
+        now = time.monotonic()
+        with self._lock:
+            return any(self._is_healthy(member, now) for member in self._members)
+
+    @property
+    def is_busy(self) -> bool:
+        """Whether every member is printing right now"""
+        with self._lock:
+            return all(member.in_flight > 0 for member in self._members)
+
+    def get_connection_info(self) -> str:
+        """Get connection information of all members"""
+        return 'Group: ' + ', '.join(member.name for member in self._members)
+
+    def _is_healthy(self, member: _Member, now: float) -> bool:
+        """Whether a member should get new work (caller must hold the lock)"""
+        return (
+            getattr(member.printer, 'is_available', True)
+            and now >= member.failed_until
+            and member.paper != PAPER_OUT
+        )
+
+    def _candidates(self) -> List[_Member]:
+        """Members in dispatch order: healthy ones least busy first, then the rest as a last resort"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [member for member in self._members if self._is_healthy(member, now)]
+            # Fewest running sends first; on a tie the member that printed least, which spreads paper use
+            healthy.sort(key=lambda member: (member.in_flight, member.busy_time))
+            return healthy + [member for member in self._members if member not in healthy]
+
+    def _take_member(self, tried: List[_Member], failover: bool) -> Optional[_Member]:
+        """
+        Pick the member to send to next and count the send on it in one step
+
+        Picking and counting under one lock keeps concurrent sends (one print
+        worker per member) from all choosing the same idle member.
+
+        Args:
+            tried: Members that already failed this round
+            failover: Whether the send takes over from a failed member
+
+        Returns:
+            The member, or None when every member was tried
+        """
+        now = time.monotonic()
+        with self._lock:
+            remaining = [member for member in self._members if member not in tried]
+            if not remaining:
+                return None
+            member = min(
+                remaining,
+                key=lambda member: (not self._is_healthy(member, now), member.in_flight, member.busy_time)
+            )
+            member.in_flight += 1
+            if failover:
+                member.failovers += 1
+            return member
+
+    def send_raw_data(self, data: bytes) -> None:
+        """
+        Print raw data on one member
+
+        Args:
+            data: Raw bytes to send to printer
+
+        Raises:
+            PrinterCommunicationError: If every member fails
+        """
+        self.send_batch(((data,),))
+
+    def send_buffers(self, buffers: Buffers) -> None:
+        """
+        Print buffers as one ticket on one member
+
+        Args:
+            buffers: Byte buffers in output order
+
+        Raises:
+            PrinterCommunicationError: If every member fails
+        """
+        self.send_batch((buffers,))
+
+    def send_batch(self, batch: Sequence[Buffers]) -> None:
+        """
+        Print several tickets on the least-busy healthy member, failing over on errors
+
+        Tickets a failing member already printed are not sent again; the next
+        member continues with the ticket that failed.
+
+        Args:
+            batch: Buffers of each ticket, in output order
+
+        Raises:
+            BatchSendError: If every member fails after some tickets were printed
+            PrinterCommunicationError: If every member fails
+        """
+        batch = list(batch)
+        completed = 0
+        last_error: Optional[PrinterCommunicationError] = None
+        deadline = time.monotonic() + self.hold_timeout
+        while True:
+            tried: List[_Member] = []
+            while True:
+                member = self._take_member(tried, failover=bool(tried))
+                if member is None:
+                    break
+                tried.append(member)
+                remaining = batch[completed:]
+                started = time.monotonic()
+                try:
+                    member.printer.send_batch(remaining)
+                except PrinterCommunicationError as e:
+                    written = e.completed if isinstance(e, BatchSendError) else 0
+                    self._record(member, written, _batch_size(remaining[:written]), started, e)
+                    completed += written
+                    last_error = e
+                    logger.warning('Printer %s failed: %s', member.name, e)
+                    continue
+                finally:
+                    with self._lock:
+                        member.in_flight -= 1
+                self._record(member, len(remaining), _batch_size(remaining), started)
+                if last_error is not None:
+                    logger.info('Failed over to printer %s', member.name)
+                return
+            if not self._hold(deadline):
+                break
+
+        message = f'All {len(self._members)} printers failed, last error: {last_error}'
+        if completed:
+            raise BatchSendError(message, completed=completed, offset=_batch_size(batch[:completed])) from last_error
+        raise PrinterCommunicationError(message) from last_error
+
+    def send_stream(self, chunks: Iterable[bytes]) -> None:
+        """
+        Print one long print produced while it is written on the least-busy healthy member
+
+        On errors the next member continues with the chunk that failed.
+
+        Args:
+            chunks: Byte chunks in output order (a generator or a ChunkStream)
+
+        Raises:
+            PrinterCommunicationError: If every member fails
+        """
+        stream = ChunkStream.wrap(chunks)
+        last_error: Optional[PrinterCommunicationError] = None
+        deadline = time.monotonic() + self.hold_timeout
+        while True:
+            tried: List[_Member] = []
+            while True:
+                member = self._take_member(tried, failover=bool(tried))
+                if member is None:
+                    break
+                tried.append(member)
+                started = time.monotonic()
+                sent = stream.bytes_sent
+                try:
+                    member.printer.send_stream(stream)
+                except PrinterCommunicationError as e:
+                    self._record(member, 0, stream.bytes_sent - sent, started, e)
+                    last_error = e
+                    logger.warning('Printer %s failed after %d bytes: %s', member.name, stream.bytes_sent, e)
+                    continue
+                finally:
+                    with self._lock:
+                        member.in_flight -= 1
+                self._record(member, 1, stream.bytes_sent - sent, started)
+                if last_error is not None:
+                    logger.info('Failed over to printer %s', member.name)
+                return
+            if not self._hold(deadline):
+                break
+
+        raise PrinterCommunicationError(
+            f'All {len(self._members)} printers failed, last error: {last_error}'
+        ) from last_error
+
+    def _hold(self, deadline: float) -> bool:
+        """
+        Hold a job that every member failed until a member may be reachable again
+
+        Args:
+            deadline: time.monotonic() after which the job is no longer held
+
+        Returns:
+            True to try the members again, False to fail the job
+        """
+        if not self.hold_jobs:
+            return False
+        logger.warning('All %d printers failed, holding job', len(self._members))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopped.wait(min(self.hold_interval, remaining)):
+                return False
+            # The members' recovery probes close their circuits once they answer again
+            with self._lock:
+                if any(getattr(member.printer, 'is_available', True) and member.paper != PAPER_OUT
+                       for member in self._members):
+                    return True
+
+    def _record(
+        self,
+        member: _Member,
+        tickets: int,
+        size: int,
+        started: float,
+        error: Optional[Exception] = None
+    ) -> None:
+        """Update the statistics and failure state of a member after a send"""
+        now = time.monotonic()
+        with self._lock:
+            member.tickets += tickets
+            member.bytes += size
+            member.busy_time += now - started
+            if error is None:
+                member.failed_until = 0.0
+            else:
+                member.errors += 1
+                member.last_error = str(error)
+                member.failed_until = now + self.failure_cooldown
+
+    def test_connection(self) -> bool:
+        """
+        Test the connection to every member
+
+        Returns:
+            True if at least one member is reachable
+        """
+        reachable = False
+        for member in self._members:
+            ok = member.printer.test_connection()
+            with self._lock:
+                if ok:
+                    member.failed_until = 0.0
+                elif member.failed_until == 0.0:
+                    member.failed_until = time.monotonic() + self.failure_cooldown
+            reachable = reachable or ok
+        return reachable
+
+    def set_profile(self, profile: 'PrinterProfile') -> None:
+        """Pass the printer profile on to every member"""
+        for member in self._members:
+            member.printer.set_profile(profile)
+
+    def get_paper_status(self) -> Optional[str]:
+        """
+        Read the paper sensors of every member
+
+        Members without paper get no more jobs until they report paper again.
+
+        Returns:
+            Best paper status of the reachable members (the group prints as long
+            as one of them has paper), or None if no member reports it
+        """
+        statuses = []
+        for member in self._members:
+            status = member.printer.get_paper_status()
+            now = time.monotonic()
+            with self._lock:
+                previous, member.paper = member.paper, status
+                reachable = getattr(member.printer, 'is_available', True) and now >= member.failed_until
+            if status != previous and status in (PAPER_NEAR_END, PAPER_OUT):
+                logger.warning('Printer %s: paper %s', member.name, status)
+            if status is not None:
+                statuses.append((not reachable, PAPER_RANK[status], status))
+        return min(statuses)[2] if statuses else None
+
+    def query(self, command: bytes, replies: int = 1, terminator: bytes = b'\x00', max_length: int = 256) -> Optional[bytes]:
+        """
+        Send a command to the first member that answers
+
+        Members can be different models, so printer profiles are probed on
+        each member rather than through the group.
+
+        Returns:
+            The bytes read, or None if no member answered
+        """
+        for member in self._candidates():
+            response = member.printer.query(command, replies, terminator, max_length)
+            if response:
+                return response
+        return None
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get dispatch statistics per member
+
+        Returns:
+            Dict per member with tickets, bytes, throughput (bytes per second of
+            printing), errors, failovers taken over, availability and last error
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                member.name: {
+                    'tickets': member.tickets,
+                    'bytes': member.bytes,
+                    'throughput': member.bytes / member.busy_time if member.busy_time else 0.0,
+                    'errors': member.errors,
+                    'failovers': member.failovers,
+                    'available': self._is_healthy(member, now),
+                    'paper': member.paper,
+                    'last_error': member.last_error,
+                }
+                for member in self._members
+            }
+
+    def log_stats(self) -> None:
+        """Log dispatch statistics per member"""
+        for name, stats in self.get_stats().items():
+            logger.info(
+                f'Printer {name}: {stats["tickets"]} tickets, {stats["throughput"] / 1024:.1f} kB/s, '
+                f'{stats["errors"]} errors, {stats["failovers"]} failovers taken over'
+                f'{"" if stats["available"] else " (unavailable)"}'
+            )
+
+    def close(self) -> None:
+        """Stop holding jobs and close every member"""
+        self._stopped.set()
+        for member in self._members:
+            close = getattr(member.printer, 'close', None)
+            if close:
+                close()
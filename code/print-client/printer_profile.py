@@ -0,0 +1,348 @@
+"""
+Printer capability profiles
+Identifies the printer once (GS I), maps it to its capabilities and caches the profile on disk per printer
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Dict, Any, Callable, Optional, Sequence
+
+from printer_base import BasePrinter
+
+logger = logging.getLogger('PrinterClient.PrinterProfile')
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'printer_profiles.json')
+
+# GS I n: transmit printer information (reply: '_' + text + NUL)
+INFO_FIRMWARE = 0x41
+INFO_MANUFACTURER = 0x42
+INFO_MODEL = 0x43
+
+# ESC t character code tables and the matching Python codecs
+CODE_PAGES: Dict[int, str] = {
+    0: 'cp437',
+    2: 'cp850',
+    16: 'cp1252',
+    19: 'cp858',
+}
+
+# Capabilities per model name (as reported by GS I 67), the longest matching prefix wins
+KNOWN_MODELS: Dict[str, Dict[str, Any]] = {
+    'TM-T88IV': {'dots_per_line': 512, 'native_qr': False, 'columns': 42, 'receive_buffer': 4096},
+    'TM-T88V': {'dots_per_line': 512, 'native_qr': True, 'columns': 42, 'receive_buffer': 4096},
+    'TM-T88VI': {'dots_per_line': 512, 'native_qr': True, 'columns': 42, 'receive_buffer': 4096},
+    'TM-T88VII': {'dots_per_line': 512, 'native_qr': True, 'columns': 42, 'receive_buffer': 4096},
+    'TM-T20': {'dots_per_line': 576, 'native_qr': True, 'columns': 48, 'receive_buffer': 4096},
+    'TM-m30': {'dots_per_line': 576, 'native_qr': True, 'columns': 48, 'receive_buffer': 4096},
+}
+
+
+def _known_capabilities(model: str) -> Dict[str, Any]:
+    """Capabilities of the longest matching model prefix, empty for unknown models"""
+    matches = [prefix for prefix in KNOWN_MODELS if model.startswith(prefix)]
+    return KNOWN_MODELS[max(matches, key=len)] if matches else {}
+
+
+class PrinterProfile:
+    """Capabilities of one printer model"""
+
+    __slots__ = (
+        'model', 'manufacturer', 'firmware', 'dots_per_line', 'native_qr',
+        'columns', 'code_page', 'receive_buffer', 'probed_at'
+    )
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        manufacturer: Optional[str] = None,
+        firmware: Optional[str] = None,
+        dots_per_line: int = 384,
+        native_qr: bool = False,
+        columns: int = 42,
+        code_page: int = 16,
+        receive_buffer: int = 0,
+        probed_at: float = 0.0
+    ):
+        """
+        Initialize printer profile
+
+        Args:
+            model: Model name reported by the printer, None if unknown
+            manufacturer: Manufacturer reported by the printer
+            firmware: Firmware version reported by the printer
+            dots_per_line: Printable width in dots, the limit for raster images
+            native_qr: Whether the printer renders QR codes itself (GS ( k)
+            columns: Characters per line in the normal font
+            code_page: ESC t character code table, one of CODE_PAGES
+            receive_buffer: Bytes the printer buffers, the size of each write (0 writes buffers whole)
+            probed_at: time.time() of the probe, 0 for built-in defaults
+
+        Raises:
+            ValueError: If the code page is not supported
+        """
+        if code_page not in CODE_PAGES:
+            raise ValueError(f'Unsupported code page {code_page}, expected one of {sorted(CODE_PAGES)}')
+        self.model = model
+        self.manufacturer = manufacturer
+        self.firmware = firmware
+        self.dots_per_line = dots_per_line
+        self.native_qr = native_qr
+        self.columns = columns
+        self.code_page = code_page
+        self.receive_buffer = receive_buffer
+        self.probed_at = probed_at
+
+    @property
+    def encoding(self) -> str:
+        """Python codec of the character code table"""
+        return CODE_PAGES[self.code_page]
+
+    @property
+    def render_key(self) -> str:
+        """Fingerprint of the capabilities that change rendered output"""
+        return (
+            f'dots={self.dots_per_line};qr={"native" if self.native_qr else "raster"};'
+            f'columns={self.columns};codepage={self.code_page}'
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize for the profile cache"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'PrinterProfile':
+        """Deserialize a cached profile, ignoring unknown fields"""
+        fields = {field: data[field] for field in cls.__slots__ if field in data}
+        # Profiles cached before a capability existed get it from the model table
+        if isinstance(fields.get('model'), str):
+            fields = {**_known_capabilities(fields['model']), **fields}
+        return cls(**fields)
+
+    def __repr__(self) -> str:
+        return (
+            f'PrinterProfile(model={self.model!r}, dots_per_line={self.dots_per_line}, '
+            f'native_qr={self.native_qr}, columns={self.columns}, code_page={self.code_page})'
+        )
+
+
+# Safe choices for printers that cannot be identified: raster QR codes of at most 384 dots,
+# 42 columns in Windows-1252 and whole-buffer writes as before profiles existed
+DEFAULT_PROFILE = PrinterProfile()
+
+
+def profile_for_model(
+    model: str,
+    manufacturer: Optional[str] = None,
+    firmware: Optional[str] = None
+) -> PrinterProfile:
+    """
+    Build the profile of a printer model
+
+    Args:
+        model: Model name reported by the printer
+        manufacturer: Manufacturer reported by the printer
+        firmware: Firmware version reported by the printer
+
+    Returns:
+        Profile with the known capabilities of the model, or the safe defaults
+    """
+    capabilities = _known_capabilities(model)
+    if not capabilities:
+        logger.info(f'Unknown printer model {model!r}, using safe defaults')
+    return PrinterProfile(
+        model=model,
+        manufacturer=manufacturer,
+        firmware=firmware,
+        probed_at=time.time(),
+        **capabilities
+    )
+
+
+def common_profile(profiles: Sequence[PrinterProfile]) -> PrinterProfile:
+    """
+    Combine the profiles of a printer group into one every member can print
+
+    Tickets are rendered once and may fail over to any member, so the layout
+    uses the narrowest line, native QR codes only if every member has them and
+    the shared code page (Windows-1252 if the members differ).
+
+    Args:
+        profiles: Profile of each member
+
+    Returns:
+        Profile to render with
+    """
+    if len(profiles) == 1:
+        return profiles[0]
+    code_pages = {profile.code_page for profile in profiles}
+    return PrinterProfile(
+        model=' + '.join(sorted({profile.model or '?' for profile in profiles})),
+        dots_per_line=min(profile.dots_per_line for profile in profiles),
+        native_qr=all(profile.native_qr for profile in profiles),
+        columns=min(profile.columns for profile in profiles),
+        code_page=code_pages.pop() if len(code_pages) == 1 else DEFAULT_PROFILE.code_page,
+        receive_buffer=min(profile.receive_buffer for profile in profiles),
+        probed_at=min(profile.probed_at for profile in profiles)
+    )
+
+
+def probe_profile(printer: BasePrinter) -> Optional[PrinterProfile]:
+    """
+    Ask the printer for its model, manufacturer and firmware in one exchange
+
+    Args:
+        printer: Printer to identify
+
+    Returns:
+        Profile of the printer, or None if it cannot be identified (write-only
+        backend, printer offline or no GS I support)
+    """
+    command = b''.join(b'\x1dI' + bytes([n]) for n in (INFO_MODEL, INFO_MANUFACTURER, INFO_FIRMWARE))
+    response = printer.query(command, replies=3)
+    if not response:
+        return None
+
+    # Each reply is '_' + text + NUL
+    fields = [
+        part[1:].decode('ascii', errors='replace').strip() if part.startswith(b'_') else None
+        for part in response.split(b'\x00')[:3]
+    ]
+    fields += [None] * (3 - len(fields))
+    model, manufacturer, firmware = fields
+    if not model:
+        logger.debug('Printer did not report its model: %r', response)
+        return None
+    return profile_for_model(model, manufacturer or None, firmware or None)
+
+
+class ProfileCache:
+    """JSON file of probed profiles keyed by printer connection"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_age: float = 7 * 86400.0):
+        """
+        Initialize profile cache
+
+        Args:
+            path: JSON file holding the cached profiles
+            max_age: Seconds after which a profile is probed again (printers get swapped)
+        """
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _read(self) -> Dict[str, Any]:
+        """Read all cached entries (empty if the file is missing or unreadable)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as cache_file:
+                entries = json.load(cache_file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable printer profile cache {self.path}: {e}')
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def get(self, identity: str, allow_stale: bool = False) -> Optional[PrinterProfile]:
+        """
+        Get the cached profile of a printer
+
+        Args:
+            identity: Printer identity (connection info)
+            allow_stale: Also return profiles older than max_age
+
+        Returns:
+            Cached profile, or None if there is none (or it is stale)
+        """
+        with self._lock:
+            entry = self._read().get(identity)
+        if not isinstance(entry, dict):
+            return None
+        try:
+            profile = PrinterProfile.from_dict(entry)
+        except (TypeError, ValueError):
+            return None
+        if not allow_stale and time.time() - profile.probed_at > self.max_age:
+            return None
+        return profile
+
+    def put(self, identity: str, profile: PrinterProfile) -> None:
+        """
+        Store the profile of a printer
+
+        Args:
+            identity: Printer identity (connection info)
+            profile: Probed profile
+        """
+        with self._lock:
+            entries = self._read()
+            entries[identity] = profile.to_dict()
+            tmp_path = f'{self.path}.tmp'
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as cache_file:
+                    json.dump(entries, cache_file, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.warning(f'Failed to write printer profile cache {self.path}: {e}')
+
+
+def load_profile(printer: BasePrinter, cache: Optional[ProfileCache] = None) -> PrinterProfile:
+    """
+    Get the profile of a printer, probing it only when the cache has no fresh entry
+
+    Args:
+        printer: Printer to identify
+        cache: Profile cache, None to always probe
+
+    Returns:
+        Fresh cached or probed profile; a stale cached profile or the safe
+        defaults when the printer cannot be identified
+    """
+    identity = printer.get_connection_info()
+    if cache is not None:
+        profile = cache.get(identity)
+        if profile is not None:
+            return profile
+
+    profile = probe_profile(printer)
+    if profile is not None:
+        logger.info(f'Printer identified: {profile.manufacturer or "?"} {profile.model} (firmware {profile.firmware or "?"})')
+        if cache is not None:
+            cache.put(identity, profile)
+        return profile
+
+    stale = cache.get(identity, allow_stale=True) if cache is not None else None
+    if stale is not None:
+        logger.info('Printer could not be identified, using the last known profile')
+        return stale
+    logger.info('Printer could not be identified, using safe defaults')
+    return DEFAULT_PROFILE
+
+
+def load_profile_in_background(
+    printer: BasePrinter,
+    cache: Optional[ProfileCache],
+    on_profile: Callable[[PrinterProfile], None]
+) -> threading.Thread:
+    """
+    Resolve the printer profile without delaying startup
+
+    Args:
+        printer: Printer to identify
+        cache: Profile cache
+        on_profile: Called with the resolved profile
+
+    Returns:
+        The started thread
+    """
+    def run() -> None:
+        try:
+            on_profile(load_profile(printer, cache))
+        except Exception as e:
+            logger.warning(f'Failed to load printer profile: {e}')
+
+    thread = threading.Thread(target=run, name='printer-profile', daemon=True)
+    thread.start()
+    return thread
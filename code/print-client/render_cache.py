@@ -0,0 +1,124 @@
+"""
+Render cache for formatted tickets
+Keeps rendered ESC/POS bytes keyed by a content hash so reprints and resends skip formatting
+"""
+
+import hashlib
+import json
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger('PrinterClient.RenderCache')
+
+
+def make_cache_key(config_key: str, content: Tuple) -> str:
+    """
+    Build a stable cache key for a rendered ticket
+
+    Args:
+        config_key: Fingerprint of the formatter configuration
+        content: Normalized ticket content (see PrintJob.content_key)
+
+    Returns:
+        Hex digest identifying the rendered output
+    """
+    payload = json.dumps([config_key, content], ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RenderCache:
+    """Size-bounded LRU cache of rendered ticket bytes"""
+
+    def __init__(self, max_bytes: int = 1024 * 1024):
+        """
+        Initialize render cache
+
+        Args:
+            max_bytes: Maximum total size of cached tickets in bytes
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a rendered ticket
+
+        Args:
+            key: Cache key from make_cache_key
+
+        Returns:
+            Rendered bytes, or None on a miss
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Store a rendered ticket, evicting least recently used entries to stay within budget
+
+        Args:
+            key: Cache key from make_cache_key
+            data: Rendered bytes
+        """
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Remove all cached tickets"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with hits, misses, evictions, entries and bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._size,
+            }
+
+    def log_stats(self) -> None:
+        """Log cache statistics"""
+        stats = self.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / lookups * 100 if lookups else 0.0
+        logger.info(
+            f'Render cache: {stats["hits"]} hits, {stats["misses"]} misses ({hit_rate:.0f}% hit rate), '
+            f'{stats["evictions"]} evictions, {stats["entries"]} entries / {stats["bytes"]} bytes'
+        )
@@ -0,0 +1,417 @@
+"""
+Retry and circuit breaker layer for thermal printers
+Wraps any BasePrinter with exponential backoff and fail-fast behaviour while the printer is down
+"""
+
+import random
+import threading
+import time
+import logging
+from typing import Iterable, Optional, Sequence, TYPE_CHECKING
+
+from printer_base import BasePrinter, PrinterCommunicationError, BatchSendError, Buffers, ChunkStream
+
+if TYPE_CHECKING:
+    from printer_profile import PrinterProfile
+
+logger = logging.getLogger('PrinterClient.RetryPrinter')
+
+
+class CircuitOpenError(PrinterCommunicationError):
+    """Exception raised when a job is rejected because the printer is known to be down"""
+    pass
+
+
+class RetryPolicy:
+    """Exponential backoff with jitter for transient printer errors"""
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+        jitter: float = 0.5
+    ):
+        """
+        Initialize retry policy
+
+        Args:
+            max_attempts: Total number of send attempts per job (1 disables retries)
+            base_delay: Delay in seconds before the first retry
+            max_delay: Upper bound for the delay between retries in seconds
+            jitter: Fraction of the delay that is randomized (0.0 - 1.0)
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Get the delay before the next attempt
+
+        Args:
+            attempt: Number of the attempt that just failed (starting at 1)
+
+        Returns:
+            Delay in seconds
+        """
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # Keep part of the delay fixed and randomize the rest so that
+        # several clients do not hammer the printer in lockstep
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+
+class CircuitBreaker:
+    """Tracks consecutive printer failures and opens the circuit when the printer is down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures before the circuit opens
+            reset_timeout: Seconds before an open circuit lets a trial job through
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def state(self) -> str:
+        """Current circuit state"""
+        with self._condition:
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a send may be attempted
+
+        Returns:
+            True if the circuit is closed or a half-open trial is allowed
+        """
+        with self._condition:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                logger.info('Circuit half-open, allowing trial print')
+                return True
+            return False
+
+    def record_success(self) -> None:
+        """Record a successful send and close the circuit"""
+        with self._condition:
+            if self._state != self.CLOSED:
+                logger.info('Circuit closed, printer is reachable again')
+            self._state = self.CLOSED
+            self._failures = 0
+            self._condition.notify_all()
+
+    def record_failure(self) -> bool:
+        """
+        Record a failed send
+
+        Returns:
+            True if this failure opened the circuit
+        """
+        with self._condition:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                logger.warning('Circuit opened after %d consecutive failures', self._failures)
+                return True
+            return False
+
+    def wait_until_closed(self, timeout: float) -> bool:
+        """
+        Block until the circuit closes
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the circuit closed within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._state != self.CLOSED:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+
+class RetryingPrinter(BasePrinter):
+    """Printer wrapper that retries transient failures and fails fast while the printer is down"""
+
+    def __init__(
+        self,
+        printer: BasePrinter,
+        policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hold_jobs: bool = True,
+        hold_timeout: float = 300.0,
+        probe_interval: float = 5.0
+    ):
+        """
+        Initialize retrying printer
+
+        Args:
+            printer: Printer instance to wrap (Network or USB)
+            policy: Retry policy for transient errors
+            breaker: Circuit breaker tracking printer availability
+            hold_jobs: Hold jobs until the printer recovers instead of failing fast
+            hold_timeout: Maximum time in seconds a job is held while the circuit is open
+            probe_interval: Seconds between background recovery probes while the circuit is open
+        """
+        self.printer = printer
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.hold_jobs = hold_jobs
+        self.hold_timeout = hold_timeout
+        self.probe_interval = probe_interval
+
+        # Printers can only handle one job at a time
+        self._send_lock = threading.Lock()
+        # Held only while talking to the printer, so the recovery probe can run while a job is held
+        self._io_lock = threading.Lock()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def is_available(self) -> bool:
+        """Whether the printer is believed to be reachable (circuit not open)"""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    @property
+    def is_busy(self) -> bool:
+        """Whether a job is being sent (or held) right now"""
+        return self._send_lock.locked()
+
+    def get_connection_info(self) -> str:
+        """Get connection information of the wrapped printer"""
+        return self.printer.get_connection_info()
+
+    def send_raw_data(self, data: bytes) -> None:
+        """
+        Send raw data to the printer, retrying transient failures
+
+        Args:
+            data: Raw bytes to send to printer
+
+        Raises:
+            CircuitOpenError: If the printer is known to be down
+            PrinterCommunicationError: If all attempts fail
+        """
+        self.send_buffers((data,))
+
+    def send_buffers(self, buffers: Buffers) -> None:
+        """
+        Send buffers to the printer as one print, retrying transient failures
+
+        Args:
+            buffers: Byte buffers in output order
+
+        Raises:
+            CircuitOpenError: If the printer is known to be down
+            PrinterCommunicationError: If all attempts fail
+        """
+        self.send_batch((buffers,))
+
+    def send_batch(self, batch: Sequence[Buffers]) -> None:
+        """
+        Send several tickets in one session, retrying transient failures
+
+        Tickets that were fully written before a failure are not sent again;
+        a retry resumes with the ticket that failed.
+
+        Args:
+            batch: Buffers of each ticket, in output order
+
+        Raises:
+            CircuitOpenError: If the printer is known to be down before any ticket was written
+            BatchSendError: If all attempts fail after some tickets were written
+            PrinterCommunicationError: If all attempts fail
+        """
+        batch = list(batch)
+        completed = 0
+        offset = 0
+        with self._send_lock:
+            try:
+                attempt = 0
+                while True:
+                    self._wait_for_circuit()
+                    attempt += 1
+                    try:
+                        with self._io_lock:
+                            self.printer.send_batch(batch[completed:])
+                        self.breaker.record_success()
+                        return
+                    except PrinterCommunicationError as e:
+                        if isinstance(e, BatchSendError):
+                            completed += e.completed
+                            offset += e.offset
+                        if self.breaker.record_failure():
+                            self._start_probe()
+                            if not self.hold_jobs:
+                                raise
+                            # Hold this job too instead of spending the remaining attempts
+                            continue
+                        if attempt >= self.policy.max_attempts:
+                            raise
+                        delay = self.policy.get_delay(attempt)
+                        logger.warning(
+                            'Print attempt %d/%d failed: %s - retrying in %.2fs',
+                            attempt, self.policy.max_attempts, e, delay
+                        )
+                        if self._stopped.wait(delay):
+                            raise
+            except PrinterCommunicationError as e:
+                if completed == 0 and not isinstance(e, BatchSendError):
+                    raise
+                # Report progress relative to the whole batch
+                raise BatchSendError(str(e), completed=completed, offset=offset) from e
+
+    def send_stream(self, chunks: Iterable[bytes]) -> None:
+        """
+        Send one long print produced while it is written, retrying transient failures
+
+        Chunks are not kept, so a retry resumes with the chunk that failed;
+        chunks before it are not sent again.
+
+        Args:
+            chunks: Byte chunks in output order (a generator or a ChunkStream)
+
+        Raises:
+            CircuitOpenError: If the printer is known to be down
+            PrinterCommunicationError: If all attempts fail
+        """
+        stream = ChunkStream.wrap(chunks)
+        with self._send_lock:
+            attempt = 0
+            while True:
+                self._wait_for_circuit()
+                attempt += 1
+                try:
+                    with self._io_lock:
+                        stream.send(self.printer)
+                    self.breaker.record_success()
+                    return
+                except PrinterCommunicationError as e:
+                    if self.breaker.record_failure():
+                        self._start_probe()
+                        if not self.hold_jobs:
+                            raise
+                        # Hold this job too instead of spending the remaining attempts
+                        continue
+                    if attempt >= self.policy.max_attempts:
+                        raise
+                    delay = self.policy.get_delay(attempt)
+                    logger.warning(
+                        'Print attempt %d/%d failed after %d bytes: %s - retrying in %.2fs',
+                        attempt, self.policy.max_attempts, stream.bytes_sent, e, delay
+                    )
+                    if self._stopped.wait(delay):
+                        raise
+
+    def _wait_for_circuit(self) -> None:
+        """Wait for (or reject on) an open circuit before sending"""
+        if self.breaker.allow_request():
+            return
+
+        if not self.hold_jobs:
+            raise CircuitOpenError(f'Printer unavailable: {self.get_connection_info()}')
+
+        logger.warning('Printer unavailable, holding job for up to %.0fs', self.hold_timeout)
+        self._start_probe()
+        if not self.breaker.wait_until_closed(self.hold_timeout):
+            raise CircuitOpenError(
+                f'Printer unavailable for {self.hold_timeout:.0f}s: {self.get_connection_info()}'
+            )
+        logger.info('Printer recovered, resuming held job')
+
+    def _start_probe(self) -> None:
+        """Start the background recovery probe if it is not running yet"""
+        with self._probe_lock:
+            if self._probe_thread is not None and self._probe_thread.is_alive():
+                return
+            self._probe_thread = threading.Thread(
+                target=self._probe_loop,
+                name='printer-recovery-probe',
+                daemon=True
+            )
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        """Probe the printer until it is reachable again"""
+        logger.info('Probing printer recovery every %gs', self.probe_interval)
+        while self.breaker.state != CircuitBreaker.CLOSED:
+            if self._stopped.wait(self.probe_interval):
+                return
+            # A running send reports the outcome to the breaker itself
+            if not self._io_lock.acquire(blocking=False):
+                continue
+            try:
+                reachable = self.printer.test_connection()
+            finally:
+                self._io_lock.release()
+            if reachable:
+                self.breaker.record_success()
+                return
+
+    def test_connection(self) -> bool:
+        """
+        Test connection to the printer, waiting for a running print to finish
+
+        Returns:
+            True if connection successful, False otherwise
+        """
+        with self._send_lock, self._io_lock:
+            if self.printer.test_connection():
+                self.breaker.record_success()
+                return True
+            return False
+
+    def set_profile(self, profile: 'PrinterProfile') -> None:
+        """Pass the printer profile on to the wrapped printer"""
+        self.printer.set_profile(profile)
+
+    def get_paper_status(self) -> Optional[str]:
+        """
+        Read the paper roll sensor of the wrapped printer, waiting for a running print to finish
+
+        Returns:
+            Paper status, or None if not supported or unreadable
+        """
+        with self._send_lock, self._io_lock:
+            return self.printer.get_paper_status()
+    
+    def query(self, command: bytes, replies: int = 1, terminator: bytes = b'\x00', max_length: int = 256) -> Optional[bytes]:
+        """
+        Send a command to the wrapped printer and read its replies, waiting for a running print to finish
+        
+        Returns:
+            The bytes read, or None if not supported or nothing was answered
+        """
+        with self._send_lock, self._io_lock:
+            return self.printer.query(command, replies, terminator, max_length)
+
+    def close(self) -> None:
+        """Stop the recovery probe and close the wrapped printer"""
+        self._stopped.set()
+        close = getattr(self.printer, 'close', None)
+        if close:
+            close()
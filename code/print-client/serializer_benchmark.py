@@ -0,0 +1,128 @@
+"""
+Socket.IO serializer benchmark
+Compares JSON and MessagePack packet encode/decode time and wire size on delivery payloads
+
+Usage:
+    python serializer_benchmark.py [--materials 1 5 20] [--iterations 5000]
+"""
+
+import argparse
+import timeit
+from typing import Dict, Any, List, Tuple
+
+from socketio import packet
+
+try:
+    from socketio import msgpack_packet
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    msgpack_packet = None
+    MSGPACK_AVAILABLE = False
+
+MATERIAL_NAMES = ['Zekering 5A', 'Schroef M3x10', 'Soldeertin', 'Netsnoer 2m', 'Krimpkous', 'Lamp E27 LED']
+
+
+def make_delivery_payload(material_count: int, print_job_id: int = 1234) -> Dict[str, Any]:
+    """
+    Build a 'print-job' payload shaped like the delivery receipts sent by the server
+
+    Args:
+        material_count: Number of material lines
+        print_job_id: Print job ID
+
+    Returns:
+        Print job payload
+    """
+    materials = []
+    for i in range(material_count):
+        prijs = 50 + (i * 137) % 2500
+        aantal = 1 + i % 4
+        materials.append({
+            'naam': MATERIAL_NAMES[i % len(MATERIAL_NAMES)],
+            'aantal': aantal,
+            'prijsPerStuk': prijs,
+            'totaalPrijs': prijs * aantal,
+        })
+    subtotal = sum(m['totaalPrijs'] for m in materials)
+    return {
+        'printJobId': print_job_id,
+        'volgnummer': 'RC-2025-0142',
+        'klantType': 'Externe',
+        'afdelingNaam': 'Elektro',
+        'voorwerpBeschrijving': 'Koffiezetapparaat, warmt niet meer op',
+        'klachtBeschrijving': 'Lampje brandt maar het water wordt niet warm. Soms valt de zekering uit.',
+        'printData': {
+            'type': 'delivery',
+            'advies': 'Thermische zekering vervangen, aansluitingen nagekeken en opnieuw gesoldeerd.',
+            'materials': materials,
+            'subtotal': subtotal,
+            'totalPrice': subtotal,
+        },
+    }
+
+
+def _wire_size(encoded: Any) -> int:
+    """Size of an encoded packet as sent in a websocket frame"""
+    if isinstance(encoded, list):
+        return sum(_wire_size(part) for part in encoded)
+    if isinstance(encoded, str):
+        return len(encoded.encode('utf-8'))
+    return len(encoded)
+
+
+def benchmark(packet_class: type, payload: Dict[str, Any], iterations: int) -> Tuple[float, float, int]:
+    """
+    Measure one serializer
+
+    Args:
+        packet_class: Socket.IO packet class (Packet or MsgPackPacket)
+        payload: Event payload
+        iterations: Number of encode/decode rounds
+
+    Returns:
+        (encode microseconds, decode microseconds, wire size in bytes) per packet
+    """
+    pkt = packet_class(packet.EVENT, data=['print-job', payload])
+    encoded = pkt.encode()
+    decoded = packet_class(encoded_packet=encoded)
+    if decoded.data != ['print-job', payload]:
+        raise RuntimeError(f'{packet_class.__name__} round trip changed the payload')
+
+    encode_time = timeit.timeit(pkt.encode, number=iterations) / iterations
+    decode_time = timeit.timeit(lambda: packet_class(encoded_packet=encoded), number=iterations) / iterations
+    return encode_time * 1e6, decode_time * 1e6, _wire_size(encoded)
+
+
+def run(material_counts: List[int], iterations: int) -> None:
+    """Run the benchmark and print a comparison table"""
+    serializers = [('json', packet.Packet)]
+    if MSGPACK_AVAILABLE:
+        serializers.append(('msgpack', msgpack_packet.MsgPackPacket))
+    else:
+        print('msgpack is not installed, only JSON is measured')
+
+    print(f'{"materials":>9} {"serializer":>10} {"encode us":>10} {"decode us":>10} {"bytes":>7}')
+    for count in material_counts:
+        payload = make_delivery_payload(count)
+        baseline_size = None
+        for name, packet_class in serializers:
+            encode_us, decode_us, size = benchmark(packet_class, payload, iterations)
+            if baseline_size is None:
+                baseline_size = size
+                ratio = ''
+            else:
+                ratio = f' ({size / baseline_size * 100:.0f}%)'
+            print(f'{count:>9} {name:>10} {encode_us:>10.1f} {decode_us:>10.1f} {size:>7}{ratio}')
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Compare Socket.IO JSON and MessagePack serialization')
+    parser.add_argument('--materials', type=int, nargs='+', default=[0, 3, 10, 30], help='Material line counts to test')
+    parser.add_argument('--iterations', type=int, default=5000, help='Encode/decode rounds per measurement')
+    args = parser.parse_args()
+    run(args.materials, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
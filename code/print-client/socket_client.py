@@ -3,14 +3,32 @@ Socket.IO client module for printer communication
 Handles connection to the Next.js Socket.IO server and event handling
 """
 
+import threading
 import time
 import logging
 import requests
-from typing import Dict, Any, Callable, Optional
+from requests.adapters import HTTPAdapter
+from collections import deque
+from typing import Dict, Any, Callable, Deque, List, Optional, Tuple
 import socketio
 
+from stall_watchdog import StallWatchdog
+from print_job import parse_timestamp
+
+# MessagePack serialization is optional
+try:
+    import msgpack  # noqa: F401
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
 logger = logging.getLogger('PrinterClient.SocketIO')
 
+SERIALIZERS = ('json', 'msgpack', 'auto')
+
+# Clock differences with the server (in seconds) worth a warning in the log
+CLOCK_SKEW_WARNING = 5.0
+
 
 class SocketIOClient:
     """Socket.IO client for receiving print jobs from the server"""
@@ -20,7 +38,12 @@ class SocketIOClient:
         server_url: str,
         printer_name: str,
         ssl_verify: bool = True,
-        debug: bool = False
+        debug: bool = False,
+        started_at: Optional[float] = None,
+        ready_timeout: float = 30.0,
+        load_report_interval: float = 10.0,
+        serializer: str = 'json',
+        watchdog: Optional[StallWatchdog] = None
     ):
         """
         Initialize Socket.IO client
@@ -30,28 +53,77 @@ class SocketIOClient:
             printer_name: Name of this printer
             ssl_verify: Whether to verify SSL certificates
             debug: Enable debug logging
+            started_at: time.monotonic() timestamp of process start (for startup latency)
+            ready_timeout: Maximum time in seconds to wait for the server to become ready
+            load_report_interval: Seconds between periodic load reports (0 disables them)
+            serializer: Packet serializer: 'json' (the rc-app server), 'msgpack' (servers with a
+                MessagePack parser, e.g. the stand-in server) or 'auto' (msgpack with JSON fallback)
+            watchdog: Stall watchdog timing the event handlers
         """
         self.server_url = server_url
         self.printer_name = printer_name
         self.printer_id: Optional[int] = None
         self.ssl_verify = ssl_verify
         self.socketio_path = '/api/printer-socketio'
+        self.ready_timeout = ready_timeout
+        self.load_report_interval = load_report_interval
+        self._load_report_task = None
+        
+        # Startup and reconnect timing
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.startup_latency: Optional[float] = None
+        self._disconnected_at: Optional[float] = None
+        # Server clock minus the local clock in seconds, from the serverTime sent on registration
+        self.clock_offset: Optional[float] = None
+        
+        # Set once the server answered a readiness probe or accepted a connection
+        self._server_ready = False
+        
+        # Pooled HTTP session shared by the readiness probe and the polling transport
+        self._http = requests.Session()
+        self._http.verify = ssl_verify
+        self._http.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._http.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
         
         # Callbacks
         self._on_print_job_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+        self._load_report_provider: Optional[Callable[[], Dict[str, Any]]] = None
+        self._credit_provider: Optional[Callable[[], int]] = None
+        self._registered_callback: Optional[Callable[[], None]] = None
+        
+        # Job outcomes that could not be reported while disconnected, sent after re-registering
+        self._unsent_results: Deque[Tuple[str, Dict[str, Any]]] = deque()
+        self._results_lock = threading.Lock()
         
         if not ssl_verify:
             logger.warning('SSL certificate verification is DISABLED - use only in development!')
         
-        # Initialize Socket.IO client
+        if serializer not in SERIALIZERS:
+            raise ValueError(f'Unknown serializer {serializer!r}, expected one of {SERIALIZERS}')
+        if serializer != 'json' and not MSGPACK_AVAILABLE:
+            logger.warning('msgpack is not installed, using JSON serialization')
+            serializer = 'json'
+        # In auto mode msgpack is tried first and JSON is kept if the server rejects it
+        self._serializer_fallback = serializer == 'auto'
+        self.debug = debug
+        self.watchdog = watchdog
+        
+        self._create_client('json' if serializer == 'json' else 'msgpack')
+    
+    def _create_client(self, serializer: str) -> None:
+        """Create the Socket.IO client with the given packet serializer"""
+        self.serializer = serializer
         self.sio = socketio.Client(
             reconnection=True,
             reconnection_attempts=0,  # Infinite attempts
-            reconnection_delay=1,
+            reconnection_delay=0.5,
             reconnection_delay_max=5,
-            logger=debug,
-            engineio_logger=debug,
-            ssl_verify=ssl_verify
+            logger=self.debug,
+            engineio_logger=self.debug,
+            http_session=self._http,
+            ssl_verify=self.ssl_verify,
+            # python-socketio calls its JSON serializer 'default'
+            serializer='default' if serializer == 'json' else serializer
         )
         
         self._register_handlers()
@@ -65,17 +137,60 @@ class SocketIOClient:
         """
         self._on_print_job_callback = callback
     
+    def set_load_report_provider(self, provider: Callable[[], Dict[str, Any]]) -> None:
+        """
+        Set provider for printer load reports
+        
+        Args:
+            provider: Function returning the current load report
+        """
+        self._load_report_provider = provider
+    
+    def set_credit_provider(self, provider: Callable[[], int]) -> None:
+        """
+        Set provider for the credit window advertised on registration
+        
+        Args:
+            provider: Function returning the number of jobs this client can accept right now
+        """
+        self._credit_provider = provider
+    
+    def set_registered_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Set callback for a confirmed (re)registration
+        
+        Args:
+            callback: Function called once the server assigned the printer ID
+        """
+        self._registered_callback = callback
+    
+    def _watch(self, event: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Time an event handler with the stall watchdog, if one is set"""
+        if self.watchdog is None:
+            return lambda handler: handler
+        return self.watchdog.watch(f'event:{event}')
+    
     def _register_handlers(self) -> None:
         """Register Socket.IO event handlers"""
         
         @self.sio.event
+        @self._watch('connect')
         def connect():
-            logger.info(f'Connected to server: {self.server_url}')
-            # Register this printer with the server
-            self.sio.emit('register-printer', {'printerNaam': self.printer_name})
+            self._server_ready = True
+            logger.info(f'Connected to server: {self.server_url} ({self.sio.transport()})')
+            # Register this printer with the server, advertising how many jobs it can accept
+            registration: Dict[str, Any] = {'printerNaam': self.printer_name}
+            if self._credit_provider:
+                registration['credits'] = self._credit_provider()
+            self.sio.emit('register-printer', registration)
         
         @self.sio.event
         def disconnect():
+            self._disconnected_at = time.monotonic()
+            # python-socketio reconnects with the transports of the last connect. After a
+            # websocket-only connect that would skip the HTTP request that creates a restarted
+            # server's Socket.IO endpoint, so reconnect over polling and upgrade from there
+            self.sio.connection_transports = ['polling', 'websocket']
             logger.warning('Disconnected from server')
         
         @self.sio.event
@@ -83,30 +198,64 @@ class SocketIOClient:
             logger.error(f'Connection error: {data}')
         
         @self.sio.on('printer-registered')
+        @self._watch('printer-registered')
         def on_printer_registered(data: Dict[str, Any]):
             """Printer successfully registered"""
             self.printer_id = data.get('printerId')
             printer_name = data.get('printerNaam')
             logger.info(f'Printer registered: {printer_name} (ID: {self.printer_id})')
+            
+            server_time = parse_timestamp(data.get('serverTime'), 'serverTime')
+            if server_time is not None:
+                self.clock_offset = server_time - time.time()
+                if abs(self.clock_offset) >= CLOCK_SKEW_WARNING:
+                    logger.warning('Server clock is %+.1fs off from this machine, correcting job ages', self.clock_offset)
+            
+            now = time.monotonic()
+            if self.startup_latency is None:
+                self.startup_latency = now - self.started_at
+                logger.info(f'Time from process start to printer-registered: {self.startup_latency:.3f}s')
+            elif self._disconnected_at is not None:
+                logger.info(f'Re-registered {now - self._disconnected_at:.3f}s after disconnect')
+                self._disconnected_at = None
+            
+            self._flush_results()
+            
+            # Let the server know our load right away, then report periodically
+            self.emit_load_report()
+            if self.load_report_interval > 0 and self._load_report_task is None:
+                self._load_report_task = self.sio.start_background_task(self._load_report_loop)
+            
+            if self._registered_callback:
+                self._registered_callback()
         
         @self.sio.on('print-job')
+        @self._watch('print-job')
         def on_print_job(data: Dict[str, Any]):
             """Received a new print job"""
-            logger.info(f'Received print job: {data}')
+            logger.debug('Received print job: %s', data)
             if self._on_print_job_callback:
                 self._on_print_job_callback(data)
         
+        @self.sio.on('load-query')
+        @self._watch('load-query')
+        def on_load_query(data: Optional[Dict[str, Any]] = None):
+            """Server asks for the current load (answered through the ack)"""
+            return self._build_load_report()
+        
         @self.sio.on('print-ack')
+        @self._watch('print-ack')
         def on_print_ack(data: Dict[str, Any]):
             """Print job acknowledgment"""
             print_job_id = data.get('printJobId')
             status = data.get('status')
-            logger.info(f'Print job {print_job_id} acknowledged with status: {status}')
+            logger.debug('Print job %s acknowledged with status: %s', print_job_id, status)
         
         @self.sio.on('print-status-update')
+        @self._watch('print-status-update')
         def on_print_status_update(data: Dict[str, Any]):
             """Print status update broadcast"""
-            logger.info(f'Print status update: {data}')
+            logger.debug('Print status update: %s', data)
         
         @self.sio.on('error')
         def on_error(data: Dict[str, Any]):
@@ -122,28 +271,22 @@ class SocketIOClient:
         logger.info(f'Printer name: {self.printer_name}')
         
         try:
-            # First, initialize the Socket.IO server by fetching the endpoint
-            init_url = f'{full_url}{self.socketio_path}'
-            logger.debug(f'Initializing Socket.IO server at {init_url}')
+            # The Socket.IO server on the Next.js side is created lazily by the
+            # first HTTP request to its endpoint, so make sure it is up first
+            if not self._server_ready:
+                self._wait_for_server()
             
             try:
-                response = requests.get(init_url, verify=self.ssl_verify, timeout=5)
-                logger.debug(f'Initialization response: {response.status_code}')
-            except requests.exceptions.RequestException as req_error:
-                logger.warning(f'Initialization request failed (this may be normal): {req_error}')
-            
-            # Small delay to ensure server is initialized
-            time.sleep(0.5)
-            
-            # Now connect with Socket.IO client
-            logger.debug('Attempting Socket.IO connection...')
-            self.sio.connect(
-                full_url,
-                socketio_path=self.socketio_path,
-                wait_timeout=10,
-                transports=['websocket', 'polling']
-            )
-            logger.info('Successfully connected!')
+                self._connect_with_fallback()
+            except socketio.exceptions.ConnectionError as msgpack_error:
+                if not self._serializer_fallback:
+                    raise
+                # The server speaks a single packet format, a mismatch closes the connection
+                logger.warning(f'MessagePack connection failed ({msgpack_error}), falling back to JSON')
+                self._serializer_fallback = False
+                self._create_client('json')
+                self._connect_with_fallback()
+            logger.info(f'Successfully connected! (serializer: {self.serializer})')
             
         except ConnectionError as e:
             logger.error(f'Connection failed: {e}')
@@ -177,6 +320,56 @@ class SocketIOClient:
             logger.error('  4. The Socket.IO server is properly initialized on the Next.js side')
             raise
     
+    def _connect_with_fallback(self) -> None:
+        """Connect websocket-first and only fall back to polling when that fails"""
+        # Polling is needed e.g. when the server has just restarted and has no upgrade handler yet
+        try:
+            logger.debug('Attempting Socket.IO connection over websocket...')
+            self._connect_transports(['websocket'])
+        except socketio.exceptions.ConnectionError as ws_error:
+            logger.warning(f'WebSocket connection failed ({ws_error}), falling back to polling')
+            self._connect_transports(['polling', 'websocket'])
+    
+    def _connect_transports(self, transports: List[str]) -> None:
+        """Connect to the server using the given transports"""
+        self.sio.connect(
+            self.server_url,
+            socketio_path=self.socketio_path,
+            wait_timeout=5,
+            transports=transports
+        )
+    
+    def _wait_for_server(self) -> bool:
+        """
+        Probe the Socket.IO endpoint until the server answers, backing off between attempts
+        
+        Returns:
+            True if the server answered, False if the ready timeout expired
+        """
+        init_url = f'{self.server_url}{self.socketio_path}'
+        deadline = time.monotonic() + self.ready_timeout
+        delay = 0.1
+        attempt = 0
+        
+        while True:
+            attempt += 1
+            try:
+                response = self._http.get(init_url, timeout=5)
+                logger.debug(f'Readiness probe {attempt}: {response.status_code}')
+                # Any non-server-error answer means the endpoint (and the Socket.IO server) is up
+                if response.status_code < 500:
+                    self._server_ready = True
+                    return True
+            except requests.exceptions.RequestException as req_error:
+                logger.debug(f'Readiness probe {attempt} failed: {req_error}')
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning(f'Server not ready after {self.ready_timeout:.0f}s, connecting anyway')
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 2.0)
+    
     def disconnect(self) -> None:
         """Disconnect from the Socket.IO server"""
         if self.sio.connected:
@@ -190,22 +383,140 @@ class SocketIOClient:
         Args:
             print_job_id: ID of the completed print job
         """
-        self.sio.emit('print-completed', {'printJobId': print_job_id})
-        logger.info(f'Print job {print_job_id} completed successfully')
+        self._emit_result('print-completed', {'printJobId': print_job_id})
+        logger.info('Print job %s completed successfully', print_job_id)
     
-    def emit_print_failed(self, print_job_id: int, error_message: str) -> None:
+    def emit_print_failed(self, print_job_id: int, error_message: str, reason: Optional[str] = None) -> None:
         """
         Notify server of print failure
         
         Args:
             print_job_id: ID of the failed print job
             error_message: Description of the error
+            reason: Machine-readable cause ('expired' for stale jobs that were not printed)
         """
-        self.sio.emit('print-failed', {
+        data = {
             'printJobId': print_job_id,
             'errorMessage': error_message
-        })
-        logger.error(f'Print job {print_job_id} failed: {error_message}')
+        }
+        if reason is not None:
+            data['reason'] = reason
+        self._emit_result('print-failed', data)
+        if reason is None:
+            logger.error('Print job %s failed: %s', print_job_id, error_message)
+    
+    def _emit_result(self, event: str, data: Dict[str, Any]) -> None:
+        """Report a job outcome, keeping it for the next registration while disconnected"""
+        with self._results_lock:
+            # Keep the order: earlier outcomes still waiting go out first
+            if not self._unsent_results:
+                try:
+                    self.sio.emit(event, data)
+                    return
+                except socketio.exceptions.BadNamespaceError:
+                    pass
+            self._unsent_results.append((event, data))
+        logger.warning('Not connected, %s for job %s will be sent after reconnecting', event, data['printJobId'])
+    
+    def _flush_results(self) -> None:
+        """Send the job outcomes kept while disconnected"""
+        with self._results_lock:
+            while self._unsent_results:
+                event, data = self._unsent_results[0]
+                try:
+                    self.sio.emit(event, data)
+                except socketio.exceptions.BadNamespaceError:
+                    return
+                self._unsent_results.popleft()
+                logger.info('Reported %s for job %s after reconnecting', event, data['printJobId'])
+    
+    def _build_load_report(self) -> Optional[Dict[str, Any]]:
+        """Build the current load report, if a provider is set"""
+        if not self._load_report_provider:
+            return None
+        report = self._load_report_provider()
+        report['printerId'] = self.printer_id
+        return report
+    
+    def emit_load_report(self) -> None:
+        """Send the current load report to the server"""
+        report = self._build_load_report()
+        if report is not None and self._emit_if_connected('printer-load', report):
+            logger.debug('Load report sent: %s', report)
+    
+    def emit_credits(self, credits: int) -> bool:
+        """
+        Return credits to the server so it can dispatch more jobs
+        
+        Args:
+            credits: Number of additional jobs this client can accept
+        
+        Returns:
+            True if the credits were sent; they are not before registration or while disconnected
+        """
+        if credits <= 0 or self.printer_id is None:
+            return False
+        if not self._emit_if_connected('printer-credit', {'printerId': self.printer_id, 'credits': credits}):
+            return False
+        logger.debug('Returned %d credits to the server', credits)
+        return True
+    
+    def _emit_if_connected(self, event: str, data: Dict[str, Any]) -> bool:
+        """
+        Emit an event that is worthless after a reconnect, dropping it while disconnected
+        
+        Load reports and credits are sent afresh on registration, so there is
+        nothing to keep. The connection can drop between the connected check
+        and the emit, so the emit itself is guarded as well.
+        
+        Args:
+            event: Event name
+            data: Event payload
+        
+        Returns:
+            True if the event was sent
+        """
+        if not self.sio.connected:
+            return False
+        try:
+            self.sio.emit(event, data)
+        except (socketio.exceptions.BadNamespaceError, socketio.exceptions.ConnectionError) as e:
+            logger.debug('Not connected, %s not sent: %s', event, e)
+            return False
+        return True
+    
+    def fetch_report_page(self, print_job_id: int, page: int, page_size: int, timeout: float = 10.0) -> Optional[Dict[str, Any]]:
+        """
+        Request one page of the items of a report job
+
+        Args:
+            print_job_id: ID of the report print job
+            page: Page number, starting at 0
+            page_size: Maximum number of items on the page
+            timeout: Seconds to wait for the server to answer
+
+        Returns:
+            Page with 'items', 'nextPage' and optionally 'error', or None if the
+            server did not answer
+        """
+        try:
+            return self.sio.call(
+                'report-page',
+                {'printJobId': print_job_id, 'page': page, 'pageSize': page_size},
+                timeout=timeout
+            )
+        except (socketio.exceptions.TimeoutError, socketio.exceptions.BadNamespaceError) as e:
+            logger.warning(f'Report page {page} of job {print_job_id} not received: {e or "timeout"}')
+            return None
+
+    def _load_report_loop(self) -> None:
+        """Periodically send load reports while connected"""
+        while True:
+            self.sio.sleep(self.load_report_interval)
+            try:
+                self.emit_load_report()
+            except Exception as e:
+                logger.warning(f'Failed to send load report: {e}')
     
     def wait(self) -> None:
         """Wait for events (blocking)"""
@@ -0,0 +1,184 @@
+"""
+Stall watchdog for the print client
+Times event handlers and job stages and dumps all thread stacks when one of them hangs
+"""
+
+import functools
+import itertools
+import sys
+import threading
+import time
+import traceback
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+from log_pipeline import LogSampler
+
+logger = logging.getLogger('PrinterClient.StallWatchdog')
+
+
+class _ActiveStage:
+    """A stage that has been entered and not exited yet"""
+
+    __slots__ = ('name', 'job_id', 'thread_id', 'thread_name', 'started', 'stalled')
+
+    def __init__(self, name: str, job_id: Any):
+        self.name = name
+        self.job_id = job_id
+        current = threading.current_thread()
+        self.thread_id = current.ident
+        self.thread_name = current.name
+        self.started = time.monotonic()
+        self.stalled = False
+
+
+class StallWatchdog:
+    """Background thread that reports stages running longer than a threshold"""
+
+    def __init__(self, threshold: float = 5.0, dump_sampler: Optional[LogSampler] = None):
+        """
+        Initialize stall watchdog
+
+        Args:
+            threshold: Seconds after which a running stage counts as stalled
+            dump_sampler: Rate limiter for stack dumps (default: 3 per 5 minutes);
+                stalls over the limit are logged without stacks
+        """
+        self.threshold = threshold
+        self.dump_sampler = dump_sampler or LogSampler(max_per_interval=3, interval=300.0)
+        self._active: Dict[int, _ActiveStage] = {}
+        self._tokens = itertools.count()
+        # Per stage: [calls, total seconds, max seconds, stalls]
+        self._stats: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the watchdog thread"""
+        self._thread = threading.Thread(target=self._run, name='stall-watchdog', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the watchdog thread"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @contextmanager
+    def stage(self, name: str, job_id: Any = None) -> Iterator[None]:
+        """
+        Time a stage of work
+
+        Args:
+            name: Stage name ('event:print-job', 'job:send', ...)
+            job_id: Print job (or jobs) the stage works on, included in stall reports
+        """
+        token = next(self._tokens)
+        active = _ActiveStage(name, job_id)
+        with self._lock:
+            self._active[token] = active
+        try:
+            yield
+        finally:
+            duration = time.monotonic() - active.started
+            with self._lock:
+                del self._active[token]
+                stats = self._stats.setdefault(name, [0, 0.0, 0.0, 0])
+                stats[0] += 1
+                stats[1] += duration
+                stats[2] = max(stats[2], duration)
+                if active.stalled:
+                    stats[3] += 1
+            if active.stalled:
+                logger.warning('Stalled stage %s (job %s) finished after %.1fs', name, active.job_id, duration)
+
+    def watch(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """
+        Decorator timing every call of an event handler as a stage
+
+        The job id is taken from a 'printJobId' in the first argument, if any.
+
+        Args:
+            name: Stage name
+        """
+        def decorator(handler: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(handler)
+            def wrapper(*args, **kwargs):
+                data = args[0] if args else None
+                job_id = data.get('printJobId') if isinstance(data, dict) else None
+                with self.stage(name, job_id):
+                    return handler(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _run(self) -> None:
+        """Check the running stages a few times per threshold"""
+        interval = max(self.threshold / 4, 0.05)
+        while not self._stopped.wait(interval):
+            self.check()
+
+    def check(self) -> None:
+        """Report stages that crossed the threshold since the last check"""
+        now = time.monotonic()
+        with self._lock:
+            stalled = [
+                active for active in self._active.values()
+                if not active.stalled and now - active.started >= self.threshold
+            ]
+            for active in stalled:
+                active.stalled = True
+        for active in stalled:
+            self._report(active, now - active.started)
+
+    def _report(self, active: _ActiveStage, elapsed: float) -> None:
+        """Log a stall, with the stacks of all threads when the dump sampler allows it"""
+        summary = (
+            f'Stage {active.name} (job {active.job_id}) has been running for {elapsed:.1f}s '
+            f'on thread {active.thread_name}'
+        )
+        if not self.dump_sampler.allow():
+            logger.warning(summary)
+            return
+
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        lines = [summary]
+        for thread_id, frame in sys._current_frames().items():
+            marker = ' (stalled)' if thread_id == active.thread_id else ''
+            lines.append(f'--- Thread {names.get(thread_id, thread_id)}{marker} ---')
+            lines.append(''.join(traceback.format_stack(frame)).rstrip())
+        logger.warning('\n'.join(lines))
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get timing statistics per stage
+
+        Returns:
+            Dict per stage with calls, avg and max duration in seconds, and stalls
+        """
+        with self._lock:
+            return {
+                name: {
+                    'calls': int(calls),
+                    'avg': total / calls if calls else 0.0,
+                    'max': max_duration,
+                    'stalls': int(stalls),
+                }
+                for name, (calls, total, max_duration, stalls) in self._stats.items()
+            }
+
+    @property
+    def stall_count(self) -> int:
+        """Total number of stalls seen"""
+        with self._lock:
+            return sum(int(stats[3]) for stats in self._stats.values())
+
+    def log_stats(self) -> None:
+        """Log the timing of stages that stalled or came close"""
+        for name, stats in sorted(self.get_stats().items()):
+            if stats['stalls'] or stats['max'] >= self.threshold / 2:
+                logger.info(
+                    f'Stage {name}: {stats["calls"]} calls, avg {stats["avg"] * 1000:.0f}ms, '
+                    f'max {stats["max"]:.2f}s, {stats["stalls"]} stalls'
+                )
@@ -0,0 +1,361 @@
+"""
+Local stand-in for the Next.js printer Socket.IO endpoint
+Speaks the /api/printer-socketio protocol so the print client can be exercised without the web app
+
+Usage:
+    python standin_server.py [--host 127.0.0.1] [--port 3100]
+
+Then point a print client at it with SOCKETIO_URL=http://127.0.0.1:3100.
+Uses the Werkzeug development server when installed (websocket + polling),
+otherwise the standard library WSGI server (polling only).
+"""
+
+import argparse
+import itertools
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Any, Callable, Deque, List, Optional, Sequence
+
+import socketio
+
+# Werkzeug is optional, it adds websocket support to the threaded server
+try:
+    from werkzeug.serving import make_server as make_werkzeug_server
+    WERKZEUG_AVAILABLE = True
+except ImportError:
+    make_werkzeug_server = None
+    WERKZEUG_AVAILABLE = False
+
+logger = logging.getLogger('PrinterClient.StandInServer')
+
+SOCKETIO_PATH = 'api/printer-socketio'
+
+
+class StandInPrinter:
+    """Server-side state of one registered printer"""
+
+    def __init__(self, printer_id: int, printer_naam: str):
+        """
+        Initialize printer state
+
+        Args:
+            printer_id: ID assigned on first registration
+            printer_naam: Printer name sent by the client
+        """
+        self.printer_id = printer_id
+        self.printer_naam = printer_naam
+        self.sid: Optional[str] = None
+        # None means the client did not advertise a credit window (not limited)
+        self.credits: Optional[int] = None
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.outstanding = 0
+        self.load: Optional[Dict[str, Any]] = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether the printer client is connected and registered"""
+        return self.sid is not None
+
+    @property
+    def has_credit(self) -> bool:
+        """Whether the printer can accept another job right now"""
+        return self.credits is None or self.credits > 0
+
+
+class StandInServer:
+    """Socket.IO server mimicking the printer endpoint of the web app"""
+
+    def __init__(self, serializer: str = 'default'):
+        """
+        Initialize the stand-in server
+
+        Args:
+            serializer: Packet serializer: 'default' (JSON) or 'msgpack'
+        """
+        self.sio = socketio.Server(
+            async_mode='threading',
+            cors_allowed_origins='*',
+            serializer=serializer,
+            # The standard library server cannot hand the socket over for websockets
+            transports=None if WERKZEUG_AVAILABLE else ['polling']
+        )
+        self.app = socketio.WSGIApp(self.sio, socketio_path=SOCKETIO_PATH)
+        self.printers: Dict[str, StandInPrinter] = {}
+        self._by_sid: Dict[str, StandInPrinter] = {}
+        self._unassigned: Deque[Dict[str, Any]] = deque()
+        # time.monotonic() at which each unfinished job was created
+        self._created_at: Dict[int, float] = {}
+        # Items of each report job, served page by page on 'report-page'
+        self._reports: Dict[int, Sequence[Dict[str, Any]]] = {}
+        self._job_ids = itertools.count(1)
+        self._printer_ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+        # Called with (printer_naam, print_job_id, success, latency) when a printer reports an outcome;
+        # latency is the time in seconds from job creation to the printer's report
+        self.on_result: Optional[Callable[[str, int, bool, float], None]] = None
+
+        self._register_handlers()
+
+    def _register_handlers(self) -> None:
+        """Register Socket.IO event handlers"""
+
+        @self.sio.on('register-printer')
+        def on_register(sid: str, data: Dict[str, Any]):
+            printer_naam = (data or {}).get('printerNaam')
+            if not printer_naam:
+                self.sio.emit('error', {'message': 'Printer naam is verplicht'}, to=sid)
+                return
+            with self._lock:
+                printer = self.printers.get(printer_naam)
+                if printer is None:
+                    printer = StandInPrinter(next(self._printer_ids), printer_naam)
+                    self.printers[printer_naam] = printer
+                printer.sid = sid
+                credits = data.get('credits')
+                printer.credits = max(0, credits) if isinstance(credits, int) else None
+                self._by_sid[sid] = printer
+            self.sio.emit('printer-registered', {
+                'printerId': printer.printer_id,
+                'printerNaam': printer_naam,
+                'serverTime': datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+            }, to=sid)
+            logger.info(f'Printer registered: {printer_naam} (ID: {printer.printer_id}, credits: {printer.credits})')
+            self._dispatch()
+
+        @self.sio.on('printer-load')
+        def on_printer_load(sid: str, data: Dict[str, Any]):
+            with self._lock:
+                printer = self._by_sid.get(sid)
+                if printer is not None:
+                    printer.load = data
+
+        @self.sio.on('printer-credit')
+        def on_printer_credit(sid: str, data: Dict[str, Any]):
+            credits = (data or {}).get('credits')
+            with self._lock:
+                printer = self._by_sid.get(sid)
+                if printer is None or printer.credits is None or not isinstance(credits, int) or credits <= 0:
+                    return
+                printer.credits += credits
+            self._dispatch()
+
+        @self.sio.on('report-page')
+        def on_report_page(sid: str, data: Dict[str, Any]):
+            data = data or {}
+            with self._lock:
+                items = self._reports.get(data.get('printJobId'))
+            if items is None:
+                return {'items': [], 'nextPage': None, 'error': 'Geen rapport gevonden voor deze printjob'}
+            page = max(int(data.get('page') or 0), 0)
+            size = min(max(int(data.get('pageSize') or 50), 1), 200)
+            start = page * size
+            return {
+                'items': list(items[start:start + size]),
+                'nextPage': page + 1 if start + size < len(items) else None
+            }
+
+        @self.sio.on('print-completed')
+        def on_print_completed(sid: str, data: Dict[str, Any]):
+            self._finish(sid, (data or {}).get('printJobId'), 'completed')
+
+        @self.sio.on('print-failed')
+        def on_print_failed(sid: str, data: Dict[str, Any]):
+            data = data or {}
+            status = 'expired' if data.get('reason') == 'expired' else 'failed'
+            self._finish(sid, data.get('printJobId'), status, data.get('errorMessage'))
+
+        @self.sio.event
+        def disconnect(sid: str, *args):
+            with self._lock:
+                printer = self._by_sid.pop(sid, None)
+                if printer is not None and printer.sid == sid:
+                    printer.sid = None
+                    printer.outstanding = 0
+            if printer is not None:
+                logger.info(f'Printer disconnected: {printer.printer_naam}')
+
+    def _finish(self, sid: str, print_job_id: Any, status: str, error_message: Optional[str] = None) -> None:
+        """Acknowledge a print outcome and broadcast the status update"""
+        if not isinstance(print_job_id, int):
+            self.sio.emit('error', {'message': 'Print job ID is verplicht'}, to=sid)
+            return
+        with self._lock:
+            printer = self._by_sid.get(sid)
+            if printer is not None:
+                printer.outstanding = max(0, printer.outstanding - 1)
+            created_at = self._created_at.pop(print_job_id, None)
+            self._reports.pop(print_job_id, None)
+        self.sio.emit('print-ack', {'printJobId': print_job_id, 'status': status}, to=sid)
+        update = {'printJobId': print_job_id, 'status': status}
+        if error_message:
+            update['errorMessage'] = error_message
+        self.sio.emit('print-status-update', update)
+        if self.on_result is not None and printer is not None and created_at is not None:
+            self.on_result(printer.printer_naam, print_job_id, status == 'completed', time.monotonic() - created_at)
+        self._dispatch()
+
+    def submit_job(self, payload: Dict[str, Any]) -> int:
+        """
+        Create a print job and route it to the least-loaded printer with free credits
+
+        Args:
+            payload: 'print-job' payload without printJobId (createdAt defaults to now)
+
+        Returns:
+            Assigned print job ID
+        """
+        return self._submit(next(self._job_ids), payload)
+
+    def _submit(self, print_job_id: int, payload: Dict[str, Any]) -> int:
+        """Route a new print job with an assigned ID"""
+        job = dict(payload, printJobId=print_job_id)
+        job.setdefault('createdAt', datetime.now(timezone.utc).isoformat(timespec='milliseconds'))
+        with self._lock:
+            self._created_at[print_job_id] = time.monotonic()
+            connected = [printer for printer in self.printers.values() if printer.connected]
+            if connected:
+                # Prefer printers with credits, then the fewest outstanding jobs
+                target = min(connected, key=lambda p: (not p.has_credit, p.outstanding + len(p.pending)))
+                target.pending.append(job)
+            else:
+                self._unassigned.append(job)
+        self._dispatch()
+        return print_job_id
+
+    def submit_report(self, items: Sequence[Dict[str, Any]], titel: str = 'Stand-in') -> int:
+        """
+        Create an end-of-day report job whose items the client fetches page by page
+
+        Args:
+            items: Report items as served on 'report-page' (any sliceable sequence)
+            titel: Report heading
+
+        Returns:
+            Assigned print job ID
+        """
+        with self._lock:
+            # Reserve the id the job is about to get, so its first page cannot be asked for too early
+            print_job_id = next(self._job_ids)
+            self._reports[print_job_id] = items
+        return self._submit(print_job_id, {
+            'volgnummer': f'DAGRAPPORT-{print_job_id}',
+            'klantType': '',
+            'afdelingNaam': '',
+            'printData': {'type': 'report', 'cafedagId': 0, 'titel': titel},
+        })
+
+    def _dispatch(self) -> None:
+        """Send pending jobs as far as the printers' credits allow"""
+        to_send = []
+        with self._lock:
+            connected = [printer for printer in self.printers.values() if printer.connected]
+            while self._unassigned and connected:
+                target = min(connected, key=lambda p: p.outstanding + len(p.pending))
+                target.pending.append(self._unassigned.popleft())
+            for printer in connected:
+                while printer.pending and printer.has_credit:
+                    job = printer.pending.popleft()
+                    if printer.credits is not None:
+                        printer.credits -= 1
+                    printer.outstanding += 1
+                    to_send.append((printer.sid, job))
+        for sid, job in to_send:
+            self.sio.emit('print-job', job, to=sid)
+
+    def drop_printer(self, printer_naam: str) -> bool:
+        """
+        Drop a printer's connection as if the network failed (the client reconnects on its own)
+
+        Args:
+            printer_naam: Name of the printer to drop
+
+        Returns:
+            True if the printer was connected
+        """
+        with self._lock:
+            printer = self.printers.get(printer_naam)
+            sid = printer.sid if printer is not None else None
+        if sid is None:
+            return False
+        eio_sid = self.sio.manager.eio_sid_from_sid(sid, '/')
+        try:
+            # Close the transport without a CLOSE packet: a regular server disconnect
+            # tells the client not to reconnect
+            self.sio.eio._get_socket(eio_sid).close(wait=False, abort=True)
+        except KeyError:
+            return False
+        return True
+
+    def get_pending_count(self) -> int:
+        """Number of jobs not sent to any printer yet"""
+        with self._lock:
+            return len(self._unassigned) + sum(len(p.pending) for p in self.printers.values())
+
+    def start(self, host: str = '127.0.0.1', port: int = 3100) -> None:
+        """
+        Start serving in a background thread
+
+        Args:
+            host: Interface to listen on
+            port: TCP port to listen on
+        """
+        if WERKZEUG_AVAILABLE:
+            self._server = make_werkzeug_server(host, port, self.app, threaded=True)
+        else:
+            from socketserver import ThreadingMixIn
+            from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+
+            class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+                daemon_threads = True
+
+            class QuietHandler(WSGIRequestHandler):
+                def log_message(self, format, *args):
+                    pass
+
+            logger.warning('Werkzeug is not installed, the stand-in server only supports polling')
+            self._server = make_server(host, port, self.app, ThreadingWSGIServer, QuietHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='standin-server', daemon=True)
+        self._thread.start()
+        logger.info(f'Stand-in printer server listening on http://{host}:{port}/{SOCKETIO_PATH}')
+
+    def stop(self) -> None:
+        """Stop serving"""
+        if self._server is not None:
+            self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    @property
+    def connected_printers(self) -> List[str]:
+        """Names of the connected printers"""
+        with self._lock:
+            return [name for name, printer in self.printers.items() if printer.connected]
+
+
+def main() -> None:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Local stand-in for the printer Socket.IO endpoint')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on')
+    parser.add_argument('--port', type=int, default=3100, help='TCP port to listen on')
+    parser.add_argument('--serializer', choices=['default', 'msgpack'], default='default', help='Packet serializer')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = StandInServer(serializer=args.serializer)
+    server.start(args.host, args.port)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,9 @@
+"""
+Shared test setup
+The client modules are flat scripts next to this directory, so make them importable
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
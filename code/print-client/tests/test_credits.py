@@ -0,0 +1,157 @@
+"""
+Tests for the credit window between the print client and the server
+"""
+
+import socketio
+import pytest
+
+from load_report import LoadTracker
+from printer_base import BasePrinter
+from printer_client import PrintJobHandler
+from socket_client import SocketIOClient
+from ticket_formatter import TicketFormatter
+
+CAPACITY = 5
+
+
+class FakeSio:
+    """Stands in for the Socket.IO connection, recording emitted events"""
+
+    def __init__(self):
+        self.connected = True
+        self.failing = False
+        self.emitted = []
+
+    def emit(self, event, data=None):
+        if self.failing:
+            raise socketio.exceptions.BadNamespaceError('/ is not a connected namespace.')
+        self.emitted.append((event, data))
+
+    def credits(self):
+        return [data['credits'] for event, data in self.emitted if event == 'printer-credit']
+
+
+class IdlePrinter(BasePrinter):
+    """Printer that accepts everything"""
+
+    def send_raw_data(self, data):
+        pass
+
+    def test_connection(self):
+        return True
+
+    def get_connection_info(self):
+        return 'Idle'
+
+
+def make_handler(warm_up=False):
+    """Handler around a real SocketIOClient whose connection is faked, before registration"""
+    client = SocketIOClient('http://localhost:3000', 'Test', load_report_interval=0)
+    registered = client.sio.handlers['/']['printer-registered']
+    client.sio = FakeSio()
+    handler = PrintJobHandler(
+        client,
+        IdlePrinter(),
+        TicketFormatter(),
+        load_tracker=LoadTracker(capacity=CAPACITY),
+        warm_up=warm_up
+    )
+    return handler, client, registered
+
+
+def register(handler, registered):
+    """Connect and register: register-printer carries the initial window, then the server confirms"""
+    handler.get_initial_credits()
+    registered({'printerId': 7, 'printerNaam': 'Test'})
+
+
+def job(print_job_id):
+    return {
+        'printJobId': print_job_id,
+        'volgnummer': f'RC-2026-{print_job_id:04d}',
+        'klantType': 'Student',
+        'afdelingNaam': 'Elektro',
+    }
+
+
+def test_registration_offers_the_free_queue():
+    handler, client, _ = make_handler()
+
+    assert handler.get_initial_credits() == CAPACITY
+    handler.handle_print_job(job(1))
+    handler.handle_print_job(job(2))
+
+    assert handler._credits_granted == CAPACITY - 2
+
+
+def test_jobs_beyond_the_window_do_not_go_below_zero():
+    handler, client, _ = make_handler()
+
+    handler.handle_print_job(job(1))
+
+    assert handler._credits_granted == 0
+
+
+def test_credits_are_only_counted_once_the_server_received_them():
+    handler, client, registered = make_handler()
+    register(handler, registered)
+    handler.handle_print_job(job(1))
+    handler.handle_print_job(job(2))
+    handler.scheduler.get(timeout=0)
+    handler.scheduler.get(timeout=0)
+
+    # The connection dropped: the freed slots must not be counted as held by the server
+    client.sio.failing = True
+    handler._replenish_credits()
+    assert handler._credits_granted == CAPACITY - 2
+
+    client.sio.failing = False
+    handler._replenish_credits()
+    assert client.sio.credits() == [2]
+    assert handler._credits_granted == CAPACITY
+
+
+def test_nothing_is_counted_before_registration():
+    handler, client, _ = make_handler()
+
+    handler._replenish_credits()
+
+    assert client.sio.credits() == []
+    assert handler._credits_granted == 0
+
+
+def test_rejected_job_gives_its_credit_back():
+    handler, client, registered = make_handler()
+    register(handler, registered)
+
+    handler.handle_print_job({'printJobId': 'RC-2026-0001'})
+
+    assert any(event == 'print-failed' for event, _ in client.sio.emitted)
+    assert client.sio.credits() == [1]
+    assert handler._credits_granted == CAPACITY
+
+
+def test_window_is_offered_when_warm_up_ends_between_register_and_registered():
+    handler, client, registered = make_handler(warm_up=True)
+
+    # register-printer goes out while warming up
+    assert handler.get_initial_credits() == 0
+    handler._warm_up()
+    # Not registered yet, so the window could not be sent
+    assert client.sio.credits() == []
+
+    registered({'printerId': 7, 'printerNaam': 'Test'})
+
+    assert client.sio.credits() == [CAPACITY]
+    assert handler._credits_granted == CAPACITY
+
+
+def test_registration_after_warm_up_offers_nothing_twice():
+    handler, client, registered = make_handler(warm_up=True)
+    handler._warm_up()
+
+    assert handler.get_initial_credits() == CAPACITY
+    registered({'printerId': 7, 'printerNaam': 'Test'})
+
+    # The whole window went out with register-printer
+    assert client.sio.credits() == []
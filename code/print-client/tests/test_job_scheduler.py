@@ -0,0 +1,88 @@
+"""
+Tests for the priority job scheduler
+"""
+
+import threading
+import time
+
+from job_scheduler import PriorityJobScheduler, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+
+def test_higher_priority_is_handed_out_first():
+    scheduler = PriorityJobScheduler(aging_interval=60.0)
+    scheduler.put('report', PRIORITY_LOW)
+    scheduler.put('intake', PRIORITY_NORMAL)
+    scheduler.put('delivery', PRIORITY_HIGH)
+
+    assert [scheduler.get(timeout=0) for _ in range(3)] == ['delivery', 'intake', 'report']
+    assert scheduler.get(timeout=0) is None
+
+
+def test_same_priority_keeps_arrival_order():
+    scheduler = PriorityJobScheduler(aging_interval=60.0)
+    for job in ('a', 'b', 'c'):
+        scheduler.put(job, PRIORITY_NORMAL)
+
+    assert [scheduler.get(timeout=0) for _ in range(3)] == ['a', 'b', 'c']
+
+
+def test_waiting_job_is_promoted_by_aging():
+    scheduler = PriorityJobScheduler(aging_interval=0.05)
+    scheduler.put('report', PRIORITY_LOW)
+    # Three intervals promote the report past a fresh high priority job
+    time.sleep(0.15)
+    scheduler.put('delivery', PRIORITY_HIGH)
+
+    assert scheduler.get(timeout=0) == 'report'
+    assert scheduler.get(timeout=0) == 'delivery'
+
+
+def test_wait_stats_are_kept_per_priority():
+    scheduler = PriorityJobScheduler()
+    scheduler.put('delivery', PRIORITY_HIGH)
+    scheduler.put('intake', PRIORITY_NORMAL)
+    scheduler.get(timeout=0)
+
+    stats = scheduler.get_wait_stats()
+    assert stats['high']['jobs'] == 1
+    assert stats['normal']['jobs'] == 0
+    assert stats['normal']['queued'] == 1
+
+
+def test_held_queue_keeps_jobs_until_released():
+    scheduler = PriorityJobScheduler()
+    scheduler.hold()
+    scheduler.put('intake', PRIORITY_NORMAL)
+
+    assert scheduler.is_held
+    assert scheduler.get(timeout=0.05) is None
+    assert len(scheduler) == 1
+
+    scheduler.release()
+    assert scheduler.get(timeout=0) == 'intake'
+
+
+def test_release_wakes_a_waiting_worker():
+    scheduler = PriorityJobScheduler()
+    scheduler.hold()
+    scheduler.put('intake', PRIORITY_NORMAL)
+    taken = []
+    worker = threading.Thread(target=lambda: taken.append(scheduler.get(timeout=5)))
+    worker.start()
+
+    time.sleep(0.05)
+    assert taken == []
+    scheduler.release()
+    worker.join(timeout=5)
+    assert taken == ['intake']
+
+
+def test_close_wakes_a_waiting_worker():
+    scheduler = PriorityJobScheduler()
+    taken = []
+    worker = threading.Thread(target=lambda: taken.append(scheduler.get()))
+    worker.start()
+
+    scheduler.close()
+    worker.join(timeout=5)
+    assert taken == [None]
@@ -0,0 +1,141 @@
+"""
+Tests for batch progress reporting and resumable chunk streams
+"""
+
+import pytest
+
+from printer_base import BasePrinter, BatchSendError, ChunkStream, PrinterCommunicationError
+from retry_printer import CircuitBreaker, RetryingPrinter, RetryPolicy
+
+
+class BufferPrinter(BasePrinter):
+    """Printer that collects written bytes and fails on request"""
+
+    def __init__(self, fail_on=()):
+        """
+        Args:
+            fail_on: Numbers of send_buffers calls (starting at 1) that fail
+        """
+        self.fail_on = set(fail_on)
+        self.calls = 0
+        self.written = bytearray()
+
+    def send_raw_data(self, data):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise PrinterCommunicationError('write failed')
+        self.written += data
+
+    def test_connection(self):
+        return True
+
+    def get_connection_info(self):
+        return 'Buffer'
+
+
+class StreamPrinter(BasePrinter):
+    """Printer that pulls a batch like a real backend and breaks off after a number of bytes"""
+
+    def __init__(self, fail_after=()):
+        """
+        Args:
+            fail_after: Per send_batch call, the number of bytes written before the connection drops
+                (None writes everything)
+        """
+        self.fail_after = list(fail_after)
+        self.written = bytearray()
+
+    def send_raw_data(self, data):
+        self.send_batch(((data,),))
+
+    def send_batch(self, batch):
+        limit = self.fail_after.pop(0) if self.fail_after else None
+        completed = 0
+        offset = 0
+        for buffers in batch:
+            data = b''.join(buffers)
+            if limit is not None and offset + len(data) > limit:
+                # Part of the ticket reached the printer before the connection dropped
+                self.written += data[:limit - offset]
+                raise BatchSendError('connection reset', completed, offset)
+            self.written += data
+            completed += 1
+            offset += len(data)
+
+    def test_connection(self):
+        return True
+
+    def get_connection_info(self):
+        return 'Stream'
+
+
+def counted(chunks, pulls):
+    """Yield chunks, counting how often each one is produced"""
+    for chunk in chunks:
+        pulls.append(chunk)
+        yield chunk
+
+
+def test_batch_error_reports_tickets_and_bytes_before_the_failure():
+    printer = BufferPrinter(fail_on={3})
+
+    with pytest.raises(BatchSendError) as raised:
+        printer.send_batch([(b'one',), (b'tw', b'o'), (b'three',), (b'four',)])
+
+    assert raised.value.completed == 2
+    assert raised.value.offset == 6
+    assert bytes(printer.written) == b'onetwo'
+
+
+def test_batch_error_before_the_first_ticket():
+    printer = BufferPrinter(fail_on={1})
+
+    with pytest.raises(BatchSendError) as raised:
+        printer.send_batch([(b'one',), (b'two',)])
+
+    assert (raised.value.completed, raised.value.offset) == (0, 0)
+
+
+def test_stream_resumes_with_the_chunk_that_broke_off():
+    printer = StreamPrinter(fail_after=[5])
+    pulls = []
+    stream = ChunkStream(counted([b'aaa', b'bbb', b'ccc'], pulls))
+
+    with pytest.raises(BatchSendError):
+        stream.send(printer)
+    assert (stream.chunks_sent, stream.bytes_sent) == (1, 3)
+
+    stream.send(printer)
+
+    # 'bbb' is sent again in full, but produced only once
+    assert pulls == [b'aaa', b'bbb', b'ccc']
+    assert (stream.chunks_sent, stream.bytes_sent) == (3, 9)
+    assert bytes(printer.written) == b'aaabb' + b'bbbccc'
+
+
+def test_stream_failing_before_the_first_chunk_starts_from_the_beginning():
+    printer = StreamPrinter(fail_after=[0])
+    stream = ChunkStream([b'aaa', b'bbb'])
+
+    with pytest.raises(BatchSendError):
+        stream.send(printer)
+    stream.send(printer)
+
+    assert bytes(printer.written) == b'aaabbb'
+    assert stream.chunks_sent == 2
+
+
+def test_retrying_printer_sends_every_chunk_of_a_stream():
+    printer = RetryingPrinter(
+        StreamPrinter(fail_after=[4, 7]),
+        policy=RetryPolicy(max_attempts=3, base_delay=0.0, max_delay=0.0, jitter=0.0),
+        breaker=CircuitBreaker(failure_threshold=10),
+        hold_jobs=False
+    )
+    pulls = []
+
+    printer.send_stream(counted([b'aaa', b'bbb', b'ccc', b'ddd'], pulls))
+
+    assert pulls == [b'aaa', b'bbb', b'ccc', b'ddd']
+    # Each broken-off chunk is written again from its start
+    assert bytes(printer.printer.written) == b'aaab' + b'bbbccc' + b'd' + b'ddd'
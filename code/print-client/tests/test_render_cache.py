@@ -0,0 +1,90 @@
+"""
+Tests for the render cache of formatted tickets
+"""
+
+from print_job import PrintJob
+from printer_profile import PrinterProfile
+from render_cache import RenderCache, make_cache_key
+from ticket_formatter import TicketFormatter
+
+PAYLOAD = {
+    'printJobId': 1,
+    'volgnummer': 'RC-2026-0001',
+    'klantType': 'Student',
+    'afdelingNaam': 'Elektro',
+    'voorwerpBeschrijving': 'Broodrooster',
+    'klachtBeschrijving': 'Warmt niet op',
+}
+
+
+def test_hit_after_put():
+    cache = RenderCache()
+    assert cache.get('key') is None
+    cache.put('key', b'ticket')
+
+    assert cache.get('key') == b'ticket'
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['entries'], stats['bytes']) == (1, 1, 1, 6)
+
+
+def test_least_recently_used_ticket_is_evicted():
+    cache = RenderCache(max_bytes=10)
+    cache.put('a', b'aaaa')
+    cache.put('b', b'bbbb')
+    cache.get('a')
+    cache.put('c', b'cccc')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'aaaa'
+    assert cache.get('c') == b'cccc'
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_ticket_larger_than_the_budget_is_not_cached():
+    cache = RenderCache(max_bytes=4)
+    cache.put('a', b'12345')
+
+    assert len(cache) == 0
+
+
+def test_replacing_a_ticket_keeps_the_size_right():
+    cache = RenderCache()
+    cache.put('a', b'1234')
+    cache.put('a', b'12')
+
+    assert cache.get_stats()['bytes'] == 2
+
+
+def test_key_depends_on_configuration_and_content():
+    content = PrintJob.from_payload(PAYLOAD).content_key()
+    key = make_cache_key('encoding=cp1252', content)
+
+    assert key == make_cache_key('encoding=cp1252', content)
+    assert key != make_cache_key('encoding=cp437', content)
+    other = PrintJob.from_payload(dict(PAYLOAD, printJobId=2, volgnummer='RC-2026-0002')).content_key()
+    assert key != make_cache_key('encoding=cp1252', other)
+
+
+def test_reprint_is_served_from_the_cache():
+    cache = RenderCache()
+    formatter = TicketFormatter(render_cache=cache)
+    uncached = TicketFormatter().format_ticket(PrintJob.from_payload(PAYLOAD))
+
+    first = formatter.format_ticket(PrintJob.from_payload(PAYLOAD))
+    # Same ticket content under another job ID, like a reprint
+    second = formatter.format_ticket(PrintJob.from_payload(dict(PAYLOAD, printJobId=2)))
+
+    assert first == second == uncached
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_profile_change_renders_again():
+    cache = RenderCache()
+    formatter = TicketFormatter(render_cache=cache)
+    narrow = formatter.format_ticket(PrintJob.from_payload(PAYLOAD))
+
+    formatter.set_profile(PrinterProfile(model='TM-T20', columns=48))
+    wide = formatter.format_ticket(PrintJob.from_payload(PAYLOAD))
+
+    assert wide != narrow
+    assert (cache.hits, cache.misses) == (0, 2)
@@ -0,0 +1,181 @@
+"""
+Tests for the retry and circuit breaker layer
+"""
+
+import time
+
+import pytest
+
+from printer_base import BasePrinter, BatchSendError, PrinterCommunicationError
+from retry_printer import CircuitBreaker, CircuitOpenError, RetryingPrinter, RetryPolicy
+
+
+class ScriptedPrinter(BasePrinter):
+    """Printer whose sends fail or succeed in a scripted order"""
+
+    def __init__(self, failures=(), reachable=()):
+        """
+        Args:
+            failures: Exceptions raised by the next sends (None lets a send succeed)
+            reachable: Results of the next test_connection calls (True once exhausted)
+        """
+        self.failures = list(failures)
+        self.reachable = list(reachable)
+        self.batches = []
+
+    def send_raw_data(self, data):
+        self.send_batch(((data,),))
+
+    def send_batch(self, batch):
+        batch = list(batch)
+        self.batches.append(batch)
+        error = self.failures.pop(0) if self.failures else None
+        if error is not None:
+            raise error
+
+    def test_connection(self):
+        return self.reachable.pop(0) if self.reachable else True
+
+    def get_connection_info(self):
+        return 'Scripted'
+
+
+def no_wait_policy(max_attempts=3):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0.0, max_delay=0.0, jitter=0.0)
+
+
+def test_breaker_opens_after_threshold_and_closes_after_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+
+    assert breaker.record_failure() is False
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
+
+    time.sleep(0.06)
+    assert breaker.allow_request() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() is True
+
+
+def test_failed_trial_opens_the_circuit_again():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+
+    time.sleep(0.06)
+    assert breaker.allow_request() is True
+    # A single failure of the trial is enough, the threshold does not apply
+    assert breaker.record_failure() is True
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() is False
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.record_failure() is False
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_transient_failure_is_retried():
+    backend = ScriptedPrinter(failures=[PrinterCommunicationError('timeout')])
+    printer = RetryingPrinter(backend, policy=no_wait_policy(), hold_jobs=False)
+
+    printer.send_raw_data(b'ticket')
+
+    assert len(backend.batches) == 2
+    assert printer.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_resumes_with_the_ticket_that_failed():
+    backend = ScriptedPrinter(failures=[BatchSendError('reset', completed=1, offset=3)])
+    printer = RetryingPrinter(backend, policy=no_wait_policy(), hold_jobs=False)
+
+    printer.send_batch([(b'one',), (b'two',), (b'three',)])
+
+    assert backend.batches[1] == [(b'two',), (b'three',)]
+
+
+def test_exhausted_retries_report_progress_of_the_whole_batch():
+    backend = ScriptedPrinter(failures=[
+        BatchSendError('reset', completed=1, offset=3),
+        BatchSendError('reset', completed=1, offset=3),
+    ])
+    printer = RetryingPrinter(
+        backend,
+        policy=no_wait_policy(max_attempts=2),
+        breaker=CircuitBreaker(failure_threshold=10),
+        hold_jobs=False
+    )
+
+    with pytest.raises(BatchSendError) as raised:
+        printer.send_batch([(b'one',), (b'two',), (b'six',)])
+
+    assert raised.value.completed == 2
+    assert raised.value.offset == 6
+
+
+def test_open_circuit_fails_fast_without_holding():
+    backend = ScriptedPrinter(failures=[PrinterCommunicationError('down')])
+    printer = RetryingPrinter(
+        backend,
+        policy=no_wait_policy(),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0),
+        hold_jobs=False,
+        probe_interval=60.0
+    )
+
+    with pytest.raises(PrinterCommunicationError):
+        printer.send_raw_data(b'first')
+    assert not printer.is_available
+
+    with pytest.raises(CircuitOpenError):
+        printer.send_raw_data(b'second')
+    # The second job never reached the printer
+    assert len(backend.batches) == 1
+    printer.close()
+
+
+def test_held_job_prints_once_the_probe_sees_the_printer_again():
+    backend = ScriptedPrinter(failures=[PrinterCommunicationError('down')], reachable=[False])
+    printer = RetryingPrinter(
+        backend,
+        policy=no_wait_policy(),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0),
+        hold_jobs=True,
+        hold_timeout=5.0,
+        probe_interval=0.02
+    )
+
+    started = time.monotonic()
+    printer.send_raw_data(b'ticket')
+
+    # Held instead of failing, then sent after the second probe found the printer
+    assert time.monotonic() - started < 5.0
+    assert len(backend.batches) == 2
+    assert backend.reachable == []
+    assert printer.breaker.state == CircuitBreaker.CLOSED
+    printer.close()
+
+
+def test_held_job_fails_after_the_hold_timeout():
+    backend = ScriptedPrinter(failures=[PrinterCommunicationError('down')], reachable=[False] * 100)
+    printer = RetryingPrinter(
+        backend,
+        policy=no_wait_policy(),
+        breaker=CircuitBreaker(failure_threshold=1, reset_timeout=60.0),
+        hold_jobs=True,
+        hold_timeout=0.1,
+        probe_interval=0.02
+    )
+
+    with pytest.raises(CircuitOpenError):
+        printer.send_raw_data(b'ticket')
+    assert len(backend.batches) == 1
+    printer.close()
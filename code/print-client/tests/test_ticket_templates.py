@@ -0,0 +1,59 @@
+"""
+Tests that the template-rendered tickets print exactly like the hand-written layout they replaced
+
+The files in data/legacy_tickets/ were rendered from data/legacy_tickets.json
+by the TicketFormatter that built tickets in code, before templates.
+"""
+
+import json
+import os
+
+import pytest
+
+from escpos_emulator import EscPosEmulator, compare_streams
+from print_job import PrintJob
+from ticket_formatter import TicketFormatter
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+with open(os.path.join(DATA_DIR, 'legacy_tickets.json'), encoding='utf-8') as cases_file:
+    CASES = json.load(cases_file)
+
+
+def legacy_ticket(name):
+    with open(os.path.join(DATA_DIR, 'legacy_tickets', f'{name}.bin'), 'rb') as ticket_file:
+        return ticket_file.read()
+
+
+@pytest.fixture(scope='module')
+def formatter():
+    return TicketFormatter()
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_template_matches_legacy_bytes(formatter, name):
+    ticket = formatter.format_ticket(PrintJob.from_payload(CASES[name]))
+    expected = legacy_ticket(name)
+
+    if ticket != expected:
+        changed = compare_streams(expected, ticket)
+        pytest.fail(f'{name}: rendered bytes differ from the legacy layout ({changed} differing pixels)')
+
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_legacy_ticket_renders_in_the_emulator(name):
+    image = EscPosEmulator().render(legacy_ticket(name))
+
+    assert image.width == 512
+    # Black dots were printed
+    assert image.histogram()[0] > 0
+
+
+def test_emulator_finds_a_layout_change(formatter):
+    expected = legacy_ticket('delivery_materials')
+    payload = json.loads(json.dumps(CASES['delivery_materials']))
+    payload['printData']['totalPrice'] = 900
+
+    ticket = formatter.format_ticket(PrintJob.from_payload(payload))
+
+    assert compare_streams(expected, ticket) > 0
@@ -6,8 +6,16 @@ Handles ESC/POS command generation and ticket layout formatting
 import logging
 import qrcode
 from io import BytesIO
-from PIL import Image
-from typing import Dict, Any, Optional, List
+from PIL import Image, ImageOps
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, Optional, List, Union
+
+from print_job import PrintJob, Material, ReportItem
+from render_cache import RenderCache, make_cache_key
+from ticket_template import TemplateStore, FALLBACK_TEMPLATE
+from log_pipeline import LogSampler
+from printer_profile import PrinterProfile, DEFAULT_PROFILE
+from ticket_image import PhotoRenderer, iter_raster_bands, DEFAULT_BAND_ROWS
 
 logger = logging.getLogger('PrinterClient.TicketFormatter')
 
@@ -19,147 +27,253 @@ class TicketFormatter:
     ESC = b'\x1b'
     GS = b'\x1d'
     
-    def __init__(self, encoding: str = 'cp1252'):
+    def __init__(
+        self,
+        encoding: Optional[str] = None,
+        render_cache: Optional[RenderCache] = None,
+        template_dir: Optional[str] = None,
+        detail_sampler: Optional[LogSampler] = None,
+        profile: Optional[PrinterProfile] = None,
+        photo_renderer: Optional[PhotoRenderer] = None,
+        raster_band_rows: int = DEFAULT_BAND_ROWS
+    ):
         """
         Initialize ticket formatter
         
         Args:
-            encoding: Character encoding for the printer (default: cp1252 for Windows-1252)
+            encoding: Character encoding override (default: the code page of the printer profile)
+            render_cache: Optional cache of rendered tickets
+            template_dir: Directory with ticket templates (default: templates/ next to this module)
+            detail_sampler: Rate limiter for detailed job logging (default: log every job)
+            profile: Capabilities of the printer (default: safe choices for any printer)
+            photo_renderer: Loader for item photos, None leaves image elements empty
+            raster_band_rows: Maximum rows per raster image command, 0 sends images whole
         """
-        self.encoding = encoding
+        self._encoding_override = encoding
+        self.profile = profile or DEFAULT_PROFILE
+        self.encoding = encoding or self.profile.encoding
+        self.columns = self.profile.columns
+        self.render_cache = render_cache
+        self.detail_sampler = detail_sampler
+        self.photo_renderer = photo_renderer
+        self.raster_band_rows = max(0, raster_band_rows)
+        self.templates = TemplateStore(self, template_dir)
     
-    def format_ticket(
-        self,
-        volgnummer: str,
-        klant_type: str,
-        afdeling_naam: str,
-        voorwerp_beschrijving: Optional[str],
-        klacht_beschrijving: Optional[str],
-        print_data: Optional[Dict[str, Any]] = None
-    ) -> bytes:
+    @property
+    def config_key(self) -> str:
+        """Fingerprint of all settings that influence the rendered output"""
+        return (
+            f'encoding={self.encoding};templates={self.templates.version};'
+            f'bands={self.raster_band_rows};{self.profile.render_key}'
+        )
+    
+    def set_profile(self, profile: PrinterProfile) -> None:
+        """
+        Switch to the capabilities of the connected printer
+        
+        Args:
+            profile: Printer capability profile
+        """
+        changed = profile.render_key != self.profile.render_key
+        self.profile = profile
+        if not changed:
+            return
+        logger.info('Rendering for %s', profile)
+        self.encoding = self._encoding_override or profile.encoding
+        self.columns = profile.columns
+        # Templates bake the line width and encoding into their plans
+        self.templates.recompile()
+    
+    def format_ticket(self, job: PrintJob) -> bytes:
         """
         Format a complete ticket with ESC/POS commands
         
+        Identical tickets (reprints, reconnect resends, broadcasts) are served
+        from the render cache when one is configured.
+        
         Args:
-            volgnummer: Tracking number
-            klant_type: Customer type (Student/Externe)
-            afdeling_naam: Department name
-            voorwerp_beschrijving: Item description (optional)
-            klacht_beschrijving: Problem description (optional)
-            print_data: Additional print data (type, materials, prices, etc.)
+            job: Validated print job
             
         Returns:
             Raw bytes ready to send to printer
         """
-        is_delivery = print_data and print_data.get('type') == 'delivery'
+        if self.render_cache is None:
+            return self._render_ticket(job)
+        
+        key = make_cache_key(self.config_key, job.content_key())
+        ticket = self.render_cache.get(key)
+        if ticket is None:
+            ticket = self._render_ticket(job)
+            self.render_cache.put(key, ticket)
+        return ticket
+    
+    def format_copies(self, job: PrintJob) -> List[Union[bytes, memoryview]]:
+        """
+        Format all copies of a job for a single write
         
-        cmd = self._init_printer()
-        cmd += self._format_header(is_delivery)
-        cmd += self._format_separator()
-        cmd += self._format_ticket_details(volgnummer, klant_type, afdeling_naam, voorwerp_beschrijving, klacht_beschrijving, is_delivery, print_data)
+        The ticket body is rendered (or fetched from the cache) once and shared
+        by every copy; each copy only adds its own small label header. Every copy
+        ends with the template's cut. The result is a list of buffers so the
+        printer can write them back-to-back without copying the body.
         
-        if is_delivery:
-            cmd += self._format_materials_section(print_data)
+        Args:
+            job: Validated print job
+            
+        Returns:
+            Raw byte buffers for all copies, in output order
+        """
+        ticket = self.format_ticket(job)
+        if job.copies == 1 and not job.copy_labels:
+            return [ticket]
+        
+        # The label goes right after the printer init, which would reset its formatting
+        init = self._init_printer()
+        if ticket.startswith(init):
+            body = memoryview(ticket)[len(init):]
+        else:
+            init, body = b'', ticket
+        
+        buffers = []
+        for index in range(job.copies):
+            label = job.copy_labels[index] if index < len(job.copy_labels) else None
+            buffers.append(init + self._format_copy_label(label))
+            buffers.append(body)
+        return buffers
+    
+    def warm_up(self) -> int:
+        """
+        Render a sample ticket of every template, bypassing the render cache
+        
+        Loads the QR and imaging code and the encoder tables so the first real
+        ticket does not pay for them.
         
-        cmd += self._format_footer(volgnummer, is_delivery)
-        cmd += self._cut_paper()
+        Returns:
+            Number of templates rendered
+        """
+        names = self.templates.names
+        for name in names:
+            job = PrintJob(
+                print_job_id=0,
+                volgnummer='RC-0000-0000',
+                klant_type='Student',
+                afdeling_naam='Warm-up',
+                voorwerp_beschrijving='Warm-up',
+                klacht_beschrijving='Warm-up',
+                ticket_type=None if name == FALLBACK_TEMPLATE else name,
+                advies='Warm-up',
+                materials=(Material('Warm-up', 1, 100),),
+                total_price=100
+            )
+            self._render_ticket(job)
+        return len(names)
+    
+    def iter_report(self, job: PrintJob, items: Iterable[ReportItem], chunk_size: int = 4096) -> Iterator[bytes]:
+        """
+        Render an end-of-day report while its items arrive
         
+        Items are grouped per department in the order they come (the server sorts
+        them), with material lines, a subtotal per department, the number of items
+        per status and a grand total. Only the totals and the current chunk are
+        kept, so the report can be any length.
+        
+        Args:
+            job: Report print job
+            items: Report items sorted by department; when iteration ends with
+                an 'error' attribute set the report is marked incomplete
+            chunk_size: Bytes collected before a chunk is handed out
+            
+        Returns:
+            Iterator of ESC/POS chunks of about chunk_size bytes, ending with the cut
+        """
+        chunk = bytearray(self._init_printer())
+        chunk += self.ESC + b'a\x01'  # Center alignment
+        chunk += self.ESC + b'E\x01' + self.GS + b'!\x11'  # Bold, double size
+        chunk += b'DAGRAPPORT\n'
+        chunk += self.GS + b'!\x00' + self.ESC + b'E\x00'  # Normal
+        if job.report_title:
+            chunk += job.report_title.encode(self.encoding, errors='replace') + b'\n'
+        chunk += f'Afgedrukt {datetime.now():%d/%m/%Y %H:%M}'.encode(self.encoding) + b'\n'
+        chunk += self.ESC + b'a\x00'  # Left alignment
+        chunk += self._format_separator()
+        
+        # Columns follow the printer's line width: volgnummer + status, status + count
+        status_width = self.columns - 25
+        label_width = self.columns - 6
+        afdeling = None
+        afdeling_count = 0
+        afdeling_total = 0
+        count = 0
+        total = 0
+        statuses: Dict[str, int] = {}
+        for item in items:
+            if item.afdeling_naam != afdeling:
+                if afdeling is not None:
+                    chunk += self._format_report_subtotal(afdeling, afdeling_count, afdeling_total)
+                afdeling, afdeling_count, afdeling_total = item.afdeling_naam, 0, 0
+                chunk += self.ESC + b'E\x01' + (afdeling or '-').upper().encode(self.encoding, errors='replace') + b'\n' + self.ESC + b'E\x00'
+            
+            chunk += f'{item.volgnummer[:24]:<24} {item.status[:status_width]:>{status_width}}'.encode(self.encoding, errors='replace') + b'\n'
+            if item.voorwerp_beschrijving:
+                chunk += self._wrap_text(item.voorwerp_beschrijving, self.columns)
+            for naam, aantal, prijs in item.iter_materials():
+                chunk += self._format_material_line(naam, aantal, prijs)
+            
+            afdeling_count += 1
+            afdeling_total += item.total_price
+            count += 1
+            total += item.total_price
+            statuses[item.status] = statuses.get(item.status, 0) + 1
+            
+            if len(chunk) >= chunk_size:
+                yield bytes(chunk)
+                chunk.clear()
+        
+        if afdeling is not None:
+            chunk += self._format_report_subtotal(afdeling, afdeling_count, afdeling_total)
+        for status, status_count in sorted(statuses.items()):
+            chunk += f'{status[:label_width]:<{label_width}} {status_count:>5}'.encode(self.encoding, errors='replace') + b'\n'
+        chunk += self._format_separator('-', newline_after=False)
+        chunk += self.ESC + b'E\x01'
+        chunk += f'{"Voorwerpen":<{label_width}} {count:>5}'.encode(self.encoding) + b'\n'
+        chunk += self._format_total_line('TOTAAL', total)
+        chunk += self.ESC + b'E\x00'
+        
+        error = getattr(items, 'error', None)
+        if error:
+            chunk += b'\n' + self.ESC + b'a\x01' + self.ESC + b'E\x01'
+            chunk += b'RAPPORT ONVOLLEDIG\n' + self.ESC + b'E\x00'
+            chunk += self._wrap_text(error, self.columns) + self.ESC + b'a\x00'
+        
+        chunk += b'\n\n\n' + self._cut_paper()
+        yield bytes(chunk)
+    
+    def _format_report_subtotal(self, afdeling: str, count: int, total_cents: int) -> bytes:
+        """Format the closing lines of a department in a report"""
+        cmd = self._format_separator('-', newline_after=False)
+        cmd += self._format_total_line(f'{afdeling[:20]} ({count})', total_cents)
+        cmd += b'\n'
         return cmd
     
+    def _render_ticket(self, job: PrintJob) -> bytes:
+        """Render a complete ticket from its template without caching"""
+        return self.templates.get_plan(job.ticket_type).render(job)
+    
     def _init_printer(self) -> bytes:
         """Initialize printer and set encoding"""
         cmd = self.ESC + b'@'  # Initialize printer
-        cmd += self.ESC + b't\x10'  # Set character encoding to Windows-1252
-        return cmd
-    
-    def _format_header(self, is_delivery: bool = False) -> bytes:
-        """Format ticket header"""
-        cmd = self.ESC + b'a\x01'  # Center alignment
-        cmd += self.ESC + b'E\x01'  # Bold on
-        cmd += self.GS + b'!\x11'  # Double height
-        cmd += b'REPAIR CAFE\n'
-        cmd += self.GS + b'!\x00'  # Normal size
-        
-        if is_delivery:
-            cmd += b'AFLEVERINGSBON\n'
-        else:
-            cmd += b'VOLGTICKET\n'
-        
-        cmd += self.ESC + b'E\x00'  # Bold off
-        cmd += b'\n'
-        
+        cmd += self.ESC + b't' + bytes([self.profile.code_page])  # Character code table of the encoding
         return cmd
     
-    def _format_separator(self, char: str = '=', newline_before: bool = False, newline_after: bool = True) -> bytes:
-        """Format separator line"""
+    def _format_separator(self, char: str = '=', newline_before: bool = False, newline_after: bool = True, width: Optional[int] = None) -> bytes:
+        """Format separator line (default width: the printer's columns)"""
         cmd = b''
         if newline_before:
             cmd += b'\n'
-        cmd += char.encode(self.encoding) * 42 + b'\n'
+        cmd += char.encode(self.encoding) * (width or self.columns) + b'\n'
         if newline_after:
             cmd += b'\n'
         return cmd
     
-    def _format_ticket_details(
-        self,
-        volgnummer: str,
-        klant_type: str,
-        afdeling_naam: str,
-        voorwerp_beschrijving: Optional[str],
-        klacht_beschrijving: Optional[str],
-        is_delivery: bool = False,
-        print_data: Optional[Dict[str, Any]] = None
-    ) -> bytes:
-        """Format ticket details section"""
-        # Use center alignment - the text will be centered on the paper
-        cmd = self.ESC + b'a\x01'  # Center alignment
-        
-        # Format basic info lines
-        lines = [
-            f'{self.ESC.decode("latin1")}\x45\x01Volgnummer:{self.ESC.decode("latin1")}\x45\x00  {volgnummer}',
-            f'{self.ESC.decode("latin1")}\x45\x01Klanttype:{self.ESC.decode("latin1")}\x45\x00   {klant_type}',
-            f'{self.ESC.decode("latin1")}\x45\x01Afdeling:{self.ESC.decode("latin1")}\x45\x00    {afdeling_naam}'
-        ]
-
-        # Find the longest line to determine padding
-        max_len = max(len(line) for line in lines)
-        
-        # Print each line centered as a block
-        for line in lines:
-            cmd += line.ljust(max_len).encode(self.encoding, errors='replace') + b'\n'
-        
-        cmd += b'\n'
-        
-        cmd += self._format_separator()
-
-        # Add descriptions with wrapping for longer text
-        # Description fields get more space (up to 42 chars per line for better readability)
-        if voorwerp_beschrijving:
-            cmd += self.ESC + b'a\x00'  # Left alignment
-            cmd += self.ESC + b'E\x01'  # Bold on
-            cmd += b'Voorwerp:\n'
-            cmd += self.ESC + b'E\x00'  # Bold off
-            cmd += self._wrap_text(voorwerp_beschrijving, 42)
-            cmd += b'\n'
-        
-        # For delivery receipts, show advies instead of problem
-        if is_delivery and print_data and print_data.get('advies'):
-            cmd += self.ESC + b'E\x01'  # Bold on
-            cmd += b'Advies:\n'
-            cmd += self.ESC + b'E\x00'  # Bold off
-            cmd += self._wrap_text(print_data.get('advies'), 42)
-            cmd += self.ESC + b'a\x01'  # Center alignment
-            cmd += b'\n'
-        elif klacht_beschrijving:
-            cmd += self.ESC + b'E\x01'  # Bold on
-            cmd += b'Probleem:\n'
-            cmd += self.ESC + b'E\x00'  # Bold off
-            cmd += self._wrap_text(klacht_beschrijving, 42)
-            cmd += self.ESC + b'a\x01'  # Center alignment
-            cmd += b'\n'
-        
-        return cmd
-    
     def _wrap_text(self, text: str, width: int) -> bytes:
         """Wrap text to specified width for better readability"""
         words = text.split()
@@ -188,69 +302,40 @@ class TicketFormatter:
         
         return result
     
-    def _format_materials_section(self, print_data: Dict[str, Any]) -> bytes:
-        """Format materials and pricing section for delivery receipts"""
-        cmd = self._format_separator(newline_after=False)         
-        cmd += self.ESC + b'E\x01'  # Bold on
-        cmd += b'GEBRUIKTE MATERIALEN\n'
-        cmd += self.ESC + b'E\x00'  # Bold off
-        cmd += self._format_separator(newline_after=False)
-        
-        materials = print_data.get('materials') or []
-        if materials:
-            for material in materials:
-                naam = material.get('naam') or 'Unknown'
-                try:
-                    aantal = int(material.get('aantal') or 0)
-                except Exception:
-                    aantal = 0
-                try:
-                    prijs_cents = int(material.get('prijsPerStuk') or 0)
-                except Exception:
-                    prijs_cents = 0
-
-                # Material name, quantity and price on one line
-                # Keep within 32 chars to fit inside the separator
-                # Format cents as euros using integer arithmetic: 150 cents -> €1.50
-                euros = prijs_cents // 100
-                cents = prijs_cents % 100
-                line = f'{naam[:29]:<29} {aantal:>2}x €{euros:>3}.{cents:02d}'.encode(self.encoding, errors='replace')
-                cmd += line + b'\n'
-        else:
-            cmd += b'Geen materialen gebruikt\n'
-        
-        cmd += self._format_separator(char='-')         
-        # Totals
-        try:
-            total_price_cents = int(print_data.get('totalPrice') or 0)
-        except Exception:
-            total_price_cents = 0
-        cmd += self.ESC + b'E\x01'  # Bold on
-        # Format cents as euros using integer arithmetic: 150 cents -> €1.50
-        euros = total_price_cents // 100
-        cents = total_price_cents % 100
-        cmd += f'{"TOTAAL":<29} {"":>2}  €{euros:>3}.{cents:02d}\n'.encode(self.encoding, errors='replace')
-        cmd += self.ESC + b'E\x00'  # Bold off
-        cmd += b'\n'
-        
-        return cmd
+    def _format_price(self, cents: int) -> str:
+        """Format cents as euros using integer arithmetic: 150 cents -> €  1.50"""
+        euros = cents // 100
+        cents = cents % 100
+        return f'€{euros:>3}.{cents:02d}'
     
-    def _format_footer(self, volgnummer: str, is_delivery: bool = False) -> bytes:
-        """Format ticket footer"""
-        cmd = self._format_separator()
-        cmd += self.ESC + b'a\x01'  # Center alignment
-        
-        if is_delivery:
-            cmd += b'Bedankt!\n\n'
-        else:
-            # Print QR code for non-delivery tickets
-            cmd += self._generate_qr_code(volgnummer)
-            cmd += b'\n'
-        
+    def _format_material_line(self, naam: str, aantal: int, prijs_cents: int) -> bytes:
+        """Format a material line for delivery receipts"""
+        # Material name, quantity and price on one line, within the separator
+        name_width = self.columns - 13
+        line = f'{naam[:name_width]:<{name_width}} {aantal:>2}x {self._format_price(prijs_cents)}'
+        return line.encode(self.encoding, errors='replace') + b'\n'
+    
+    def _format_total_line(self, label: str, total_cents: int) -> bytes:
+        """Format a total line aligned with the material lines"""
+        line = f'{label:<{self.columns - 13}} {"":>2}  {self._format_price(total_cents)}'
+        return line.encode(self.encoding, errors='replace') + b'\n'
+    
+    def _format_copy_label(self, label: Optional[str]) -> bytes:
+        """Format the header identifying a copy (empty when the copy has no label)"""
+        if not label:
+            return b''
+        cmd = self.ESC + b'a\x01'  # Center alignment
+        cmd += self.ESC + b'E\x01' + self.GS + b'!\x11'  # Bold, double size
+        cmd += label.encode(self.encoding, errors='replace') + b'\n'
+        cmd += self.GS + b'!\x00' + self.ESC + b'E\x00'  # Normal
+        cmd += b'\n'
         return cmd
     
     def _generate_qr_code(self, data: str) -> bytes:
-        """Generate QR code image commands for ESC/POS printer"""
+        """Generate QR code commands, rendered by the printer itself when it can"""
+        if self.profile.native_qr:
+            return self._native_qr_code(data)
+        
         # Create QR code
         qr = qrcode.QRCode(
             version=1,
@@ -267,8 +352,8 @@ class TicketFormatter:
         # Convert to monochrome bitmap
         img = img.convert('1')  # Convert to 1-bit pixels
         
-        # Resize to appropriate width (max ~384 pixels for thermal printers)
-        max_width = 384
+        # Resize to fit the printable width
+        max_width = self.profile.dots_per_line
         if img.width > max_width:
             ratio = max_width / img.width
             new_height = int(img.height * ratio)
@@ -278,80 +363,94 @@ class TicketFormatter:
         cmd = self._image_to_escpos(img)
         return cmd
     
-    def _image_to_escpos(self, img: Image.Image) -> bytes:
-        """Convert PIL Image to ESC/POS raster bit image command"""
-        # Ensure image is in mode '1' (1-bit pixels)
-        img = img.convert('1')
-        
-        width, height = img.size
+    def _native_qr_code(self, data: str) -> bytes:
+        """Generate GS ( k commands that let the printer render the QR code"""
+        payload = data.encode(self.encoding, errors='replace')
+        store_length = len(payload) + 3
         
-        # Calculate byte width (width rounded up to nearest multiple of 8)
-        byte_width = (width + 7) // 8
-        
-        # Start with center alignment
         cmd = self.ESC + b'a\x01'  # Center alignment
+        cmd += self.GS + b'(k\x04\x001A2\x00'  # Model 2
+        cmd += self.GS + b'(k\x03\x001C\x06'  # Module size 6 dots, as the raster version
+        cmd += self.GS + b'(k\x03\x001E1'  # Error correction level M
+        cmd += self.GS + b'(k' + bytes([store_length & 0xFF, store_length >> 8]) + b'1P0' + payload  # Store data
+        cmd += self.GS + b'(k\x03\x001Q0'  # Print
+        return cmd
+    
+    def _generate_photo(self, source: Optional[str], width: int, max_height: int, method: str) -> bytes:
+        """Generate a centered, dithered thumbnail of an item photo (empty if it cannot be loaded)"""
+        if not source or self.photo_renderer is None:
+            return b''
+        raster = self.photo_renderer.render(
+            source, min(width, self.profile.dots_per_line), max_height, method, self.raster_band_rows
+        )
+        if not raster:
+            return b''
+        return self.ESC + b'a\x01' + raster + b'\n'
+    
+    def _image_to_escpos(self, img: Image.Image) -> bytes:
+        """Convert PIL Image to ESC/POS raster bit image commands"""
+        return b''.join(self.iter_image_escpos(img))
+    
+    def iter_image_escpos(self, img: Image.Image) -> Iterator[bytes]:
+        """
+        Convert a PIL Image to centered ESC/POS raster commands, one band of rows at a time
         
-        # Use GS v 0 command for raster bit image
-        # GS v 0 m xL xH yL yH d1...dk
-        cmd += self.GS + b'v0'
-        cmd += b'\x00'  # Normal mode (m = 0)
-        cmd += bytes([byte_width & 0xFF, (byte_width >> 8) & 0xFF])  # xL, xH
-        cmd += bytes([height & 0xFF, (height >> 8) & 0xFF])  # yL, yH
-        
-        # Convert image pixels to bytes
-        pixels = img.load()
-        for y in range(height):
-            line_data = []
-            for x in range(0, width, 8):
-                byte_val = 0
-                for bit in range(8):
-                    if x + bit < width:
-                        # If pixel is black (0), set bit to 1
-                        if pixels[x + bit, y] == 0:
-                            byte_val |= (1 << (7 - bit))
-                line_data.append(byte_val)
-            cmd += bytes(line_data)
+        Printers hold a whole GS v 0 command in their buffer before printing it;
+        bands of raster_band_rows rows keep that buffer small and let printing
+        start on the first band. Bands are packed only when they are consumed.
         
-        return cmd
+        Args:
+            img: Image with black pixels for the dots to burn
+            
+        Returns:
+            Iterator of commands: the alignment, then one GS v 0 command per band
+        """
+        # Black pixels become set bits (dots to burn), packed by PIL rather than per pixel
+        ink = ImageOps.invert(img.convert('L')).convert('1', dither=Image.Dither.NONE)
+        
+        yield self.ESC + b'a\x01'  # Center alignment
+        yield from iter_raster_bands(ink, self.raster_band_rows)
     
     def _cut_paper(self) -> bytes:
         """Cut paper command"""
         return self.GS + b'V\x41\x03'
     
-    def log_print_data(self, print_job_id: int, data: Dict[str, Any]) -> None:
+    def log_print_data(self, job: PrintJob) -> None:
         """
         Log print job data in a formatted way
         
+        Detailed output is written as a single record and rate limited by the
+        detail sampler; jobs over the limit get a one-line summary at debug level.
+        
         Args:
-            print_job_id: ID of the print job
-            data: Print job data
+            job: Validated print job
         """
-        volgnummer = data.get('volgnummer')
-        klant_type = data.get('klantType')
-        afdeling_naam = data.get('afdelingNaam')
-        voorwerp_beschrijving = data.get('voorwerpBeschrijving')
-        klacht_beschrijving = data.get('klachtBeschrijving')
-        print_data = data.get('printData')
-        
-        logger.info('='*60)
-        logger.info(f'PRINT JOB #{print_job_id}')
-        logger.info('-'*60)
-        logger.info(f'Volgnummer:    {volgnummer}')
-        logger.info(f'Klanttype:     {klant_type}')
-        logger.info(f'Afdeling:      {afdeling_naam}')
-        logger.info(f'Voorwerp:      {voorwerp_beschrijving or "N/A"}')
-        logger.info(f'Probleem:      {klacht_beschrijving or "N/A"}')
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        if self.detail_sampler is not None and not self.detail_sampler.allow():
+            logger.debug('Print job #%s: %s (%s)', job.print_job_id, job.volgnummer, job.ticket_type or 'intake')
+            return
+        
+        lines = [
+            '='*60,
+            f'PRINT JOB #{job.print_job_id}',
+            '-'*60,
+            f'Volgnummer:    {job.volgnummer}',
+            f'Klanttype:     {job.klant_type}',
+            f'Afdeling:      {job.afdeling_naam}',
+            f'Voorwerp:      {job.voorwerp_beschrijving or "N/A"}',
+            f'Probleem:      {job.klacht_beschrijving or "N/A"}',
+        ]
         
         # Log print data if available
-        if print_data:
-            logger.info(f'Type:          {print_data.get("type", "standard")}')
-            if print_data.get('materials'):
-                logger.info(f'Materials:     {len(print_data["materials"])} items')
-            if print_data.get('totalPrice') is not None:
-                try:
-                    total = int(print_data.get('totalPrice'))
-                    logger.info(f'Total:         €{(total / 100):.2f}')
-                except Exception:
-                    logger.info(f'Total:         {print_data.get("totalPrice")}')
-        
-        logger.info('='*60)
+        if job.ticket_type:
+            lines.append(f'Type:          {job.ticket_type}')
+        if job.material_count:
+            lines.append(f'Materials:     {job.material_count} items')
+        if job.total_price is not None:
+            lines.append(f'Total:         €{(job.total_price / 100):.2f}')
+        if job.copies > 1:
+            lines.append(f'Copies:        {job.copies}')
+        
+        lines.append('='*60)
+        logger.info('\n'.join(lines))
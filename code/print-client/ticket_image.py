@@ -0,0 +1,346 @@
+"""
+Item photo thumbnails for tickets
+Scales and dithers photos to the printer width in Pillow's C routines and caches the raster by source hash
+"""
+
+import base64
+import binascii
+import functools
+import hashlib
+import threading
+import time
+import logging
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Any, Iterator, Optional, Tuple
+from urllib.parse import urljoin, unquote_to_bytes
+
+import requests
+from PIL import Image, ImageChops, ImageOps
+
+logger = logging.getLogger('PrinterClient.TicketImage')
+
+DITHER_FLOYD_STEINBERG = 'floyd-steinberg'
+DITHER_ORDERED = 'ordered'
+DITHER_METHODS = (DITHER_FLOYD_STEINBERG, DITHER_ORDERED)
+
+# Rows per GS v 0 command: printers buffer a whole raster command before printing it,
+# so tall images are sent as bands (0 sends every image as one command)
+DEFAULT_BAND_ROWS = 256
+
+# Same limit as the upload endpoint of the web app
+MAX_PHOTO_BYTES = 5 * 1024 * 1024
+
+# Seconds before a photo that could not be loaded is tried again, doubled on every
+# further failure up to the maximum, so an unreachable host does not stall each ticket
+FAILURE_RETRY_AFTER = 30.0
+MAX_FAILURE_RETRY_AFTER = 600.0
+
+# 8x8 Bayer matrix for ordered dithering
+BAYER_8 = (
+    (0, 32, 8, 40, 2, 34, 10, 42),
+    (48, 16, 56, 24, 50, 18, 58, 26),
+    (12, 44, 4, 36, 14, 46, 6, 38),
+    (60, 28, 52, 20, 62, 30, 54, 22),
+    (3, 35, 11, 43, 1, 33, 9, 41),
+    (51, 19, 59, 27, 49, 17, 57, 25),
+    (15, 47, 7, 39, 13, 45, 5, 37),
+    (63, 31, 55, 23, 61, 29, 53, 21),
+)
+
+# Ink where the pixel is darker than the threshold (used with Image.point)
+_INK_TABLE = [0] + [255] * 255
+
+
+@functools.lru_cache(maxsize=8)
+def _threshold_map(width: int, height: int) -> Image.Image:
+    """Bayer thresholds tiled over an image of the given size"""
+    rows = [
+        bytes(int((BAYER_8[y][x % 8] + 0.5) * 4) for x in range(width))
+        for y in range(8)
+    ]
+    return Image.frombytes('L', (width, height), b''.join(rows[y % 8] for y in range(height)))
+
+
+def dither(gray: Image.Image, method: str = DITHER_FLOYD_STEINBERG) -> Image.Image:
+    """
+    Reduce a grayscale image to printer dots
+
+    Args:
+        gray: Image in mode 'L'
+        method: DITHER_FLOYD_STEINBERG (error diffusion, best for photos) or
+            DITHER_ORDERED (Bayer pattern, cheaper and steadier on thermal paper)
+
+    Returns:
+        Image in mode '1' with a set bit for every dot to burn
+    """
+    if method == DITHER_ORDERED:
+        # Threshold minus gray is non-zero exactly where the pixel gets ink
+        return ImageChops.subtract(_threshold_map(*gray.size), gray).point(_INK_TABLE, '1')
+    if method != DITHER_FLOYD_STEINBERG:
+        raise ValueError(f'Unknown dither method {method!r}, expected one of {DITHER_METHODS}')
+    # Diffuse the inverted image so the set bits are the dark pixels
+    return ImageOps.invert(gray).convert('1', dither=Image.Dither.FLOYDSTEINBERG)
+
+
+def iter_raster_bands(ink: Image.Image, band_rows: int = DEFAULT_BAND_ROWS) -> Iterator[bytes]:
+    """
+    Build GS v 0 raster bit image commands for an image, one per band of rows
+
+    Each band is cropped and packed only when the iterator reaches it, and the
+    printer can start burning a band while the next one is on its way.
+
+    Args:
+        ink: Image in mode '1' with a set bit for every dot to burn
+        band_rows: Maximum rows per command, 0 for a single command
+
+    Returns:
+        Iterator of raster commands with the rows packed 8 dots per byte (MSB first)
+    """
+    width, height = ink.size
+    byte_width = (width + 7) // 8
+    rows = band_rows if band_rows > 0 else height
+    for top in range(0, height, rows):
+        band = ink if rows >= height else ink.crop((0, top, width, min(top + rows, height)))
+        # Mode '1' data is already packed MSB first with each row padded to a whole byte
+        yield (
+            b'\x1dv0\x00'
+            + bytes([byte_width & 0xFF, (byte_width >> 8) & 0xFF, band.height & 0xFF, (band.height >> 8) & 0xFF])
+            + band.tobytes()
+        )
+
+
+def pack_raster(ink: Image.Image, band_rows: int = 0) -> bytes:
+    """
+    Build the GS v 0 raster bit image commands for an image
+
+    Args:
+        ink: Image in mode '1' with a set bit for every dot to burn
+        band_rows: Maximum rows per command, 0 for a single command
+
+    Returns:
+        Raster commands, one per band
+    """
+    return b''.join(iter_raster_bands(ink, band_rows))
+
+
+def thumbnail(
+    data: bytes,
+    width: int,
+    max_height: int,
+    method: str = DITHER_FLOYD_STEINBERG,
+    band_rows: int = 0
+) -> bytes:
+    """
+    Turn an encoded photo into a raster command of at most width x max_height dots
+
+    Args:
+        data: Encoded image (JPEG, PNG, ...)
+        width: Maximum width in dots
+        max_height: Maximum height in dots
+        method: Dither method
+        band_rows: Maximum rows per raster command, 0 for a single command
+
+    Returns:
+        GS v 0 raster commands
+    """
+    img = Image.open(BytesIO(data))
+    # Let the JPEG decoder scale down while decoding, much cheaper than resizing the full photo
+    img.draft('L', (width, max_height))
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info:
+        # Transparent areas print as paper, not as black
+        img = img.convert('RGBA')
+        background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+        img = Image.alpha_composite(background, img)
+    gray = img.convert('L')
+    gray.thumbnail((width, max_height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    # Thermal dots cannot show subtle tones, stretch the histogram before dithering
+    gray = ImageOps.autocontrast(gray, cutoff=1)
+    return pack_raster(dither(gray, method), band_rows)
+
+
+class PhotoRenderer:
+    """Loads item photos and caches their rendered thumbnails by source hash"""
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        max_entries: int = 64,
+        fetch_timeout: float = 3.0,
+        ssl_verify: bool = True
+    ):
+        """
+        Initialize photo renderer
+
+        Args:
+            base_url: Web app URL that relative photo paths (/uploads/...) are resolved against
+            max_entries: Maximum number of rendered thumbnails kept
+            fetch_timeout: Timeout in seconds for downloading a photo
+            ssl_verify: Verify SSL certificates when downloading
+        """
+        self.base_url = base_url
+        self.max_entries = max(1, max_entries)
+        self.fetch_timeout = fetch_timeout
+        self.ssl_verify = ssl_verify
+        # Hash of the photo source -> hash of its bytes, so known sources are not downloaded again
+        # (sources are hashed because data: URIs carry the whole photo)
+        self._digests: 'OrderedDict[bytes, str]' = OrderedDict()
+        # Hash of a photo source that failed -> (monotonic time to try again, current delay)
+        self._failed: 'OrderedDict[bytes, Tuple[float, float]]' = OrderedDict()
+        # (hash, width, max_height, method, band_rows) -> raster commands
+        self._rendered: 'OrderedDict[tuple, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self.skipped = 0
+
+    def render(
+        self,
+        source: str,
+        width: int,
+        max_height: int,
+        method: str = DITHER_FLOYD_STEINBERG,
+        band_rows: int = 0
+    ) -> bytes:
+        """
+        Get the raster command of a photo
+
+        Args:
+            source: Photo URL, path relative to the web app, or data: URI
+            width: Maximum width in dots
+            max_height: Maximum height in dots
+            method: Dither method
+            band_rows: Maximum rows per raster command, 0 for a single command
+
+        Returns:
+            GS v 0 raster commands, or b'' if the photo cannot be loaded or failed recently
+        """
+        source_key = hashlib.sha256(source.encode()).digest()
+        with self._lock:
+            digest = self._digests.get(source_key)
+            if digest is not None:
+                raster = self._lookup((digest, width, max_height, method, band_rows))
+                if raster is not None:
+                    return raster
+            failed = self._failed.get(source_key)
+            if failed is not None and time.monotonic() < failed[0]:
+                self.skipped += 1
+                return b''
+
+        data = self._load(source)
+        if data is None:
+            self._failure(source_key)
+            return b''
+        digest = hashlib.sha256(data).hexdigest()
+        key = (digest, width, max_height, method, band_rows)
+
+        with self._lock:
+            self._failed.pop(source_key, None)
+            self._remember(self._digests, source_key, digest)
+            # The same photo can arrive under another URL or as a data: URI
+            raster = self._lookup(key)
+        if raster is not None:
+            return raster
+
+        try:
+            raster = thumbnail(data, width, max_height, method, band_rows)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning('Cannot render photo %s: %s', self._describe(source), e)
+            self._failure(source_key)
+            return b''
+        with self._lock:
+            self.misses += 1
+            self._remember(self._rendered, key, raster)
+        return raster
+
+    def _failure(self, source_key: bytes) -> None:
+        """Count a photo that could not be loaded and back off before trying its source again"""
+        with self._lock:
+            self.failures += 1
+            failed = self._failed.get(source_key)
+            delay = FAILURE_RETRY_AFTER if failed is None else min(failed[1] * 2, MAX_FAILURE_RETRY_AFTER)
+            self._remember(self._failed, source_key, (time.monotonic() + delay, delay))
+
+    def _lookup(self, key: tuple) -> Optional[bytes]:
+        """Get a rendered thumbnail and count the hit (caller must hold the lock)"""
+        raster = self._rendered.get(key)
+        if raster is not None:
+            self._rendered.move_to_end(key)
+            self.hits += 1
+        return raster
+
+    def _remember(self, entries: 'OrderedDict', key: Any, value: Any) -> None:
+        """Store an entry, dropping the least recently used ones (caller must hold the lock)"""
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _load(self, source: str) -> Optional[bytes]:
+        """Read the photo bytes from a data: URI or download them"""
+        if source.startswith('data:'):
+            header, _, payload = source.partition(',')
+            try:
+                data = base64.b64decode(payload, validate=True) if header.endswith(';base64') else unquote_to_bytes(payload)
+            except (binascii.Error, ValueError) as e:
+                logger.warning('Invalid photo data URI: %s', e)
+                return None
+            return data if len(data) <= MAX_PHOTO_BYTES else None
+
+        url = urljoin(self.base_url, source) if self.base_url else source
+        try:
+            with self._session.get(url, timeout=self.fetch_timeout, verify=self.ssl_verify, stream=True) as response:
+                response.raise_for_status()
+                data = response.raw.read(MAX_PHOTO_BYTES + 1, decode_content=True)
+        except (requests.RequestException, OSError) as e:
+            logger.warning('Cannot download photo %s: %s', url, e)
+            return None
+        if len(data) > MAX_PHOTO_BYTES:
+            logger.warning('Photo %s is larger than %dMB, skipping it', url, MAX_PHOTO_BYTES // (1024 * 1024))
+            return None
+        return data
+
+    @staticmethod
+    def _describe(source: str) -> str:
+        """Short description of a photo source for log messages"""
+        return 'data: URI' if source.startswith('data:') else source
+
+    def clear(self) -> None:
+        """Drop all cached thumbnails, failed sources and ordered dither maps"""
+        with self._lock:
+            self._digests.clear()
+            self._failed.clear()
+            self._rendered.clear()
+        _threshold_map.cache_clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict with hits, misses, failures, photos skipped after a failure, cached entries
+            and their size in bytes
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+                'skipped': self.skipped,
+                'entries': len(self._rendered),
+                'bytes': sum(len(raster) for raster in self._rendered.values()),
+            }
+
+    def log_stats(self) -> None:
+        """Log cache statistics"""
+        stats = self.get_stats()
+        lookups = stats['hits'] + stats['misses']
+        if lookups or stats['failures']:
+            logger.info(
+                f'Photo cache: {stats["hits"]}/{lookups} hits, {stats["failures"]} failures '
+                f'({stats["skipped"]} skipped), '
+                f'{stats["entries"]} entries ({stats["bytes"] / 1024:.1f} kB)'
+            )
@@ -0,0 +1,357 @@
+"""
+Declarative ticket templates
+Compiles JSON (or YAML) ticket layouts once into flat render plans of byte chunks and field slots
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Dict, Any, Optional, List, Callable, Union, TYPE_CHECKING
+
+from print_job import PrintJob
+from ticket_image import DITHER_METHODS, DITHER_FLOYD_STEINBERG
+
+# YAML templates are optional
+try:
+    import yaml
+    YAML_AVAILABLE = True
+except ImportError:
+    yaml = None
+    YAML_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from ticket_formatter import TicketFormatter
+
+logger = logging.getLogger('PrinterClient.TicketTemplate')
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Template used for ticket types without a template of their own
+FALLBACK_TEMPLATE = 'intake'
+
+ALIGNMENTS = {'left': b'\x00', 'center': b'\x01', 'right': b'\x02'}
+SIZES = {'normal': b'\x00', 'double_width': b'\x10', 'double_height': b'\x01', 'double': b'\x11'}
+
+# Fields a template may bind to
+FIELDS = frozenset(PrintJob.__slots__) - {
+    'material_names', 'material_quantities', 'material_prices', 'copy_labels',
+    'received_at', 'created_at'
+}
+
+# A plan step is either a precomputed byte chunk or a slot rendering per-ticket bytes
+PlanStep = Union[bytes, Callable[[PrintJob], bytes]]
+
+
+class TemplateError(ValueError):
+    """Exception raised when a ticket template is invalid"""
+    pass
+
+
+class RenderPlan:
+    """Compiled ticket template: precomputed byte chunks interleaved with field slots"""
+
+    def __init__(self, name: str, steps: List[PlanStep]):
+        """
+        Initialize render plan
+
+        Args:
+            name: Template name
+            steps: Byte chunks and slots in output order
+        """
+        self.name = name
+        self.steps = steps
+
+    def render(self, job: PrintJob) -> bytes:
+        """
+        Render a ticket for a job
+
+        Args:
+            job: Validated print job
+
+        Returns:
+            Raw ESC/POS bytes
+        """
+        return b''.join([step if step.__class__ is bytes else step(job) for step in self.steps])
+
+
+class TemplateCompiler:
+    """Compiles template specs into render plans using a formatter's ESC/POS helpers"""
+
+    def __init__(self, formatter: 'TicketFormatter'):
+        """
+        Initialize template compiler
+
+        Args:
+            formatter: Ticket formatter providing encoding and ESC/POS helpers
+        """
+        self.formatter = formatter
+
+    def compile(self, name: str, spec: Dict[str, Any]) -> RenderPlan:
+        """
+        Compile a template spec
+
+        Args:
+            name: Template name
+            spec: Parsed template ({'width': int, 'elements': [...]}); the width
+                defaults to the columns of the formatter's printer profile
+
+        Returns:
+            Compiled render plan
+
+        Raises:
+            TemplateError: If the template is invalid
+        """
+        if not isinstance(spec, dict) or not isinstance(spec.get('elements'), list):
+            raise TemplateError(f'Template {name!r} must be an object with an "elements" list')
+        width = spec.get('width', self.formatter.columns)
+        return RenderPlan(name, self._compile_elements(spec['elements'], width))
+
+    def _compile_elements(self, elements: List[Dict[str, Any]], width: int) -> List[PlanStep]:
+        """Compile a list of elements, merging adjacent static chunks"""
+        steps: List[PlanStep] = []
+        for element in elements:
+            for step in self._compile_element(element, width):
+                if isinstance(step, bytes) and steps and isinstance(steps[-1], bytes):
+                    steps[-1] += step
+                else:
+                    steps.append(step)
+        return steps
+
+    def _compile_element(self, element: Dict[str, Any], width: int) -> List[PlanStep]:
+        """Compile a single element into plan steps"""
+        if not isinstance(element, dict) or 'type' not in element:
+            raise TemplateError(f'Template element must be an object with a "type": {element!r}')
+
+        f = self.formatter
+        kind = element['type']
+        newline = b'\n' if element.get('newline', True) else b''
+
+        if kind == 'init':
+            return [f._init_printer()]
+        if kind == 'cut':
+            return [f._cut_paper()]
+        if kind == 'align':
+            return [f.ESC + b'a' + self._choice(element, ALIGNMENTS)]
+        if kind == 'bold':
+            return [f.ESC + b'E' + (b'\x01' if element.get('value', True) else b'\x00')]
+        if kind == 'size':
+            return [f.GS + b'!' + self._choice(element, SIZES)]
+        if kind == 'feed':
+            return [b'\n' * int(element.get('lines', 1))]
+        if kind == 'text':
+            return [str(element.get('text', '')).encode(f.encoding, errors='replace') + newline]
+        if kind == 'separator':
+            return [f._format_separator(
+                char=element.get('char', '='),
+                newline_before=element.get('newline_before', False),
+                newline_after=element.get('newline_after', True),
+                width=element.get('width', width)
+            )]
+
+        if kind == 'field':
+            field = self._field(element)
+            encoding = f.encoding
+            return [lambda job: str(getattr(job, field)).encode(encoding, errors='replace') + newline]
+        if kind == 'wrap':
+            field = self._field(element)
+            wrap_width = element.get('width', width)
+            return [lambda job: f._wrap_text(getattr(job, field), wrap_width)]
+        if kind == 'details':
+            return [self._compile_details(element)]
+        if kind == 'materials':
+            empty = str(element.get('empty_text', 'Geen materialen gebruikt')).encode(f.encoding, errors='replace') + b'\n'
+            return [lambda job: b''.join(
+                f._format_material_line(naam, aantal, prijs) for naam, aantal, prijs in job.iter_materials()
+            ) if job.material_count else empty]
+        if kind == 'total':
+            field = element.get('field', 'total_price')
+            self._field({'field': field})
+            label = element.get('label', 'TOTAAL')
+            return [lambda job: f._format_total_line(label, getattr(job, field) or 0)]
+        if kind == 'qr':
+            field = self._field(element)
+            return [lambda job: f._generate_qr_code(getattr(job, field))]
+        if kind == 'image':
+            field = self._field(element)
+            image_width = int(element.get('width', 192))
+            max_height = int(element.get('max_height', image_width))
+            method = element.get('dither', DITHER_FLOYD_STEINBERG)
+            if method not in DITHER_METHODS:
+                raise TemplateError(f'Invalid image dither {method!r}, expected one of {list(DITHER_METHODS)}')
+            return [lambda job: f._generate_photo(getattr(job, field), image_width, max_height, method)]
+        if kind == 'if':
+            field = self._field(element)
+            then_plan = RenderPlan('then', self._compile_elements(element.get('then', []), width))
+            else_plan = RenderPlan('else', self._compile_elements(element.get('else', []), width))
+            return [lambda job: then_plan.render(job) if getattr(job, field) else else_plan.render(job)]
+
+        raise TemplateError(f'Unknown template element type: {kind!r}')
+
+    def _compile_details(self, element: Dict[str, Any]) -> Callable[[PrintJob], bytes]:
+        """Compile a block of bold labels with values, padded to a common width"""
+        f = self.formatter
+        label_width = element.get('label_width', 13)
+        rows = []
+        for row in element.get('rows', []):
+            field = self._field(row)
+            label = row.get('label', '')
+            rows.append((
+                f.ESC + b'E\x01' + label.encode(f.encoding, errors='replace') + f.ESC + b'E\x00',
+                ' ' * max(label_width - len(label), 0),
+                len(label),
+                field
+            ))
+        encoding = f.encoding
+
+        def render_details(job: PrintJob) -> bytes:
+            values = [(prefix, pad + str(getattr(job, field)), label_len) for prefix, pad, label_len, field in rows]
+            # Pad every line to the longest one so the block is centered as a whole
+            max_len = max(label_len + len(value) for _, value, label_len in values)
+            return b''.join(
+                prefix + value.ljust(max_len - label_len).encode(encoding, errors='replace') + b'\n'
+                for prefix, value, label_len in values
+            )
+
+        if not rows:
+            raise TemplateError('Details element needs at least one row')
+        return render_details
+
+    @staticmethod
+    def _field(element: Dict[str, Any]) -> str:
+        """Validate a field binding"""
+        field = element.get('field')
+        if field not in FIELDS:
+            raise TemplateError(f'Unknown template field: {field!r}')
+        return field
+
+    @staticmethod
+    def _choice(element: Dict[str, Any], choices: Dict[str, bytes]) -> bytes:
+        """Validate an enumerated element value"""
+        value = element.get('value')
+        if value not in choices:
+            raise TemplateError(f'Invalid {element["type"]} value {value!r}, expected one of {sorted(choices)}')
+        return choices[value]
+
+
+class TemplateStore:
+    """Loads, compiles and hot-reloads ticket templates from a directory"""
+
+    EXTENSIONS = ('.json', '.yaml', '.yml')
+
+    def __init__(self, formatter: 'TicketFormatter', directory: Optional[str] = None, reload_interval: float = 2.0):
+        """
+        Initialize template store
+
+        Args:
+            formatter: Ticket formatter providing encoding and ESC/POS helpers
+            directory: Directory containing <ticket type>.json templates
+            reload_interval: Minimum seconds between checks for changed template files
+        """
+        self.directory = directory or DEFAULT_TEMPLATE_DIR
+        self.reload_interval = reload_interval
+        self.version = 0
+        self._compiler = TemplateCompiler(formatter)
+        self._plans: Dict[str, RenderPlan] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._load_all()
+
+    @property
+    def names(self) -> List[str]:
+        """Names of the loaded templates"""
+        return sorted(self._plans)
+
+    def get_plan(self, ticket_type: Optional[str]) -> RenderPlan:
+        """
+        Get the render plan for a ticket type
+
+        Args:
+            ticket_type: printData type, None for intake tickets
+
+        Returns:
+            Compiled render plan
+        """
+        now = time.monotonic()
+        if now - self._last_check >= self.reload_interval:
+            self._last_check = now
+            self._reload_changed()
+        plan = self._plans.get(ticket_type or FALLBACK_TEMPLATE)
+        if plan is None:
+            plan = self._plans[FALLBACK_TEMPLATE]
+        return plan
+
+    def _template_files(self) -> Dict[str, str]:
+        """Map template names to file paths"""
+        files = {}
+        for filename in sorted(os.listdir(self.directory)):
+            name, ext = os.path.splitext(filename)
+            if ext in self.EXTENSIONS and (ext == '.json' or YAML_AVAILABLE):
+                files.setdefault(name, os.path.join(self.directory, filename))
+        return files
+
+    def _load(self, name: str, path: str) -> RenderPlan:
+        """Read and compile a single template file"""
+        with open(path, 'r', encoding='utf-8') as template_file:
+            if path.endswith('.json'):
+                spec = json.load(template_file)
+            else:
+                try:
+                    spec = yaml.safe_load(template_file)
+                except yaml.YAMLError as e:
+                    raise TemplateError(str(e)) from e
+        return self._compiler.compile(name, spec)
+
+    def _load_all(self) -> None:
+        """Load all templates, failing on any invalid template"""
+        for name, path in self._template_files().items():
+            try:
+                self._plans[name] = self._load(name, path)
+            except (OSError, ValueError) as e:
+                raise TemplateError(f'Failed to load template {path}: {e}') from e
+            self._mtimes[path] = os.path.getmtime(path)
+        if FALLBACK_TEMPLATE not in self._plans:
+            raise TemplateError(f'No {FALLBACK_TEMPLATE!r} template found in {self.directory}')
+        self.version += 1
+        logger.info(f'Loaded ticket templates: {", ".join(sorted(self._plans))}')
+
+    def recompile(self) -> None:
+        """Compile every template again after the formatter's layout settings changed"""
+        with self._lock:
+            try:
+                files = self._template_files()
+            except OSError as e:
+                logger.warning('Cannot scan template directory: %s', e)
+                return
+            for name, path in files.items():
+                try:
+                    self._plans[name] = self._load(name, path)
+                    self._mtimes[path] = os.path.getmtime(path)
+                except (OSError, ValueError) as e:
+                    logger.error('Failed to recompile template %s, keeping previous version: %s', path, e)
+            self.version += 1
+
+    def _reload_changed(self) -> None:
+        """Recompile templates whose files changed, keeping the last good plan on errors"""
+        with self._lock:
+            try:
+                files = self._template_files()
+            except OSError as e:
+                logger.warning(f'Cannot scan template directory: {e}')
+                return
+            changed = False
+            for name, path in files.items():
+                try:
+                    mtime = os.path.getmtime(path)
+                    if self._mtimes.get(path) == mtime:
+                        continue
+                    self._mtimes[path] = mtime
+                    self._plans[name] = self._load(name, path)
+                    changed = True
+                    logger.info(f'Reloaded ticket template: {name}')
+                except (OSError, ValueError) as e:
+                    logger.error(f'Failed to reload template {path}, keeping previous version: {e}')
+            if changed:
+                self.version += 1
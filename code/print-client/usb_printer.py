@@ -5,9 +5,12 @@ Handles low-level printer communication via USB using python-escpos or Win32 pri
 
 import logging
 import sys
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple, Union, TYPE_CHECKING
 
-from printer_base import BasePrinter, PrinterCommunicationError
+from printer_base import BasePrinter, PrinterCommunicationError, BatchSendError, Buffers, PAPER_OK, PAPER_NEAR_END, PAPER_OUT
+
+if TYPE_CHECKING:
+    from printer_profile import PrinterProfile
 
 # Try to import USB printer support
 try:
@@ -105,6 +108,8 @@ class USBPrinter(BasePrinter):
         self.out_ep = out_ep
         self._printer = None
         self.use_win32 = False
+        # Bytes per write, the printer's receive buffer (0 writes each buffer whole)
+        self.write_size = 0
         
         # On Windows, prefer win32print if printer name is provided
         if sys.platform == 'win32' and printer_name and WIN32_AVAILABLE:
@@ -173,30 +178,85 @@ class USBPrinter(BasePrinter):
         Raises:
             PrinterCommunicationError: If connection or sending fails
         """
+        self.send_buffers((data,))
+    
+    def send_buffers(self, buffers: Buffers) -> None:
+        """
+        Send buffers to the printer in order as one print job, without concatenating them
+        
+        Args:
+            buffers: Byte buffers in output order
+            
+        Raises:
+            PrinterCommunicationError: If connection or sending fails
+        """
+        self.send_batch((buffers,))
+    
+    def send_batch(self, batch: Sequence[Buffers]) -> None:
+        """
+        Send several tickets back-to-back in one session (one spooler document on Windows)
+        
+        Args:
+            batch: Buffers of each ticket, in output order
+            
+        Raises:
+            BatchSendError: If sending fails; tickets before the failing one were written
+        """
+        completed = 0
+        offset = 0
         try:
             printer = self._get_printer()
-            logger.info(f'Sending {len(data)} bytes to printer')
+            logger.debug('Sending tickets to printer')
             
             if self.use_win32:
                 # Use Windows printer spooler
                 job_id = win32print.StartDocPrinter(printer, 1, ("Repair Cafe Ticket", None, "RAW"))
                 try:
                     win32print.StartPagePrinter(printer)
-                    win32print.WritePrinter(printer, data)
+                    for buffers in batch:
+                        for buffer in buffers:
+                            for piece in self._pieces(buffer):
+                                win32print.WritePrinter(printer, piece)
+                        completed += 1
+                        offset += sum(len(buffer) for buffer in buffers)
                     win32print.EndPagePrinter(printer)
                 finally:
                     win32print.EndDocPrinter(printer)
-                logger.info(f'Print data sent successfully (Job ID: {job_id})')
+                logger.debug('Print data sent successfully (Job ID: %s, %d bytes)', job_id, offset)
             else:
-                printer._raw(data)
-                logger.info('Print data sent successfully')
+                for buffers in batch:
+                    for buffer in buffers:
+                        for piece in self._pieces(buffer):
+                            printer._raw(piece)
+                    completed += 1
+                    offset += sum(len(buffer) for buffer in buffers)
+                logger.debug('Print data sent successfully (%d bytes)', offset)
             
         except Exception as e:
             error_msg = f'Failed to print: {e}'
             logger.error(error_msg)
             # Reset printer instance on error
             self._close_printer()
-            raise PrinterCommunicationError(error_msg)
+            raise BatchSendError(error_msg, completed, offset)
+    
+    def set_profile(self, profile: 'PrinterProfile') -> None:
+        """
+        Write in pieces that fit the printer's receive buffer
+        
+        A write the printer cannot take in at once has to finish within the USB
+        timeout while the printer prints, which slow printers with small buffers miss.
+        
+        Args:
+            profile: Printer capability profile
+        """
+        self.write_size = profile.receive_buffer
+    
+    def _pieces(self, buffer: Union[bytes, bytearray, memoryview]) -> Sequence[Union[bytes, bytearray, memoryview]]:
+        """Split a buffer into write-sized pieces without copying it"""
+        if not self.write_size or len(buffer) <= self.write_size:
+            return (buffer,)
+        view = memoryview(buffer)
+        return [view[start:start + self.write_size] for start in range(0, len(view), self.write_size)]
     
     def test_connection(self) -> bool:
         """
@@ -213,13 +273,59 @@ class USBPrinter(BasePrinter):
             else:
                 # Test USB connection
                 printer = self._get_printer()
-            logger.info('Printer connection test successful')
+            logger.debug('Printer connection test successful')
             return True
         except Exception as e:
             logger.warning(f'Printer connection test failed: {e}')
             self._close_printer()
             return False
     
+    def get_paper_status(self) -> Optional[str]:
+        """
+        Read the paper roll sensor (USB only, the Windows spooler does not expose it)
+        
+        Returns:
+            PAPER_OK, PAPER_NEAR_END or PAPER_OUT, or None if not supported or unreadable
+        """
+        if self.use_win32:
+            return None
+        try:
+            # python-escpos: 2 = paper adequate, 1 = near end, 0 = no paper
+            status = self._get_printer().paper_status()
+        except Exception as e:
+            logger.debug('Paper status request failed: %s', e)
+            return None
+        return {2: PAPER_OK, 1: PAPER_NEAR_END, 0: PAPER_OUT}.get(status)
+    
+    def query(self, command: bytes, replies: int = 1, terminator: bytes = b'\x00', max_length: int = 256) -> Optional[bytes]:
+        """
+        Send a command and read the printer's replies (USB only, the Windows spooler is write-only)
+        
+        Args:
+            command: Raw command bytes (may contain several requests)
+            replies: Number of terminated replies to wait for
+            terminator: Byte ending each reply
+            max_length: Maximum number of bytes to read
+            
+        Returns:
+            The bytes read, or None if the printer did not answer
+        """
+        if self.use_win32:
+            return None
+        response = b''
+        try:
+            printer = self._get_printer()
+            printer._raw(command)
+            while response.count(terminator) < replies and len(response) < max_length:
+                chunk = bytes(printer._read())
+                if not chunk:
+                    break
+                response += chunk
+        except Exception as e:
+            # A read timeout ends the reply as well
+            logger.debug('Printer query failed after %d bytes: %s', len(response), e)
+        return response or None
+    
     def _close_printer(self) -> None:
         """Internal method to close the printer"""
         if self._printer is not None:
@@ -12,6 +12,7 @@ import {
     deleteCafedag,
     createCafe,
     updateCafe,
+    printCafedagRapport,
 } from '@/lib/actions/cafedagen';
 import { Plus } from '@deemlol/next-icons';
 
@@ -47,12 +48,14 @@ export default function CafeDagenClient({ cafedagen }: CafeDagenClientProps) {
     const [showEditModal, setShowEditModal] = useState(false);
     const [selectedItem, setSelectedItem] = useState<TableRow | null>(null);
     const [modalTitle, setModalTitle] = useState('CafeDag bewerken');
+    const [printingId, setPrintingId] = useState<number | null>(null);
 
     const columns = [
         { key: 'startDate', header: 'Start Datum' },
         { key: 'endDate', header: 'Eind Datum' },
         { key: 'location', header: 'Locatie' },
-        { key: 'name', header: 'Naam' }
+        { key: 'name', header: 'Naam' },
+        { key: 'report', header: 'Dagrapport' }
     ];
 
     // Transform data for table
@@ -70,6 +73,31 @@ export default function CafeDagenClient({ cafedagen }: CafeDagenClientProps) {
         item.location.toLowerCase().includes(searchTerm.toLowerCase())
     );
 
+    const handlePrintReport = async (item: TableRow) => {
+        setPrintingId(item.cafedagId);
+        const result = await printCafedagRapport(item.cafedagId);
+        setPrintingId(null);
+        if (!result.success) {
+            alert('Fout bij het printen van het dagrapport: ' + ('error' in result ? result.error : 'Onbekende fout'));
+        }
+    };
+
+    const renderCell = (key: string, value: any, item: TableRow) => {
+        if (key === 'report') {
+            return (
+                <Button
+                    variant="primary"
+                    className="h-8 px-3"
+                    onClick={() => handlePrintReport(item)}
+                    disabled={printingId !== null}
+                >
+                    {printingId === item.cafedagId ? 'Bezig...' : 'Printen'}
+                </Button>
+            );
+        }
+        return value;
+    };
+
     const handleEdit = (item: TableRow) => {
         setSelectedItem(item);
         setModalTitle('CafeDag bewerken');
@@ -173,6 +201,7 @@ export default function CafeDagenClient({ cafedagen }: CafeDagenClientProps) {
                         data={filteredData}
                         onEdit={handleEdit}
                         onDelete={handleDelete}
+                        renderCell={renderCell}
                     />
                 </div>
             </div>
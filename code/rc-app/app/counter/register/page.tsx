@@ -8,6 +8,7 @@ import Dropdown from '../../components/Dropdown';
 import Button from '../../components/Button';
 import ProtectedRoute from '../../components/ProtectedRoute';
 import { registerVoorwerp } from '@/lib/actions/voorwerpen';
+import { Upload } from '@deemlol/next-icons/';
 
 export default function RegisterItemPage() {
   const router = useRouter();
@@ -19,6 +20,8 @@ export default function RegisterItemPage() {
     itemDescription: '',
     departmentId: ''
   });
+  const [photo, setPhoto] = useState<File | null>(null);
+  const [photoPreview, setPhotoPreview] = useState('');
   const [departments, setDepartments] = useState<Array<{ value: string; label: string }>>([]);
   const [error, setError] = useState('');
   const [isLoading, setIsLoading] = useState(false);
@@ -49,12 +52,45 @@ export default function RegisterItemPage() {
     fetchDepartments();
   }, []);
 
+  const handlePhotoChange = (e: React.ChangeEvent<HTMLInputElement>) => {
+    const file = e.target.files?.[0];
+    if (file) {
+      setPhoto(file);
+      const reader = new FileReader();
+      reader.onloadend = () => {
+        setPhotoPreview(reader.result as string);
+      };
+      reader.readAsDataURL(file);
+    }
+  };
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault();
     setError('');
     setIsLoading(true);
 
     try {
+      // Upload the photo first, it is printed as a thumbnail on the intake ticket
+      let photoUrl: string | undefined = undefined;
+      if (photo) {
+        const uploadData = new FormData();
+        uploadData.append('file', photo);
+
+        const uploadResponse = await fetch('/api/upload', {
+          method: 'POST',
+          body: uploadData,
+        });
+
+        if (!uploadResponse.ok) {
+          const uploadError = await uploadResponse.json();
+          setError('Fout bij uploaden foto: ' + (uploadError.error || 'Onbekende fout'));
+          setIsLoading(false);
+          return;
+        }
+
+        photoUrl = (await uploadResponse.json()).url;
+      }
+
       // Trim input fields to avoid accidental whitespace-only values
       const payload = {
         ...formData,
@@ -63,6 +99,7 @@ export default function RegisterItemPage() {
         customerType: formData.customerType?.trim() || '',
         problemDescription: formData.problemDescription.trim(),
         itemDescription: formData.itemDescription.trim(),
+        photoUrl,
       }
 
       const result = await registerVoorwerp(payload);
@@ -176,6 +213,39 @@ export default function RegisterItemPage() {
                 onChange={(e) => setFormData({ ...formData, itemDescription: e.target.value })}
                 disabled={isLoading}
               />
+              <div className="flex flex-col gap-2">
+                <label className="text-white font-inter text-xs font-normal">
+                  Foto
+                </label>
+                <div className="flex items-stretch gap-2.5">
+                  {photoPreview && (
+                    <div className="w-1/2 h-36 rounded overflow-hidden bg-gray-200">
+                      <img
+                        src={photoPreview}
+                        alt="Preview"
+                        className="w-full h-full object-contain"
+                      />
+                    </div>
+                  )}
+                  <label
+                    className={`border-6 border-dotted border-white rounded-4xl cursor-pointer flex items-center justify-center -bg-transparent hover:bg-white/10 transition-colors ${photoPreview ? 'w-1/2' : 'w-full'} h-36`}
+                  >
+                    <div className='h-full w-full flex items-center justify-center p-2.5'>
+                      <Upload className="w-full h-full" color="#FFFFFF" />
+                      <span className="ml-2 text-white font-inter text-md font-normal">
+                        Upload een foto van het voorwerp (Optioneel)
+                      </span>
+                    </div>
+                    <input
+                      type="file"
+                      accept="image/*"
+                      onChange={handlePhotoChange}
+                      className="hidden"
+                      disabled={isLoading}
+                    />
+                  </label>
+                </div>
+              </div>
             </div>
           </div>
         </div>
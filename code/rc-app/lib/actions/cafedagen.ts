@@ -134,3 +134,36 @@ export async function deleteCafe(cafeId: number) {
         return { success: false, error: 'Failed to delete cafe' }
     }
 }
+
+// Print the end-of-day report of a cafedag; the printer fetches the items page by page
+export async function printCafedagRapport(cafedagId: number) {
+    try {
+        const cafedag = await prisma.cafedag.findUnique({
+            where: { cafedagId },
+            include: {
+                cafe: true,
+            },
+        })
+
+        if (!cafedag) {
+            return { success: false, error: 'Cafedag not found' }
+        }
+
+        const { sendPrintJob } = await import('@/lib/printer-broadcast')
+        const datum = cafedag.startDatum.toLocaleDateString('nl-BE')
+
+        return await sendPrintJob({
+            volgnummer: `DAGRAPPORT-${cafedagId}`,
+            klantType: '',
+            afdelingNaam: '',
+            printData: {
+                type: 'report',
+                cafedagId,
+                titel: `${cafedag.cafe.naam} ${datum}`,
+            },
+        })
+    } catch (error) {
+        console.error('Error printing cafedag report:', error)
+        return { success: false, error: 'Failed to print cafedag report' }
+    }
+}
@@ -82,7 +82,7 @@ export async function getConnectedPrinters() {
  */
 export async function createPrintJob(data: {
   printerId: number
-  voorwerpId: number
+  voorwerpId?: number // Not set for end-of-day reports
   volgnummer: string
   klantType: string
   afdelingNaam: string
@@ -94,7 +94,7 @@ export async function createPrintJob(data: {
     const printJob = await prisma.printJob.create({
       data: {
         printerId: data.printerId,
-        voorwerpId: data.voorwerpId,
+        voorwerpId: data.voorwerpId ?? null,
         volgnummer: data.volgnummer,
         klantNaam: data.klantType, // Store klantType in klantNaam field temporarily
         klantTelefoon: null, // No longer used
@@ -86,6 +86,7 @@ interface RegisterVoorwerpInput {
   problemDescription: string
   itemDescription: string
   departmentId?: string
+  photoUrl?: string
 }
 
 export async function registerVoorwerp(data: RegisterVoorwerpInput) {
@@ -200,6 +201,7 @@ export async function registerVoorwerp(data: RegisterVoorwerpInput) {
         afdelingId: afdelingId,
         voorwerpBeschrijving: data.itemDescription,
         klachtBeschrijving: data.problemDescription,
+        fotoUrl: data.photoUrl || null,
       },
     })
 
@@ -241,7 +243,8 @@ export async function registerVoorwerp(data: RegisterVoorwerpInput) {
         afdelingNaam: afdelingNaam,
         voorwerpBeschrijving: voorwerp!.voorwerpBeschrijving,
         klachtBeschrijving: voorwerp!.klachtBeschrijving,
-        printData: undefined,
+        // Stored with the job so resends after a reconnect still print the thumbnail
+        printData: voorwerp!.fotoUrl ? { fotoUrl: voorwerp!.fotoUrl } : undefined,
       })
 
       if (printResult.success) {
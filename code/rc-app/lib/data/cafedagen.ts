@@ -1,4 +1,8 @@
 import prisma from '@/lib/prisma'
+import type { ReportPage } from '@/types/socket'
+
+export const REPORT_PAGE_SIZE = 50
+export const REPORT_MAX_PAGE_SIZE = 200
 
 // GET all cafedagen with their cafe info
 export async function getCafedagen() {
@@ -32,3 +36,53 @@ export async function getCafes() {
     throw new Error('Failed to fetch cafes')
   }
 }
+
+// GET one page of the end-of-day report of a cafedag, items ordered per afdeling
+export async function getCafedagReportPage(
+  cafedagId: number,
+  page: number,
+  pageSize: number = REPORT_PAGE_SIZE
+): Promise<ReportPage> {
+  const take = Math.min(Math.max(Math.floor(pageSize), 1), REPORT_MAX_PAGE_SIZE)
+  const rows = await prisma.cafedagvoorwerp.findMany({
+    where: { cafedagId },
+    include: {
+      voorwerp: {
+        include: {
+          afdeling: true,
+          voorwerpStatus: true,
+          gebruikteMaterialen: {
+            include: {
+              materiaal: true,
+            },
+          },
+        },
+      },
+    },
+    orderBy: [
+      { voorwerp: { afdeling: { naam: 'asc' } } },
+      { voorwerp: { volgnummer: 'asc' } },
+    ],
+    skip: Math.max(Math.floor(page), 0) * take,
+    // One extra row tells whether there is a next page
+    take: take + 1,
+  })
+
+  const items = rows.slice(0, take).map(({ voorwerp }) => {
+    const materials = voorwerp.gebruikteMaterialen.map((gm) => ({
+      naam: gm.materiaal.naam,
+      aantal: gm.aantal,
+      prijsPerStuk: gm.materiaal.prijs || 0,
+    }))
+    return {
+      volgnummer: voorwerp.volgnummer,
+      afdelingNaam: voorwerp.afdeling.naam,
+      status: voorwerp.voorwerpStatus.naam,
+      voorwerpBeschrijving: voorwerp.voorwerpBeschrijving,
+      materials,
+      totalPrice: materials.reduce((sum, m) => sum + m.prijsPerStuk * m.aantal, 0),
+    }
+  })
+
+  return { items, nextPage: rows.length > take ? page + 1 : null }
+}
@@ -1,12 +1,227 @@
 import { createPrintJob } from '@/lib/actions/printers'
 import { getConnectedPrinters } from '@/lib/data/printers'
+import { prisma } from '@/lib/prisma'
+import { PRINTER_FLAG_DOWN, type PrinterLoad } from '@/types/socket'
+
+// Load reports older than this are refreshed with an on-demand load query
+const LOAD_REPORT_MAX_AGE_MS = 30_000
+const LOAD_QUERY_TIMEOUT_MS = 500
+
+type ConnectedPrinter = Awaited<ReturnType<typeof getConnectedPrinters>>[number]
+
+// Pending-job dispatch per printer, chained so concurrent credit grants never send a job twice
+const pendingDispatches = new Map<number, Promise<void>>()
+
+/**
+ * Check whether a printer can accept another job right now
+ * Printers that did not advertise a credit window (older clients) are not limited
+ */
+function hasPrinterCredit(printerId: number): boolean {
+  const credits = globalThis.printerCredits?.get(printerId)
+  return credits === undefined || credits > 0
+}
+
+/**
+ * Take one dispatch credit from a printer
+ * Returns false when the printer's credit window is exhausted
+ */
+function takePrinterCredit(printerId: number): boolean {
+  const credits = globalThis.printerCredits?.get(printerId)
+  if (credits === undefined) {
+    return true
+  }
+  if (credits <= 0) {
+    return false
+  }
+  globalThis.printerCredits?.set(printerId, credits - 1)
+  return true
+}
+
+/**
+ * Send a printer's pending jobs, as far as its credits allow
+ */
+export function dispatchPendingJobs(printerId: number): Promise<void> {
+  const previous = pendingDispatches.get(printerId) ?? Promise.resolve()
+  const next = previous
+    .then(() => sendPendingJobs(printerId))
+    .catch((error) => console.error('Error dispatching pending print jobs:', error))
+  pendingDispatches.set(printerId, next)
+  return next
+}
+
+const pendingJobInclude = {
+  voorwerp: {
+    include: {
+      klant: {
+        include: {
+          klantType: true,
+        },
+      },
+    },
+  },
+} as const
+
+/**
+ * Mark a pending job as sent to a printer, moving it there if it was queued for another one
+ * Returns false when another dispatch already took the job
+ */
+async function claimPendingJob(printJobId: number, printerId: number): Promise<boolean> {
+  const { count } = await prisma.printJob.updateMany({
+    where: { printJobId, status: 'pending' },
+    data: { printerId, status: 'sent', sentAt: new Date() },
+  })
+  return count === 1
+}
+
+/**
+ * Give back a credit taken for a job that was not sent after all
+ */
+function returnPrinterCredit(printerId: number) {
+  const credits = globalThis.printerCredits?.get(printerId)
+  if (credits !== undefined) {
+    globalThis.printerCredits?.set(printerId, credits + 1)
+  }
+}
+
+async function sendPendingJobs(printerId: number) {
+  const printer = await prisma.printer.findUnique({ where: { printerId } })
+  const socket = printer?.socketId ? globalThis.printerIo?.sockets.sockets.get(printer.socketId) : undefined
+  if (!printer || !socket || !hasPrinterCredit(printerId)) {
+    return
+  }
+
+  const pendingJobs = await prisma.printJob.findMany({
+    where: {
+      printerId,
+      status: 'pending',
+    },
+    include: pendingJobInclude,
+    orderBy: {
+      createdAt: 'asc',
+    },
+    take: globalThis.printerCredits?.get(printerId),
+  })
+
+  // Credits left over go to jobs stuck behind a disconnected or saturated printer.
+  // Only printers with a credit window take them, so older clients are not flooded.
+  // Broadcast copies stay put: each printer is meant to print its own.
+  const spare = (globalThis.printerCredits?.get(printerId) ?? 0) - pendingJobs.length
+  const strandedJobs = spare > 0
+    ? (await prisma.printJob.findMany({
+        where: {
+          printerId: { not: printerId },
+          status: 'pending',
+        },
+        include: { ...pendingJobInclude, printer: true },
+        orderBy: {
+          createdAt: 'asc',
+        },
+      }))
+        .filter((job) => !(job.printData as { broadcast?: boolean } | null)?.broadcast)
+        .filter((job) => !job.printer.isConnected || !hasPrinterCredit(job.printerId))
+        .slice(0, spare)
+    : []
+
+  let sent = 0
+  let moved = 0
+  for (const job of [...pendingJobs, ...strandedJobs]) {
+    if (!takePrinterCredit(printerId)) {
+      break
+    }
+    // Claim the job first: a printer with spare credits may be taking it at the same time
+    if (!(await claimPendingJob(job.printJobId, printerId))) {
+      returnPrinterCredit(printerId)
+      continue
+    }
+
+    socket.emit('print-job', {
+      printJobId: job.printJobId,
+      volgnummer: job.volgnummer,
+      // Reports have no item, klantNaam holds the klantType the job was created with
+      klantType: job.voorwerp?.klant.klantType.naam ?? job.klantNaam,
+      afdelingNaam: job.afdelingNaam,
+      voorwerpBeschrijving: job.voorwerp?.voorwerpBeschrijving,
+      klachtBeschrijving: job.voorwerp?.klachtBeschrijving,
+      printData: job.printData,
+      createdAt: job.createdAt.toISOString(),
+    })
+    sent += 1
+    if (job.printerId !== printerId) {
+      moved += 1
+    }
+  }
+
+  if (sent > 0) {
+    console.log(`Sent ${sent} pending jobs to ${printer.printerNaam}${moved > 0 ? ` (${moved} taken over from other printers)` : ''}`)
+  }
+}
+
+/**
+ * Ask a printer client for its current load, falling back to the last report
+ */
+async function getPrinterLoad(printer: ConnectedPrinter): Promise<PrinterLoad | undefined> {
+  const cached = globalThis.printerLoads?.get(printer.printerId)
+  if (cached && Date.now() - cached.receivedAt < LOAD_REPORT_MAX_AGE_MS) {
+    return cached
+  }
+
+  const socket = printer.socketId ? globalThis.printerIo?.sockets.sockets.get(printer.socketId) : undefined
+  if (!socket) {
+    return cached
+  }
+
+  try {
+    const report = await socket.timeout(LOAD_QUERY_TIMEOUT_MS).emitWithAck('load-query')
+    if (report) {
+      const load = { ...report, printerId: printer.printerId, receivedAt: Date.now() }
+      globalThis.printerLoads?.set(printer.printerId, load)
+      return load
+    }
+  } catch {
+    // Client did not answer in time (older client version) - use the last report
+  }
+  return cached
+}
+
+/**
+ * Pick the connected printer that will finish a new job first
+ * Printers reporting a down printer are only used when nothing else is available,
+ * printers without free credits only when every available printer is saturated
+ */
+async function selectLeastLoadedPrinter(printers: ConnectedPrinter[]): Promise<ConnectedPrinter> {
+  const loads = await Promise.all(printers.map(getPrinterLoad))
+
+  let best = printers[0]
+  let bestRank = Infinity
+  let bestScore = Infinity
+  printers.forEach((printer, index) => {
+    const load = loads[index]
+    // Estimated time until a new job would be printed; printers without a report count as idle
+    const score = load ? (load.queueDepth + 1) * Math.max(load.avgPrintMs, 1) : 1
+    const down = load ? (load.flags & PRINTER_FLAG_DOWN) !== 0 : false
+    const rank = (down ? 2 : 0) + (hasPrinterCredit(printer.printerId) ? 0 : 1)
+    if (rank < bestRank || (rank === bestRank && score < bestScore)) {
+      best = printer
+      bestRank = rank
+      bestScore = score
+    }
+  })
+
+  // Count the job right away so consecutive jobs spread before the next report arrives
+  const load = globalThis.printerLoads?.get(best.printerId)
+  if (load) {
+    load.queueDepth += 1
+  }
+
+  return best
+}
 
 /**
  * Send a print job to a connected printer
  * Returns the print job if successful
  */
 export async function sendPrintJob(data: {
-  voorwerpId: number
+  voorwerpId?: number // Not set for end-of-day reports
   volgnummer: string
   klantType: string
   afdelingNaam: string
@@ -15,7 +230,6 @@ export async function sendPrintJob(data: {
   printData?: any // Additional JSON data (e.g., payment details, materials)
 }) {
   try {
-    // Get first available connected printer
     const connectedPrinters = await getConnectedPrinters()
 
     if (connectedPrinters.length === 0) {
@@ -23,8 +237,8 @@ export async function sendPrintJob(data: {
       return { success: false, error: 'Geen verbonden printers beschikbaar' }
     }
 
-    // Use the first available printer
-    const printer = connectedPrinters[0]
+    // Route the job to the least-loaded printer
+    const printer = await selectLeastLoadedPrinter(connectedPrinters)
 
     // Create print job in database
     const result = await createPrintJob({
@@ -42,9 +256,17 @@ export async function sendPrintJob(data: {
       return result
     }
 
-    // Send to printer via WebSocket if connected
-    if (printer.socketId && globalThis.printerIo) {
+    // Send to printer via WebSocket if connected and it has room for the job
+    if (printer.socketId && globalThis.printerIo && !takePrinterCredit(printer.printerId)) {
+      console.log(`Printer ${printer.printerNaam} has no free credits - job will be sent when it catches up`)
+    } else if (printer.socketId && globalThis.printerIo) {
       try {
+        // Claim the job before sending it: an idle printer may take over pending jobs of a saturated one
+        if (!(await claimPendingJob(result.printJob.printJobId, printer.printerId))) {
+          returnPrinterCredit(printer.printerId)
+          return { success: true, printJob: result.printJob, printer }
+        }
+
         globalThis.printerIo.to(printer.socketId).emit('print-job', {
           printJobId: result.printJob.printJobId,
           volgnummer: data.volgnummer,
@@ -53,16 +275,15 @@ export async function sendPrintJob(data: {
           voorwerpBeschrijving: data.voorwerpBeschrijving,
           klachtBeschrijving: data.klachtBeschrijving,
           printData: data.printData,
+          createdAt: result.printJob.createdAt.toISOString(),
         })
 
-        // Update status to sent
-        const { updatePrintJobStatus } = await import('@/lib/data/printers')
-        await updatePrintJobStatus(result.printJob.printJobId, 'sent')
-
         console.log(`Print job ${result.printJob.printJobId} sent to printer ${printer.printerNaam}`)
       } catch (emitError) {
         console.error('Error emitting print job to socket:', emitError)
-        // Job is created in DB but not sent - will be picked up on reconnect
+        // Job is created in DB but not sent - put it back so it is picked up on reconnect
+        const { updatePrintJobStatus } = await import('@/lib/data/printers')
+        await updatePrintJobStatus(result.printJob.printJobId, 'pending')
       }
     } else {
       console.warn(`Printer ${printer.printerNaam} not connected - job will be sent on reconnect`)
@@ -107,14 +328,15 @@ export async function broadcastPrintJob(data: {
         afdelingNaam: data.afdelingNaam,
         voorwerpBeschrijving: data.voorwerpBeschrijving || undefined,
         klachtBeschrijving: data.klachtBeschrijving || undefined,
-        printData: data.printData,
+        // Marked so pending copies are never moved to a printer that prints its own copy
+        printData: { ...data.printData, broadcast: true },
       })
 
       if (result.success && result.printJob) {
         printJobs.push(result.printJob)
 
-        // Send to printer via WebSocket if connected
-        if (printer.socketId && globalThis.printerIo) {
+        // Send to printer via WebSocket if connected and it has room for the job
+        if (printer.socketId && globalThis.printerIo && takePrinterCredit(printer.printerId)) {
           try {
             globalThis.printerIo.to(printer.socketId).emit('print-job', {
               printJobId: result.printJob.printJobId,
@@ -124,6 +346,7 @@ export async function broadcastPrintJob(data: {
               voorwerpBeschrijving: data.voorwerpBeschrijving,
               klachtBeschrijving: data.klachtBeschrijving,
               printData: data.printData,
+              createdAt: result.printJob.createdAt.toISOString(),
             })
 
             // Update status to sent
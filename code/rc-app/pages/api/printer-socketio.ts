@@ -1,7 +1,19 @@
 import { Server } from 'socket.io'
 import type { NextApiRequest } from 'next'
-import type { NextApiResponseServerIO } from '@/types/socket'
+import type {
+  NextApiResponseServerIO,
+  PrintFailedData,
+  PrinterCreditData,
+  PrinterLoad,
+  PrinterLoadReport,
+  PrinterRegisteredData,
+  PrinterRegistrationData,
+  ReportPage,
+  ReportPageRequest,
+} from '@/types/socket'
 import { prisma } from '@/lib/prisma'
+import { dispatchPendingJobs } from '@/lib/printer-broadcast'
+import { getCafedagReportPage } from '@/lib/data/cafedagen'
 
 declare global {
   // eslint-disable-next-line no-var
@@ -31,11 +43,19 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
     // Store printer connections
     const printerConnections = new Map<string, string>() // socketId -> printerNaam
 
+    // Latest load report per printer, used to route jobs to the least-loaded printer
+    const printerLoads = globalThis.printerLoads ?? new Map<number, PrinterLoad>()
+    globalThis.printerLoads = printerLoads
+
+    // Jobs each printer can still accept (credit-based flow control)
+    const printerCredits = globalThis.printerCredits ?? new Map<number, number>()
+    globalThis.printerCredits = printerCredits
+
     io.on('connection', async (socket) => {
       console.log('Printer client connected:', socket.id)
 
       // Register printer
-      socket.on('register-printer', async (data: { printerNaam: string }) => {
+      socket.on('register-printer', async (data: PrinterRegistrationData) => {
         try {
           const { printerNaam } = data
 
@@ -62,64 +82,72 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
 
           printerConnections.set(socket.id, printerNaam)
 
-          socket.emit('printer-registered', {
+          const registered: PrinterRegisteredData = {
             printerId: printer.printerId,
-            printerNaam: printer.printerNaam
-          })
+            printerNaam: printer.printerNaam,
+            serverTime: new Date().toISOString(),
+          }
+          socket.emit('printer-registered', registered)
 
           console.log(`Printer registered: ${printerNaam} (ID: ${printer.printerId})`)
 
-          // Send pending print jobs for this printer
-          const pendingJobs = await prisma.printJob.findMany({
-            where: {
-              printerId: printer.printerId,
-              status: 'pending',
-            },
-            include: {
-              voorwerp: {
-                include: {
-                  klant: {
-                    include: {
-                      klantType: true,
-                    },
-                  },
-                },
-              },
-            },
-            orderBy: {
-              createdAt: 'asc',
-            },
-          })
-
-          if (pendingJobs.length > 0) {
-            console.log(`Sending ${pendingJobs.length} pending jobs to ${printerNaam}`)
-            for (const job of pendingJobs) {
-              socket.emit('print-job', {
-                printJobId: job.printJobId,
-                volgnummer: job.volgnummer,
-                klantType: job.voorwerp.klant.klantType.naam,
-                afdelingNaam: job.afdelingNaam,
-                voorwerpBeschrijving: job.voorwerp.voorwerpBeschrijving,
-                klachtBeschrijving: job.voorwerp.klachtBeschrijving,
-                printData: job.printData,
-              })
-
-              // Update job status to sent
-              await prisma.printJob.update({
-                where: { printJobId: job.printJobId },
-                data: {
-                  status: 'sent',
-                  sentAt: new Date(),
-                },
-              })
-            }
+          // Credit window advertised by the client; older clients are not limited
+          if (typeof data.credits === 'number') {
+            printerCredits.set(printer.printerId, Math.max(0, data.credits))
+          } else {
+            printerCredits.delete(printer.printerId)
           }
+
+          // Send pending print jobs for this printer, as far as its credits allow
+          await dispatchPendingJobs(printer.printerId)
         } catch (error) {
           console.error('Error registering printer:', error)
           socket.emit('error', { message: 'Fout bij registreren van printer' })
         }
       })
 
+      // Handle printer load reports
+      socket.on('printer-load', (data: PrinterLoadReport) => {
+        if (typeof data?.printerId !== 'number') {
+          return
+        }
+        printerLoads.set(data.printerId, { ...data, receivedAt: Date.now() })
+      })
+
+      // Handle credits returned by the printer as it finishes jobs
+      socket.on('printer-credit', (data: PrinterCreditData) => {
+        if (typeof data?.printerId !== 'number' || typeof data.credits !== 'number' || data.credits <= 0) {
+          return
+        }
+        const credits = printerCredits.get(data.printerId)
+        if (credits === undefined) {
+          return
+        }
+        printerCredits.set(data.printerId, credits + data.credits)
+        void dispatchPendingJobs(data.printerId)
+      })
+
+      // Serve end-of-day report pages, one at a time so the client prints long reports in constant memory
+      socket.on('report-page', async (data: ReportPageRequest, callback?: (page: ReportPage) => void) => {
+        if (typeof callback !== 'function') {
+          return
+        }
+        try {
+          const printJob = typeof data?.printJobId === 'number'
+            ? await prisma.printJob.findUnique({ where: { printJobId: data.printJobId } })
+            : null
+          const cafedagId = (printJob?.printData as { cafedagId?: number } | null)?.cafedagId
+          if (typeof cafedagId !== 'number') {
+            callback({ items: [], nextPage: null, error: 'Geen rapport gevonden voor deze printjob' })
+            return
+          }
+          callback(await getCafedagReportPage(cafedagId, data.page || 0, data.pageSize))
+        } catch (error) {
+          console.error('Error fetching report page:', error)
+          callback({ items: [], nextPage: null, error: 'Fout bij ophalen van rapport' })
+        }
+      })
+
       // Handle print job completion
       socket.on('print-completed', async (data: { printJobId: number }) => {
         try {
@@ -159,9 +187,11 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
       })
 
       // Handle print job failure
-      socket.on('print-failed', async (data: { printJobId: number; errorMessage?: string }) => {
+      socket.on('print-failed', async (data: PrintFailedData) => {
         try {
-          const { printJobId, errorMessage } = data
+          const { printJobId, errorMessage, reason } = data
+          // Stale jobs the client skipped are kept apart from real print failures
+          const status = reason === 'expired' ? 'expired' : 'failed'
 
           if (!printJobId) {
             socket.emit('error', { message: 'Print job ID is verplicht' })
@@ -172,22 +202,22 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
           const updatedJob = await prisma.printJob.update({
             where: { printJobId },
             data: {
-              status: 'failed',
+              status,
               errorMessage: errorMessage || 'Onbekende fout',
             },
           })
 
           socket.emit('print-ack', {
             printJobId,
-            status: 'failed'
+            status
           })
 
-          console.log(`Print job ${printJobId} failed: ${errorMessage}`)
+          console.log(`Print job ${printJobId} ${status}: ${errorMessage}`)
 
           // Notify all connected clients about the failure
           io.emit('print-status-update', {
             printJobId,
-            status: 'failed',
+            status,
             volgnummer: updatedJob.volgnummer,
             errorMessage,
           })
@@ -206,7 +236,7 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
         if (printerNaam) {
           try {
             // Update printer status in database
-            await prisma.printer.update({
+            const printer = await prisma.printer.update({
               where: { printerNaam },
               data: {
                 isConnected: false,
@@ -215,7 +245,16 @@ const printerIoHandler = async (req: NextApiRequest, res: NextApiResponseServerI
             })
 
             printerConnections.delete(socket.id)
+            printerLoads.delete(printer.printerId)
+            printerCredits.delete(printer.printerId)
             console.log(`Printer disconnected: ${printerNaam}`)
+
+            // Printers with spare credits take over the jobs still waiting for this one
+            for (const [printerId, credits] of printerCredits) {
+              if (credits > 0) {
+                void dispatchPendingJobs(printerId)
+              }
+            }
           } catch (error) {
             console.error('Error updating printer disconnect status:', error)
           }
@@ -0,0 +1,8 @@
+-- DropForeignKey
+ALTER TABLE "PrintJob" DROP CONSTRAINT "PrintJob_voorwerpId_fkey";
+
+-- AlterTable
+ALTER TABLE "PrintJob" ALTER COLUMN "voorwerpId" DROP NOT NULL;
+
+-- AddForeignKey
+ALTER TABLE "PrintJob" ADD CONSTRAINT "PrintJob_voorwerpId_fkey" FOREIGN KEY ("voorwerpId") REFERENCES "Voorwerp"("voorwerpId") ON DELETE SET NULL ON UPDATE CASCADE;
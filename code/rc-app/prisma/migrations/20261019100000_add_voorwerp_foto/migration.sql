@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "Voorwerp" ADD COLUMN     "fotoUrl" TEXT;
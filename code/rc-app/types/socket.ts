@@ -24,7 +24,10 @@ export interface PrintJobData {
   voorwerpBeschrijving?: string | null
   klachtBeschrijving?: string | null
   printData?: {
-    type?: 'registration' | 'delivery'
+    type?: 'registration' | 'delivery' | 'report'
+    // End-of-day reports: the café day to report on, items are fetched with 'report-page'
+    cafedagId?: number
+    titel?: string
     materials?: Array<{
       naam: string
       aantal: number
@@ -32,11 +35,34 @@ export interface PrintJobData {
     }>
     subtotal?: number
     totalPrice?: number
+    copies?: number
+    copyLabels?: string[]
   } | null
+  copies?: number
+  copyLabels?: string[]
+  // ISO 8601 creation time, lets clients skip jobs that went stale while queued
+  createdAt?: string
+  // Item photo (/uploads/... path), printed as a thumbnail on the intake ticket
+  fotoUrl?: string
 }
 
 export interface PrinterRegistrationData {
   printerNaam: string
+  // Number of jobs the client can accept right away (absent for clients without flow control)
+  credits?: number
+}
+
+export interface PrinterRegisteredData {
+  printerId: number
+  printerNaam: string
+  // Server clock (ISO 8601), lets clients judge the age of createdAt despite clock skew
+  serverTime: string
+}
+
+// Credits returned by a printer client as it finishes jobs
+export interface PrinterCreditData {
+  printerId: number
+  credits: number
 }
 
 export interface PrintCompletedData {
@@ -46,9 +72,58 @@ export interface PrintCompletedData {
 export interface PrintFailedData {
   printJobId: number
   errorMessage?: string
+  // 'expired': the client dropped the job unprinted because it was too old
+  reason?: 'expired'
+}
+
+// End-of-day report pages, requested by the printer client while it prints
+export interface ReportPageRequest {
+  printJobId: number
+  page: number
+  pageSize?: number
+}
+
+export interface ReportItem {
+  volgnummer: string
+  afdelingNaam: string
+  status: string
+  voorwerpBeschrijving: string | null
+  materials: Array<{
+    naam: string
+    aantal: number
+    prijsPerStuk: number
+  }>
+  totalPrice: number
+}
+
+export interface ReportPage {
+  items: ReportItem[]
+  // Next page number, null on the last page
+  nextPage: number | null
+  error?: string
+}
+
+// Printer load report status flags (bitmask), mirrored in print-client/load_report.py
+export const PRINTER_FLAG_BUSY = 0x01
+export const PRINTER_FLAG_DOWN = 0x02
+export const PRINTER_FLAG_RECENT_FAILURE = 0x04
+export const PRINTER_FLAG_PAPER_LOW = 0x08
+
+export interface PrinterLoadReport {
+  printerId: number | null
+  queueDepth: number
+  avgPrintMs: number
+  flags: number
+  credits: number
+}
+
+export interface PrinterLoad extends PrinterLoadReport {
+  receivedAt: number
 }
 
 // Global printer IO instance
 declare global {
   var printerIo: IOServer | undefined
+  var printerLoads: Map<number, PrinterLoad> | undefined
+  var printerCredits: Map<number, number> | undefined
 }